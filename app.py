@@ -1,11 +1,32 @@
 import streamlit as st
-import numpy as np
 from PIL import Image
 import io
+import time
 import json
-import math
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from datetime import date
 
+from vaidya import config, metrics
+from vaidya.cache import PredictionCache, content_key, model_fingerprint, perceptual_key
+from vaidya.cells import CellTableLoader, fingerprint
+from vaidya.geo import HospitalIndex
+from vaidya.hospitals import HOSPITALS
+from vaidya.inference import BatchingPredictor
+from vaidya.labels import class_info, scores_to_result
+from vaidya.pipeline import decode_many
+from vaidya.preprocess import BufferPool, decode_pixels, load_image, preprocess_image
+from vaidya.render import (UPLOAD_PLACEHOLDER, badge, card_grid, class_legend, error_row, hospital_card,
+                           page_bounds, page_head, result_panel, result_row, results_table, wound_card)
+from vaidya.search import HospitalSearchIndex
+from vaidya.server import RemoteModel
+from vaidya.storage import ANONYMOUS_PREFIX, Storage
+from vaidya.tta import apply_temperature, average_views, decode_views, load_calibration, parse_views, predict_tta
+from vaidya.wounds import wound_recovery
+from vaidya.startup import ModelLoader
+
 # ─────────────────────────────────────────────
 #  PAGE CONFIG  (must be FIRST streamlit call)
 # ─────────────────────────────────────────────
@@ -17,294 +38,349 @@ st.set_page_config(
 )
 
 # ─────────────────────────────────────────────
-#  GLOBAL CSS
+#  GLOBAL CSS + HEADER  (vaidya/static/app.css, minified once per process)
 # ─────────────────────────────────────────────
-st.markdown("""
-<style>
-  html, body, [class*="css"] {
-    font-family: 'Segoe UI', Tahoma, sans-serif;
-  }
-  .main { background: linear-gradient(135deg,#e3f2fd,#ffffff); }
-
-  .vaidya-header {
-    background: linear-gradient(90deg,#0d47a1,#1565c0);
-    padding: 20px 40px;
-    border-radius: 12px;
-    margin-bottom: 30px;
-    display: flex;
-    align-items: center;
-    justify-content: center;
-  }
-  .vaidya-header h1 { color: white; margin: 0; font-size: 2.2rem; }
-
-  .module-card {
-    background: white;
-    border-radius: 18px;
-    padding: 30px;
-    box-shadow: 0 10px 25px rgba(0,0,0,.1);
-    text-align: center;
-    margin-bottom: 20px;
-  }
-  .module-card h3 { color: #1565c0; }
-
-  .result-card {
-    background: white;
-    border-left: 6px solid #1565c0;
-    border-radius: 12px;
-    padding: 22px 28px;
-    margin-top: 18px;
-    box-shadow: 0 6px 18px rgba(0,0,0,.08);
-  }
-  .emergency-card { border-left: 6px solid red !important; }
-  .result-card h3 { color: #1565c0; }
-
-  .hospital-card {
-    background: white;
-    border-radius: 14px;
-    padding: 18px 22px;
-    box-shadow: 0 6px 16px rgba(0,0,0,.08);
-    border-top: 5px solid #1565c0;
-    margin-bottom: 12px;
-  }
-  .hospital-card h4 { color:#1565c0; margin:0 0 6px 0; }
-  .hospital-card p  { margin:3px 0; color:#555; font-size:.9rem; }
-
-  .wound-card {
-    background:white;
-    border-radius:12px;
-    padding:16px 20px;
-    box-shadow:0 4px 14px rgba(0,0,0,.07);
-    margin-bottom:10px;
-  }
-  .wound-card h4 { color:#1565c0; margin:0 0 4px 0; }
-
-  .badge-low      { background:#e8f5e9; color:#2e7d32; padding:4px 12px; border-radius:20px; font-size:.85rem; font-weight:600; }
-  .badge-medium   { background:#fff3e0; color:#e65100; padding:4px 12px; border-radius:20px; font-size:.85rem; font-weight:600; }
-  .badge-high     { background:#ffebee; color:#c62828; padding:4px 12px; border-radius:20px; font-size:.85rem; font-weight:600; }
-  .badge-critical { background:#4a148c; color:white;   padding:4px 12px; border-radius:20px; font-size:.85rem; font-weight:600; }
-
-  .confidence-bar {
-    background: #e3f2fd;
-    border-radius: 10px;
-    height: 14px;
-    margin: 4px 0 10px 0;
-    overflow: hidden;
-  }
-  .confidence-fill {
-    height: 100%;
-    border-radius: 10px;
-    background: linear-gradient(90deg, #1565c0, #42a5f5);
-  }
-
-  section[data-testid="stSidebar"] {
-    background: linear-gradient(180deg,#0d47a1,#1565c0);
-  }
-  section[data-testid="stSidebar"] * { color: white !important; }
-
-  .stButton > button {
-    background: linear-gradient(135deg,#1565c0,#0d47a1);
-    color: white;
-    border: none;
-    border-radius: 8px;
-    padding: 10px 26px;
-    font-weight: 600;
-  }
-</style>
-""", unsafe_allow_html=True)
+st.markdown(page_head(), unsafe_allow_html=True)
 
 
 # ─────────────────────────────────────────────
-#  ML MODEL — CLASS LABELS
-#
-#  ⚠️  YOUR MODEL HAS 7 OUTPUT CLASSES (units=7 in final Dense layer).
-#  These class names below must match the folder names you used
-#  when training. Edit them if your folder names are different!
+#  LOAD MODEL (cached — reloads only when the model file changes)
 # ─────────────────────────────────────────────
-CLASS_NAMES = {
-    0: "Abrasions",
-    1: "Bruises",
-    2: "Burns",
-    3: "Cut",
-    4: "Ingrown_nails",
-    5: "Laceration",
-    6: "Stab_wound"
-}
-
-CLASS_INFO = {
-    "Abrasion": {
-        "severity": "Low",
-        "medication": "Clean with antiseptic, apply antibiotic ointment, cover with bandage",
-        "healing": "3–7 days",
-        "advice": "Keep the wound clean and dry. Change dressing daily."
-    },
-    "Bruises": {
-        "severity": "Low",
-        "medication": "Apply ice pack for 20 minutes, rest the affected area",
-        "healing": "1–2 weeks",
-        "advice": "Elevate the affected limb if possible to reduce swelling."
-    },
-    "Burn": {
-        "severity": "Medium",
-        "medication": "Cool under running water for 10 mins, apply Silver Sulfadiazine Cream, cover loosely",
-        "healing": "7–14 days",
-        "advice": "Do NOT apply ice, butter or toothpaste. Seek doctor for burns larger than a palm."
-    },
-    "Cut": {
-        "severity": "Medium",
-        "medication": "Apply pressure to stop bleeding, clean wound, use butterfly strips or stitches if deep",
-        "healing": "5–10 days",
-        "advice": "Watch for signs of infection: redness, swelling, or pus."
-    },
-    "Ingrown_Nail": {
-        "severity": "Low",
-        "medication": "Soak in warm water, apply antibiotic ointment, wear comfortable footwear",
-        "healing": "1–2 weeks",
-        "advice": "If severely infected or painful, consult a doctor for minor surgery."
-    },
-    "Laceration": {
-        "severity": "High",
-        "medication": "Control bleeding with pressure, clean with saline, requires stitches — go to doctor",
-        "healing": "10–20 days",
-        "advice": "Lacerations usually require professional medical care. Do not delay."
-    },
-    "Stab_Wound": {
-        "severity": "Critical",
-        "medication": "Do NOT remove the object if embedded, apply pressure around wound, call emergency services",
-        "healing": "Weeks to months",
-        "advice": "CALL AMBULANCE IMMEDIATELY. This is a medical emergency."
-    },
-}
-
-BADGE = {
-    "Low":      "<span class='badge-low'>🟢 Low</span>",
-    "Medium":   "<span class='badge-medium'>🟠 Medium</span>",
-    "High":     "<span class='badge-high'>🔴 High</span>",
-    "Critical": "<span class='badge-critical'>🟣 Critical</span>",
-}
+def model_version():
+    """Identity of the model in use (cache key part): the local .h5 fingerprint,
+    or what the model server reports (None while it is unreachable)."""
+    if config.MODEL_SERVER:
+        try:
+            info = get_remote_model().ping()
+        except OSError:
+            return None
+        return ("server", info.get("backend"), info.get("quantize"), *info.get("model", []))
+    return model_fingerprint(config.MODEL_PATH)
+
+
+@st.cache_resource(max_entries=1)
+def get_model_loader(version=None):
+    """Process-wide loader; also used to preload the model in the background."""
+    return ModelLoader(config.BACKEND, config.MODEL_PATH, cache_dir=config.ARTIFACT_DIR,
+                       num_threads=config.NUM_THREADS, inter_threads=config.INTER_OP_THREADS,
+                       timings_log=config.STARTUP_LOG, quantize=config.QUANTIZE, calibration_dir=config.CALIBRATION_DIR,
+                       eval_dir=config.QUANT_EVAL_DIR)
 
 
-# ─────────────────────────────────────────────
-#  LOAD MODEL (cached — loads only once)
-# ─────────────────────────────────────────────
 @st.cache_resource
-def load_model():
+def get_remote_model():
+    """Client of the shared model server; connects lazily and reconnects after restarts."""
+    return RemoteModel(config.MODEL_SERVER, capacity=config.MAX_BATCH_SIZE)
+
+
+def load_model(version=None):
+    """Returns (backend, None) or (None, error). Backend chosen by VAIDYA_BACKEND / VAIDYA_QUANTIZE,
+    or a client of the shared model server when VAIDYA_MODEL_SERVER is set.
+
+    A server that is not reachable yet is reported but not cached, so the app
+    picks it up as soon as it starts."""
+    if not config.MODEL_SERVER:
+        return load_local_model(version)
+    if version is None:
+        metrics.ERRORS.inc(kind="model_load")
+        return None, f"model server {config.MODEL_SERVER} unavailable"
+    return get_remote_model(), None
+
+
+@st.cache_resource(max_entries=1)
+def load_local_model(version=None):
     try:
-        import tensorflow as tf
-        model = tf.keras.models.load_model("first_aid_wound_classifier_7class.h5")
+        with metrics.STAGE_SECONDS.time(stage="load_model"):
+            model = get_model_loader(version).result()
         return model, None
-    except ImportError:
-        return None, "tensorflow_missing"
+    except ImportError as e:
+        metrics.ERRORS.inc(kind="model_load")
+        return None, "tensorflow_missing" if config.BACKEND == "keras" else f"{config.BACKEND} runtime missing ({e})"
     except Exception as e:
+        metrics.ERRORS.inc(kind="model_load")
         return None, str(e)
 
 
-def preprocess_image(image: Image.Image) -> np.ndarray:
-    """Resize to 224x224, normalize to [0,1], add batch dimension."""
-    img = image.convert("RGB")
-    img = img.resize((224, 224))
-    arr = np.array(img, dtype=np.float32) / 255.0
-    return np.expand_dims(arr, axis=0)   # shape: (1, 224, 224, 3)
+@st.cache_resource
+def get_batcher():
+    """One micro-batching worker per server process, shared by every session."""
+    return BatchingPredictor(None, max_batch_size=config.MAX_BATCH_SIZE, max_wait_ms=config.MAX_WAIT_MS)
+
+
+def get_predictor(version=None):
+    """The shared worker, switched over to the model of `version` when that changes.
+
+    The worker thread outlives model versions, so a new model file does not
+    leave an old worker (and the old model it references) behind."""
+    predictor = get_batcher()
+    if predictor.predict_fn is None or predictor.version != version:
+        model, error = load_model(version)
+        if error:
+            raise RuntimeError(error)   # worker keeps its model; the next request tries again
+        predictor.swap(metrics.timed(model.predict, "predict", batch_size=True), version)
+    return predictor
+
+
+@st.cache_resource(max_entries=1)
+def get_scoring(calibration_version=None):
+    """TTA views (None = single view) and the confidence temperature in use."""
+    views = parse_views(config.TTA_VIEWS) if config.TTA else None
+    return {"views": views, "temperature": load_calibration(config.CONFIDENCE_CALIBRATION)["temperature"]}
 
 
-def predict_injury(image: Image.Image):
-    """Returns: (class_name, confidence_%, all_scores_dict) or (None, error_msg, {})"""
+def scoring_version():
+    """Cache key part that changes with the TTA setting or a refitted calibration file."""
+    cal = model_fingerprint(config.CONFIDENCE_CALIBRATION) if config.CONFIDENCE_CALIBRATION else None
+    return cal, get_scoring(cal)
 
-    model, error = load_model()
 
+@st.cache_resource
+def get_prediction_cache():
+    return PredictionCache(max_entries=config.CACHE_SIZE, ttl_s=config.CACHE_TTL_S)
+
+
+@st.cache_resource
+def get_buffer_pool():
+    """Preallocated batch buffers shared by every session; each request checks one out."""
+    return BufferPool(config.MAX_BATCH_SIZE)
+
+
+@st.cache_resource
+def get_decode_pool():
+    """Long-lived thread pool for decoding multi-image uploads in parallel."""
+    return ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="vaidya-decode")
+
+
+def model_error_message(error):
     if error == "tensorflow_missing":
-        return None, "TensorFlow not installed. Run: pip install tensorflow", {}
-    if error:
-        return None, f"Model error: {error}", {}
+        return "TensorFlow not installed. Run: pip install tensorflow"
+    return f"Model error: {error}"
+
+
+def record_prediction(result):
+    cls = result[0]
+    if cls is not None:
+        metrics.PREDICTIONS.inc(injury=cls, severity=class_info(cls).get("severity", "Unknown"))
+    return result
+
+
+def predict_injury(image):
+    """Returns: (class_name, confidence_%, all_scores_dict, tta) or (None, error_msg, {}, None)
 
-    processed = preprocess_image(image)
+    `tta` is {"n_views", "views_s", "predict_s"} when TTA ran for this call,
+    else None (TTA off or a cached result).
 
-    # model output shape: (1, 7)
-    predictions = model.predict(processed, verbose=0)[0]  # shape becomes (7,)
+    `image` may be raw bytes, a file-like or a PIL image. Bytes are looked up in
+    the shared prediction cache first; bytes and file-likes are decoded at
+    reduced JPEG scale, which is much cheaper for large phone photos.
+    """
+    return record_prediction(_predict_injury(image))
 
-    # Get predicted class index
-    top_idx = int(np.argmax(predictions))
 
-    # Map index to class name
-    top_class = CLASS_NAMES[top_idx]
+def _predict_injury(image):
+    version = model_version()
+    model, error = load_model(version)
+    if error:
+        return None, model_error_message(error), {}, None
+
+    cal_version, scoring = scoring_version()
+    cache = get_prediction_cache()
+    cache_version = (version, cal_version, scoring["views"])
+    keys = []
+    if isinstance(image, bytes):
+        keys.append(content_key(image))
+        hit = cache.get(keys[0], cache_version)
+        if hit:
+            return hit[0], hit[1], dict(hit[2]), None
+        image = io.BytesIO(image)
 
-    # Confidence in %
-    confidence = float(predictions[top_idx]) * 100
+    try:
+        with metrics.STAGE_SECONDS.time(stage="preprocess"):
+            if not isinstance(image, Image.Image):
+                image = load_image(image)
+            image.load()
+            # TTA builds its own views from `image`; the single view is then only needed for the pHash.
+            processed = None if scoring["views"] and not config.CACHE_PHASH else preprocess_image(image)
+    except Exception:
+        metrics.ERRORS.inc(kind="decode")
+        return None, "Could not read image (unsupported or corrupt file).", {}, None
+
+    if config.CACHE_PHASH:
+        keys.append(perceptual_key(processed[0]))
+        hit = cache.get(keys[-1], cache_version)
+        if hit:
+            for key in keys[:-1]:
+                cache.put(key, hit, cache_version)
+            return hit[0], hit[1], dict(hit[2]), None
+
+    tta = None
+    try:
+        if scoring["views"]:
+            # TTA: all views in one forward pass, softmax averaged, then calibrated.
+            views = scoring["views"]
+            with get_buffer_pool().checkout(len(views)) as buffer:
+                predictions, timings = predict_tta(metrics.timed(model.predict, "predict", batch_size=True),
+                                                   image, views, scoring["temperature"], buffer)
+            metrics.STAGE_SECONDS.observe(timings["views"], stage="tta_views")
+            tta = {"n_views": len(views), "views_s": timings["views"], "predict_s": timings["predict"]}
+        else:
+            # Batched together with other sessions' requests; we get back our own row.
+            predictions = get_predictor(version).predict(processed[0])  # shape: (7,)
+            predictions = apply_temperature(predictions, scoring["temperature"])
+    except Exception as e:
+        metrics.ERRORS.inc(kind="predict")
+        return None, f"Model error: {e}", {}, None
 
-    # Full probability dictionary
-    all_scores = {
-        CLASS_NAMES[i]: float(predictions[i]) * 100
-        for i in range(len(predictions))
-    }
+    top_class, confidence, all_scores = scores_to_result(predictions)
 
-    return top_class, confidence, all_scores
+    for key in keys:
+        cache.put(key, (top_class, confidence, all_scores), cache_version)
+    return top_class, confidence, dict(all_scores), tta
 
 
+def predict_injuries(uploads):
+    """Classify several uploaded images (raw bytes) with ONE forward pass.
+
+    Returns one (class_name, confidence_%, all_scores_dict) or
+    (None, error_msg, {}) per upload, in order. Cached uploads are skipped;
+    the rest are decoded in parallel and stacked into a single batch.
+    """
+    version = model_version()
+    model, error = load_model(version)
+    if error:
+        return [(None, model_error_message(error), {})] * len(uploads)
+
+    cal_version, scoring = scoring_version()
+    views = scoring["views"] or ()
+    cache = get_prediction_cache()
+    cache_version = (version, cal_version, scoring["views"])
+    keys    = [content_key(data) for data in uploads]
+    results = [cache.get(key, cache_version) for key in keys]
+    todo    = [i for i, r in enumerate(results) if r is None]
+
+    with metrics.STAGE_SECONDS.time(stage="decode"):
+        decode  = partial(decode_views, views=views) if views else decode_pixels
+        decoded = decode_many(decode, [uploads[i] for i in todo], get_decode_pool())
+    ok = []
+    for i, px in zip(todo, decoded):
+        if isinstance(px, Exception):
+            metrics.ERRORS.inc(kind="decode")
+            results[i] = (None, "Could not read image (unsupported or corrupt file).", {})
+        else:
+            ok.append((i, px))
+
+    if ok:
+        # With TTA each upload contributes len(views) rows; still ONE forward pass.
+        pixels = (view for _, px in ok for view in px) if views else (px for _, px in ok)
+        try:
+            with get_buffer_pool().checkout(len(ok) * max(1, len(views))) as buffer:
+                batch  = buffer.fill_pixels(pixels)
+                scores = metrics.timed(model.predict, "predict", batch_size=True)(batch)
+            scores = average_views(scores, len(views)) if views else scores           # (len(ok), 7)
+            scores = apply_temperature(scores, scoring["temperature"])
+        except Exception as e:
+            metrics.ERRORS.inc(kind="predict")
+            scores = []
+            for i, _ in ok:
+                results[i] = (None, f"Model error: {e}", {})
+        for (i, _), row in zip(ok, scores):
+            results[i] = scores_to_result(row)
+            cache.put(keys[i], results[i], cache_version)
+    return [record_prediction((c, conf, dict(scores))) for c, conf, scores in results]
 
-# ─────────────────────────────────────────────
-#  HOSPITAL DATA
-# ─────────────────────────────────────────────
-HOSPITALS = [
-    {"name":"Apollo Hospitals",           "location":"Jubilee Hills",  "phone":"04023607777","lat":17.4239,"lng":78.4738},
-    {"name":"Yashoda Hospitals",          "location":"Somajiguda",     "phone":"04045674567","lat":17.4273,"lng":78.4601},
-    {"name":"Care Hospitals",             "location":"Banjara Hills",  "phone":"04030418888","lat":17.4156,"lng":78.4480},
-    {"name":"KIMS Hospitals",             "location":"Secunderabad",   "phone":"04044885000","lat":17.4399,"lng":78.4983},
-    {"name":"AIG Hospitals",              "location":"Gachibowli",     "phone":"04042444222","lat":17.4418,"lng":78.3636},
-    {"name":"Sunshine Hospitals",         "location":"Paradise",       "phone":"04044554455","lat":17.4450,"lng":78.5010},
-    {"name":"Continental Hospitals",      "location":"Gachibowli",     "phone":"04067000000","lat":17.4375,"lng":78.3620},
-    {"name":"Omega Hospitals",            "location":"Banjara Hills",  "phone":"04023551000","lat":17.4130,"lng":78.4470},
-    {"name":"Medicover Hospitals",        "location":"Hitech City",    "phone":"04068334455","lat":17.4489,"lng":78.3714},
-    {"name":"Gleneagles Global Hospital", "location":"Lakdi-ka-pul",   "phone":"04030608080","lat":17.3964,"lng":78.4730},
-    {"name":"Star Hospitals",             "location":"Banjara Hills",  "phone":"04044777777","lat":17.4140,"lng":78.4475},
-    {"name":"Rainbow Children's Hospital","location":"Banjara Hills",  "phone":"04045678900","lat":17.4150,"lng":78.4490},
-    {"name":"Osmania General Hospital",   "location":"Afzalgunj",      "phone":"04024600100","lat":17.3810,"lng":78.4720},
-    {"name":"Gandhi Hospital",            "location":"Secunderabad",   "phone":"04027505566","lat":17.4420,"lng":78.5000},
-    {"name":"NIMS Hospital",              "location":"Punjagutta",     "phone":"04023489000","lat":17.4280,"lng":78.4610},
-    {"name":"Basavatarakam Cancer Hosp.", "location":"Banjara Hills",  "phone":"04023551235","lat":17.4200,"lng":78.4500},
-    {"name":"Niloufer Hospital",          "location":"Lakdi-ka-pul",   "phone":"04023221234","lat":17.3970,"lng":78.4735},
-    {"name":"Virinchi Hospital",          "location":"Banjara Hills",  "phone":"04046999999","lat":17.4160,"lng":78.4485},
-    {"name":"MaxCure Hospital",           "location":"Madhapur",       "phone":"04044666666","lat":17.4502,"lng":78.3800},
-    {"name":"LV Prasad Eye Institute",    "location":"Banjara Hills",  "phone":"04030612626","lat":17.4180,"lng":78.4458},
-    {"name":"Ankura Hospital",            "location":"Madhapur",       "phone":"04044006600","lat":17.4510,"lng":78.3820},
-    {"name":"Motherhood Hospital",        "location":"Kondapur",       "phone":"04067229999","lat":17.4600,"lng":78.3720},
-    {"name":"Pace Hospitals",             "location":"Hitech City",    "phone":"04048484848","lat":17.4495,"lng":78.3720},
-    {"name":"Janani Hospital",            "location":"Kukatpally",     "phone":"04050505050","lat":17.4940,"lng":78.3960},
-    {"name":"Life Care Hospital",         "location":"Chandanagar",    "phone":"04055555555","lat":17.4880,"lng":78.3250},
-]
 
 
 # ─────────────────────────────────────────────
 #  HELPERS
 # ─────────────────────────────────────────────
-def haversine(lat1, lon1, lat2, lon2):
-    R = 6371
-    dlat, dlon = math.radians(lat2-lat1), math.radians(lon2-lon1)
-    a = math.sin(dlat/2)**2 + math.cos(math.radians(lat1))*math.cos(math.radians(lat2))*math.sin(dlon/2)**2
-    return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+@st.cache_resource
+def get_hospital_index():
+    return HospitalIndex.from_records(HOSPITALS)
+
+@st.cache_resource
+def get_search_index():
+    return HospitalSearchIndex(HOSPITALS)
+
+def hospitals_version():
+    return fingerprint([h["lat"] for h in HOSPITALS], [h["lng"] for h in HOSPITALS])
+
+@st.cache_resource(max_entries=1)
+def get_cell_table(version=None):
+    """Memory-mapped per-cell candidates. A missing or stale file is rebuilt on a
+    background thread (or offline: python -m vaidya.cells), never on a request."""
+    return CellTableLoader(HOSPITALS, config.CELL_TABLE, k=5, cell_deg=config.CELL_DEG).start()
+
+def nearest_hospitals(lat, lng, k=5):
+    """[(hospital, distance_km), ...] for the k closest hospitals, closest first.
+
+    Answered from the precomputed cell table; the KD-tree covers points
+    outside the service area and the time until the table is built.
+    """
+    with metrics.STAGE_SECONDS.time(stage="nearest_hospital"):
+        table = get_cell_table(hospitals_version()).table
+        found = table.query(lat, lng, k) if table is not None else None
+        idx, dist = found if found is not None else get_hospital_index().query(lat, lng, k)
+    return [(HOSPITALS[i], float(d)) for i, d in zip(idx, dist)]
 
 def nearest_hospital(lat, lng):
-    return min(HOSPITALS, key=lambda h: haversine(lat, lng, h["lat"], h["lng"]))
+    return nearest_hospitals(lat, lng, 1)[0][0]
 
-def wound_recovery(condition):
-    c = condition.lower()
-    if "fracture" in c: return "4–8 weeks"
-    if "deep"     in c: return "10–20 days"
-    if "burn"     in c: return "7–14 days"
-    return "3–5 days"
+@st.cache_resource
+def get_storage():
+    return Storage(config.DB_PATH)
+
+@st.cache_resource(max_entries=1)
+def expire_anonymous_records(day):
+    """Once per process per day: drop records of anonymous sessions that have ended."""
+    return get_storage().expire_anonymous(config.ANON_RECORD_DAYS)
+
+def paginate(total, key, label, reset_on="", sizes=(12, 24, 48, 96)):
+    """Page-size + page controls with a match count; returns the (start, end) slice."""
+    c1, c2, c3 = st.columns([3,1,1])
+    size = c2.selectbox("Per page", sizes, key=f"{key}_size")
+    pages = max(1, -(-total // size))
+    # Keyed on the query and page count so a new search jumps back to page 1.
+    page = c3.number_input("Page", min_value=1, max_value=pages, value=1, step=1,
+                           key=f"{key}_page_{hash(reset_on)}_{pages}")
+    page, pages, start, end = page_bounds(total, page, size)
+    c1.caption(f"**{total} {label}**" + (f" · showing {start+1}–{end} (page {page}/{pages})" if total else ""))
+    return start, end
 
 
 # ─────────────────────────────────────────────
 #  SESSION STATE
 # ─────────────────────────────────────────────
-for key, val in [("users",[]),("wound_data",[]),("logged_in",False),("current_user",None)]:
+for key, val in [("logged_in",False),("current_user",None),("current_email",None)]:
     if key not in st.session_state:
         st.session_state[key] = val
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 
+metrics.SESSIONS.touch(st.session_state.session_id)
 
-# ─────────────────────────────────────────────
-#  HEADER
-# ─────────────────────────────────────────────
-st.markdown("<div class='vaidya-header'><h1>🩺 Vaidya – AI First Aid & Emergency System</h1></div>",
-            unsafe_allow_html=True)
+
+@st.cache_resource
+def start_metrics():
+    """Exporters run once per server process, if configured."""
+    cache = get_prediction_cache()
+    metrics.CACHE_EVENTS.set_function(lambda: {(k,): v for k, v in cache.stats().items() if k != "entries"})
+    metrics.CACHE_ENTRIES.set_function(lambda: cache.stats()["entries"])
+    if config.METRICS_PORT:
+        metrics.start_http_server(config.METRICS_PORT)
+    if config.METRICS_FILE:
+        metrics.start_file_dump(config.METRICS_FILE, config.METRICS_INTERVAL_S)
+    return True
+
+start_metrics()
+
+def record_owner():
+    """Wound records belong to the account, or to this browser session if anonymous."""
+    return st.session_state.current_email or f"{ANONYMOUS_PREFIX}{st.session_state.session_id}"
+
+# Opt-in: start import + load + warm-up now, off the script thread, so the
+# first visitor of the AI page doesn't pay for it. Other pages render at once.
+if config.PRELOAD and not config.MODEL_SERVER:
+    get_model_loader(model_version()).start()
 
 
 # ─────────────────────────────────────────────
@@ -318,6 +394,7 @@ with st.sidebar:
         if st.button("🚪 Logout"):
             st.session_state.logged_in = False
             st.session_state.current_user = None
+            st.session_state.current_email = None
             st.rerun()
         st.markdown("---")
     page = st.radio("Navigate to", [
@@ -328,6 +405,8 @@ with st.sidebar:
     st.caption("© 2026 Vaidya · Developed by Harshitha")
 
 
+_page_t0 = time.perf_counter()
+
 # ═══════════════════════════════════════════════════════════
 #  HOME
 # ═══════════════════════════════════════════════════════════
@@ -361,9 +440,10 @@ elif page == "🔐 Login / Sign Up":
         with st.form("lf"):
             em = st.text_input("📧 Email"); pw = st.text_input("🔒 Password", type="password")
             if st.form_submit_button("Login"):
-                u = next((u for u in st.session_state.users if u["email"]==em and u["password"]==pw), None)
+                u = get_storage().authenticate(em, pw)
                 if u:
-                    st.session_state.logged_in=True; st.session_state.current_user=u["name"]; st.rerun()
+                    st.session_state.logged_in=True; st.session_state.current_user=u["name"]
+                    st.session_state.current_email=u["email"]; st.rerun()
                 else: st.error("❌ Invalid email or password.")
     with tab2:
         with st.form("sf"):
@@ -372,9 +452,8 @@ elif page == "🔐 Login / Sign Up":
             if st.form_submit_button("Create Account"):
                 if not nm or not em2 or not pw2: st.error("Fill all fields.")
                 elif pw2!=cf: st.error("❌ Passwords don't match.")
-                elif any(u["email"]==em2 for u in st.session_state.users): st.error("❌ Email already registered.")
+                elif not get_storage().create_user(nm, em2, pw2): st.error("❌ Email already registered.")
                 else:
-                    st.session_state.users.append({"name":nm,"email":em2,"password":pw2})
                     st.success(f"✅ Account created for {nm}! You can now log in.")
 
 
@@ -384,17 +463,11 @@ elif page == "🔐 Login / Sign Up":
 elif page == "🏥 Hospital Database":
     st.markdown("## 🏥 Hyderabad Hospital Directory")
     search = st.text_input("🔍 Search", placeholder="e.g. Apollo, Banjara Hills")
-    filtered = [h for h in HOSPITALS
-                if search.lower() in h["name"].lower() or search.lower() in h["location"].lower()
-               ] if search else HOSPITALS
-    st.caption(f"**{len(filtered)} hospital(s) found**")
-    for i, h in enumerate(filtered):
-        with st.columns(3)[i % 3]:
-            st.markdown(f"""<div class='hospital-card'>
-              <h4>🏥 {h['name']}</h4>
-              <p>📍 {h['location']}</p>
-              <p>📞 <a href='tel:{h['phone']}'>{h['phone']}</a></p>
-            </div>""", unsafe_allow_html=True)
+    with metrics.STAGE_SECONDS.time(stage="hospital_search"):
+        filtered = [HOSPITALS[i] for i in get_search_index().search(search)] if search else HOSPITALS
+    start, end = paginate(len(filtered), "hosp", "hospital(s) found", reset_on=search)
+    with metrics.STAGE_SECONDS.time(stage="render_hospital_cards"):
+        st.markdown(card_grid(hospital_card(h) for h in filtered[start:end]), unsafe_allow_html=True)
 
 
 # ═══════════════════════════════════════════════════════════
@@ -402,6 +475,9 @@ elif page == "🏥 Hospital Database":
 # ═══════════════════════════════════════════════════════════
 elif page == "🩹 Wound Tracking":
     st.markdown("## 🩹 Wound Tracking System")
+    expire_anonymous_records(str(date.today()))
+    if not st.session_state.current_email:
+        st.caption("🔓 Not logged in: records are kept for this browser session only. Log in to keep them.")
     with st.form("wf"):
         c1,c2 = st.columns(2)
         with c1: patient=st.text_input("👤 Patient Name")
@@ -411,19 +487,22 @@ elif page == "🩹 Wound Tracking":
             if not patient or not condition: st.error("Fill Patient Name and Condition.")
             else:
                 rec = wound_recovery(condition)
-                st.session_state.wound_data.append({"name":patient,"condition":condition,"notes":notes,"recovery":rec,"date":str(date.today())})
+                get_storage().add_wound_record(record_owner(), {"name":patient,"condition":condition,"notes":notes,"recovery":rec,"date":str(date.today())})
                 st.success(f"✅ Saved! Estimated recovery: **{rec}**")
     st.markdown("---")
     st.markdown("### 📋 Saved Records")
-    if not st.session_state.wound_data: st.info("No records yet.")
+    total = get_storage().count_wound_records(record_owner())
+    if not total: st.info("No records yet.")
     else:
-        for i,w in enumerate(reversed(st.session_state.wound_data)):
-            with st.columns(3)[i%3]:
-                st.markdown(f"""<div class='wound-card'>
-                  <h4>👤 {w['name']}</h4><p>🩺 {w['condition']}</p>
-                  <p>⏱ <b>{w['recovery']}</b></p><p>📅 {w['date']}</p>
-                  {'<p>📝 '+w['notes']+'</p>' if w['notes'] else ''}
-                </div>""", unsafe_allow_html=True)
+        # Totals come from the incrementally maintained per-day aggregates, not the records.
+        by_condition = get_storage().wound_totals(record_owner())
+        by_recovery  = get_storage().wound_totals(record_owner(), by="recovery")
+        st.caption("📊 " + " · ".join(f"{c}: {n}" for c, n in list(by_condition.items())[:8]) +
+                   "  |  ⏱ " + " · ".join(f"{r}: {n}" for r, n in by_recovery.items()))
+        start, end = paginate(total, "wounds", "record(s)")
+        newest_first = get_storage().list_wound_records(record_owner(), limit=end-start, offset=start)
+        with metrics.STAGE_SECONDS.time(stage="render_wound_cards"):
+            st.markdown(card_grid(wound_card(w) for w in newest_first), unsafe_allow_html=True)
 
 
 # ═══════════════════════════════════════════════════════════
@@ -437,8 +516,8 @@ elif page == "🚨 Emergency System":
     with c1: lat=st.number_input("🌐 Latitude", value=17.4239,format="%.6f")
     with c2: lng=st.number_input("🌐 Longitude",value=78.4738,format="%.6f")
     if st.button("🚨 Find Nearest Hospital", type="primary"):
-        h = nearest_hospital(lat,lng)
-        d = haversine(lat,lng,h["lat"],h["lng"])
+        top5 = nearest_hospitals(lat,lng,5)
+        h, d = top5[0]
         st.markdown(f"""<div class='result-card emergency-card'>
           <h3>🚨 Nearest Hospital Found!</h3>
           <p><b>Hospital:</b> {h['name']}</p>
@@ -448,8 +527,7 @@ elif page == "🚨 Emergency System":
           <p><a href='https://www.google.com/maps?q={h["lat"]},{h["lng"]}' target='_blank'>📍 View on Google Maps →</a></p>
         </div>""", unsafe_allow_html=True)
         st.markdown("### 🏥 Top 5 Closest Hospitals")
-        for i,h2 in enumerate(sorted(HOSPITALS,key=lambda x:haversine(lat,lng,x["lat"],x["lng"]))[:5]):
-            d2=haversine(lat,lng,h2["lat"],h2["lng"])
+        for i,(h2,d2) in enumerate(top5):
             st.markdown(f"**{'🥇' if i==0 else '🏥'} {h2['name']}** — {h2['location']} — 📏 {d2:.1f} km — 📞 {h2['phone']}")
 
 
@@ -458,19 +536,51 @@ elif page == "🚨 Emergency System":
 # ═══════════════════════════════════════════════════════════
 elif page == "🤖 AI Injury Detection":
     st.markdown("## 🤖 AI Injury Detection")
-    st.info("Upload a wound photo — your trained MobileNet model will classify it and recommend first aid.")
+    st.info("Upload one or more wound photos — your trained MobileNet model will classify them and recommend first aid.")
+    loader = None if config.MODEL_SERVER else get_model_loader(model_version())
+    if config.MODEL_SERVER:
+        st.caption(f"🔌 Model served by {config.MODEL_SERVER}")
+    elif loader.ready and loader.timings:
+        quant = "" if config.QUANTIZE == "none" else f", {config.QUANTIZE}"
+        st.caption(f"⏱ Model startup ({config.BACKEND}{quant}): {loader.summary()}")
+    elif config.PRELOAD and not loader.ready:
+        st.caption("⏳ Model is warming up in the background…")
+    cs = get_prediction_cache().stats()
+    st.caption(f"🗂 Prediction cache: {cs['hits']} hits · {cs['misses']} misses · "
+               f"{cs['evictions']} evictions · {cs['entries']} stored")
 
     with st.expander("ℹ️ What can the AI detect? (7 classes)"):
-        cols = st.columns(4)
-        for i, cls in enumerate(CLASS_NAMES):
-            with cols[i % 4]:
-                info = CLASS_INFO.get(cls, {})
-                st.markdown(f"**{cls}**")
-                st.markdown(BADGE.get(info.get("severity","Low"),""), unsafe_allow_html=True)
-
-    uploaded = st.file_uploader("📁 Upload Injury Image", type=["jpg","jpeg","png","webp"])
-
-    if uploaded:
+        st.markdown(class_legend(), unsafe_allow_html=True)
+
+    uploads = st.file_uploader("📁 Upload Injury Image(s)", type=["jpg","jpeg","png","webp"],
+                               accept_multiple_files=True)
+    uploaded = uploads[0] if len(uploads or []) == 1 else None
+
+    if uploads and not uploaded:
+        # ── Several photos: one batched forward pass, compact results table ──
+        st.image([u.getvalue() for u in uploads], caption=[f"{i}. {u.name}" for i, u in enumerate(uploads, 1)],
+                 width=140)
+        if st.button("🔍 Analyse with AI Model", type="primary"):
+            with st.spinner(f"🧠 Running your trained model on {len(uploads)} images…"):
+                t0 = time.perf_counter()
+                results = predict_injuries([u.getvalue() for u in uploads])
+                elapsed = time.perf_counter() - t0
+
+            rows, critical = [], []
+            for n, (u, (cls, conf, _)) in enumerate(zip(uploads, results), 1):
+                if cls is None:
+                    rows.append(error_row(n, u.name, conf))
+                    continue
+                severity = class_info(cls).get("severity", "Low")
+                rows.append(result_row(n, u.name, cls, badge(severity), conf))
+                if severity in ("Critical", "High"):
+                    critical.append(f"{n}. {u.name} ({cls})")
+            st.caption(f"⚡ {len(uploads)} images analysed in one batch · {elapsed*1000:.0f} ms")
+            st.markdown(results_table(rows), unsafe_allow_html=True)
+            if critical:
+                st.error("🚨 Needs urgent medical attention: " + ", ".join(critical))
+
+    elif uploaded:
         col1, col2 = st.columns([1,1], gap="large")
         with col1:
             image = Image.open(uploaded)
@@ -479,47 +589,27 @@ elif page == "🤖 AI Injury Detection":
         with col2:
             if st.button("🔍 Analyse with AI Model", type="primary"):
                 with st.spinner("🧠 Running your trained model…"):
-                    predicted_class, confidence, all_scores = predict_injury(image)
+                    predicted_class, confidence, all_scores, tta = predict_injury(uploaded.getvalue())
 
                 if predicted_class is None:
                     st.error(f"❌ {confidence}")
-                    st.code("pip install tensorflow", language="bash")
+                    if confidence == model_error_message("tensorflow_missing"):
+                        st.code("pip install tensorflow", language="bash")
                 else:
-                    info     = CLASS_INFO.get(predicted_class, {})
-                    severity = info.get("severity","Low")
-
-                    st.markdown(f"""<div class='result-card'>
-                      <h3>🩹 Detection Result</h3>
-                      <p><b>Injury Type:</b> {predicted_class}</p>
-                      <p><b>Severity:</b> {BADGE.get(severity,severity)}</p>
-                      <p><b>Confidence:</b> {confidence:.1f}%</p>
-                      <p><b>💊 Treatment:</b> {info.get('medication','See a doctor')}</p>
-                      <p><b>⏱ Healing Time:</b> {info.get('healing','Varies')}</p>
-                      <p><b>💡 Advice:</b> {info.get('advice','Consult a medical professional.')}</p>
-                    </div>""", unsafe_allow_html=True)
+                    severity = class_info(predicted_class).get("severity", "Low")
+                    with metrics.STAGE_SECONDS.time(stage="render_results_panel"):
+                        panel = result_panel(predicted_class, confidence, all_scores)
+                    st.markdown(panel, unsafe_allow_html=True)
+                    if tta:
+                        st.caption(f"🔁 TTA: {tta['n_views']} views in one batch · building views "
+                                   f"{tta['views_s']*1000:.0f} ms · forward pass {tta['predict_s']*1000:.0f} ms")
 
                     if   severity == "Critical": st.error("🚨 CRITICAL — Call ambulance immediately!")
                     elif severity == "High":     st.warning("⚠️ Needs a doctor soon.")
                     elif severity == "Medium":   st.warning("ℹ️ Monitor carefully.")
                     else:                        st.success("✅ Minor — basic first aid should work.")
-
-                    # ── Confidence bar for all classes ──
-                    st.markdown("### 📊 All Class Confidence Scores")
-                    for cls_name, score in sorted(all_scores.items(), key=lambda x: x[1], reverse=True):
-                        color = "#c62828" if cls_name == predicted_class else "#90caf9"
-                        st.markdown(f"""
-<div style='margin-bottom:6px'>
-  <div style='display:flex;justify-content:space-between;font-size:.85rem;'>
-    <span>{'✅ ' if cls_name==predicted_class else ''}<b>{cls_name}</b></span>
-    <span>{score:.1f}%</span>
-  </div>
-  <div class='confidence-bar'>
-    <div class='confidence-fill' style='width:{int(score)}%;background:{color};'></div>
-  </div>
-</div>""", unsafe_allow_html=True)
     else:
-        st.markdown("""<div style='background:white;border:2px dashed #1565c0;border-radius:16px;
-          padding:50px;text-align:center;color:#999;'>
-          <h3>📷 Upload an injury image to begin</h3>
-          <p>Detects: Abrasion · Bruises · Burn · Cut · Ingrown Nail · Laceration · Stab Wound</p>
-        </div>""", unsafe_allow_html=True)
+        st.markdown(UPLOAD_PLACEHOLDER, unsafe_allow_html=True)
+
+
+metrics.PAGE_SECONDS.observe(time.perf_counter() - _page_t0, page=page.split(" ", 1)[-1])
@@ -0,0 +1,165 @@
+"""Backends without a real runtime: a fake TFLite interpreter and exporter
+stand in for TensorFlow, so the bucketing, the parity gate and the artifact
+cache logic run anywhere."""
+import json
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from vaidya import backends as B
+from vaidya.preprocess import INPUT_SHAPE
+
+W = np.random.default_rng(0).standard_normal((3, 7)).astype(np.float32)
+
+
+def softmax_model(batch, scale=1.0):
+    logits = batch.mean(axis=(1, 2)) @ W * scale
+    e = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return (e / e.sum(axis=1, keepdims=True)).astype(np.float32)
+
+
+class FakeInterpreter:
+    created = []
+
+    def __init__(self, model_path, num_threads=None):
+        self.allocations, self.shape = 0, None
+        FakeInterpreter.created.append(self)
+
+    def get_input_details(self):
+        return [{"index": 0}]
+
+    def get_output_details(self):
+        return [{"index": 1}]
+
+    def resize_tensor_input(self, index, shape):
+        self.shape = tuple(shape)
+
+    def allocate_tensors(self):
+        self.allocations += 1
+
+    def set_tensor(self, index, value):
+        assert value.shape == self.shape and value.dtype == np.float32
+        self.input = value
+
+    def invoke(self):
+        self.output = softmax_model(self.input)
+
+    def get_tensor(self, index):
+        return self.output
+
+
+class FakeModel:
+    def __init__(self, scale=1.0):
+        self.scale = scale
+        self.model = self
+
+    def predict(self, batch):
+        return softmax_model(batch, self.scale)
+
+
+def batch(n, seed=1):
+    return np.random.default_rng(seed).random((n, *INPUT_SHAPE), dtype=np.float32)
+
+
+def test_tflite_allocates_once_per_bucket(monkeypatch):
+    monkeypatch.setattr(B, "_tflite_interpreter_class", lambda: FakeInterpreter)
+    FakeInterpreter.created.clear()
+    backend = B.TFLiteBackend("model.tflite")
+    for n in [1, 3, 2, 5, 3, 4, 7, 1, 8, 6]:
+        x = batch(n, seed=n)
+        np.testing.assert_allclose(backend.predict(x), softmax_model(x), rtol=1e-6)
+    assert sorted(backend._buckets) == [1, 2, 4, 8]
+    assert len(FakeInterpreter.created) == 4
+    assert all(i.allocations == 1 for i in FakeInterpreter.created)
+
+
+def test_parity_check_reports_agreement_and_drift():
+    x = batch(6)
+    same = B.parity_check(FakeModel(), FakeModel(), batch=x)
+    assert same["ok"] and same["images"] == 6 and same["top1_agreement"] == 1.0
+    off = B.parity_check(FakeModel(), FakeModel(scale=-1.0), batch=x, atol=1e-3)
+    assert not off["ok"] and off["max_abs_diff"] > 1e-3
+    streamed = B.parity_check(FakeModel(), FakeModel(), batches=iter([x[:4], x[4:]]))
+    assert streamed["images"] == 6 and set(streamed["per_class"]) <= set(B.CLASS_NAMES.values())
+
+
+@pytest.fixture
+def fake_export(monkeypatch, tmp_path):
+    """build_artifact with the fake model; `candidate` decides what the exported file predicts like."""
+    model = tmp_path / "model.h5"
+    model.write_bytes(b"h5")
+    state = {"candidate": FakeModel(), "exports": 0}
+
+    def export(keras_model, out_path, quantize, calibration):
+        state["exports"] += 1
+        state["calibration"] = calibration
+        B._atomic_write(out_path, b"artifact")
+
+    monkeypatch.setattr(B, "KerasBackend", lambda path, *a: FakeModel())
+    monkeypatch.setattr(B, "EXPORTERS", {"tflite": export, "onnx": export})
+    monkeypatch.setattr(B, "make_backend", lambda backend, path, *a: state["candidate"])
+    state["model"], state["cache"] = str(model), str(tmp_path / "cache")
+    return state
+
+
+def test_float_export_is_cached_after_passing_parity(fake_export):
+    path = B.build_artifact(fake_export["model"], "tflite", fake_export["cache"])
+    assert os.path.exists(path) and fake_export["exports"] == 1
+    assert B.build_artifact(fake_export["model"], "tflite", fake_export["cache"]) == path
+    assert fake_export["exports"] == 1
+    assert os.listdir(fake_export["cache"]) == [os.path.basename(path)]   # no staging leftovers
+
+
+def test_float_export_failing_parity_is_never_cached(fake_export):
+    fake_export["candidate"] = FakeModel(scale=-1.0)
+    with pytest.raises(B.ParityError):
+        B.build_artifact(fake_export["model"], "tflite", fake_export["cache"])
+    assert os.listdir(fake_export["cache"]) == []
+
+
+def photos(folder, n):
+    os.makedirs(folder, exist_ok=True)
+    for i in range(n):
+        Image.new("RGB", (64, 48), (i * 40 % 256, 90, 200)).save(os.path.join(folder, f"{i}.png"))
+    return str(folder)
+
+
+def test_quantized_export_passing_the_gate_writes_its_report(fake_export, tmp_path):
+    fake_export["candidate"] = FakeModel(scale=1.05)     # small drift, same top-1
+    eval_dir = photos(tmp_path / "eval", 5)
+    path = B.build_artifact(fake_export["model"], "tflite", fake_export["cache"], quantize="float16",
+                            eval_dir=eval_dir)
+    with open(f"{path}.gate.json") as f:
+        report = json.load(f)
+    assert report["ok"] and report["images"] == 5 and report["top1_agreement"] == 1.0
+    assert 0 < report["max_abs_diff"] <= B.QUANT_ATOL
+
+
+def test_quantized_export_failing_the_gate_is_never_cached(fake_export, tmp_path):
+    fake_export["candidate"] = FakeModel(scale=-1.0)
+    with pytest.raises(B.ParityError, match="tflite/dynamic"):
+        B.build_artifact(fake_export["model"], "tflite", fake_export["cache"], quantize="dynamic",
+                         eval_dir=photos(tmp_path / "eval", 5))
+    assert os.listdir(fake_export["cache"]) == []
+
+
+def test_empty_eval_folder_fails_without_caching(fake_export, tmp_path):
+    with pytest.raises(ValueError, match="No readable images"):
+        B.build_artifact(fake_export["model"], "tflite", fake_export["cache"], quantize="dynamic",
+                         eval_dir=photos(tmp_path / "eval", 0))
+    assert os.listdir(fake_export["cache"]) == []
+
+
+def test_int8_is_calibrated_and_keyed_by_the_calibration_set(fake_export, tmp_path):
+    with pytest.raises(ValueError, match="calibration"):
+        B.build_artifact(fake_export["model"], "tflite", fake_export["cache"], quantize="int8")
+    calib = photos(tmp_path / "calib", 3)
+    first = B.build_artifact(fake_export["model"], "tflite", fake_export["cache"], quantize="int8",
+                             calibration_dir=calib)
+    assert fake_export["calibration"].shape == (3, *INPUT_SHAPE)
+    photos(tmp_path / "calib", 4)
+    second = B.artifact_path(fake_export["model"], "tflite", fake_export["cache"], "int8", calib)
+    assert second != first and not os.path.exists(second)
+    assert B.artifact_path(fake_export["model"], "tflite", fake_export["cache"], "dynamic") != first
@@ -0,0 +1,111 @@
+"""Batch CLI: class labels, resumable result files, directory and tar sources."""
+import io
+import json
+import tarfile
+
+import numpy as np
+from PIL import Image
+
+from vaidya.batch import ResultWriter, classify, iter_sources, result_row
+from vaidya.labels import CLASS_INFO, CLASS_NAMES, class_info, scores_to_result
+
+
+class FakeModel:
+    """Scores every image by its mean red value: dark -> class 0, bright -> class 6."""
+
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, batch):
+        self.batches.append(len(batch))
+        cls = np.minimum((batch[..., 0].mean(axis=(1, 2)) * 7).astype(int), 6)
+        return np.eye(7, dtype=np.float32)[cls]
+
+
+class Quiet:
+    def update(self, images, errors):
+        pass
+
+    def report(self, final=False):
+        pass
+
+
+def jpeg(red):
+    buf = io.BytesIO()
+    Image.new("RGB", (40, 30), (red, 0, 0)).save(buf, "JPEG")
+    return buf.getvalue()
+
+
+def photo_dir(root, n=5):
+    (root / "sub").mkdir(parents=True)
+    for i in range(n):
+        (root / ("sub" if i % 2 else "") / f"img{i}.jpg").write_bytes(jpeg(250 if i == 0 else 10))
+    (root / "notes.txt").write_text("not an image")
+    (root / "broken.png").write_bytes(b"junk")
+    return root
+
+
+def test_every_class_has_its_severity():
+    severities = {name: class_info(name).get("severity") for name in CLASS_NAMES.values()}
+    assert severities == {"Abrasions": "Low", "Bruises": "Low", "Burns": "Medium", "Cut": "Medium",
+                          "Ingrown_nails": "Low", "Laceration": "High", "Stab_wound": "Critical"}
+    assert class_info("Stab_wound") is CLASS_INFO["Stab_Wound"]
+    assert class_info("Unknown") == {}
+
+
+def test_scores_to_result():
+    cls, confidence, scores = scores_to_result(np.array([0.1, 0, 0, 0, 0, 0.2, 0.7]))
+    assert (cls, round(confidence, 3)) == ("Stab_wound", 70.0)
+    assert list(scores) == list(CLASS_NAMES.values())
+    assert result_row("a.jpg", np.eye(7)[5])["severity"] == "High"
+
+
+def test_directory_sources_are_sorted_and_filtered(tmp_path):
+    root = photo_dir(tmp_path / "photos")
+    assert [name for name, _ in iter_sources(str(root))] == [
+        "broken.png", "img0.jpg", "img2.jpg", "img4.jpg", "sub/img1.jpg", "sub/img3.jpg"]
+
+
+def test_classify_writes_one_row_per_image(tmp_path):
+    root  = photo_dir(tmp_path / "photos")
+    model = FakeModel()
+    writer = ResultWriter(str(tmp_path / "out.jsonl"))
+    classify(str(root), writer, model, batch_size=4, workers=2, progress=Quiet())
+    writer.close()
+    rows = {r["file"]: r for r in map(json.loads, open(tmp_path / "out.jsonl"))}
+    assert set(rows) == {"broken.png", "img0.jpg", "img2.jpg", "img4.jpg", "sub/img1.jpg", "sub/img3.jpg"}
+    assert "error" in rows["broken.png"]
+    assert rows["img0.jpg"]["class"] == "Stab_wound" and rows["img0.jpg"]["severity"] == "Critical"
+    assert rows["img2.jpg"]["class"] == "Abrasions"
+    assert model.batches == [3, 2]       # one predict call per batch; the broken file never reaches it
+
+
+def test_tar_source_and_csv_output(tmp_path):
+    archive = tmp_path / "photos.tar.gz"
+    with tarfile.open(archive, "w:gz") as tar:
+        for i, red in enumerate((250, 10)):
+            data = jpeg(red)
+            info = tarfile.TarInfo(f"p/{i}.jpg")
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    writer = ResultWriter(str(tmp_path / "out.csv"))
+    classify(str(archive), writer, FakeModel(), batch_size=8, workers=1, progress=Quiet())
+    writer.close()
+    lines = open(tmp_path / "out.csv").read().splitlines()
+    assert lines[0].startswith("file,class,confidence,severity,error,Abrasions")
+    assert [line.split(",")[:2] for line in lines[1:]] == [["p/0.jpg", "Stab_wound"], ["p/1.jpg", "Abrasions"]]
+
+
+def test_resume_skips_done_files_and_drops_a_partial_line(tmp_path):
+    root = photo_dir(tmp_path / "photos")
+    out  = tmp_path / "out.jsonl"
+    out.write_text(json.dumps({"file": "img0.jpg", "class": "Cut"}) + "\n" + '{"file": "img2.j')
+    writer = ResultWriter(str(out), resume=True)
+    assert writer.done == {"img0.jpg"}
+    model = FakeModel()
+    classify(str(root), writer, model, batch_size=8, workers=1, progress=Quiet())
+    writer.close()
+    files = [json.loads(line)["file"] for line in open(out)]
+    assert files[0] == "img0.jpg" and sorted(files[1:]) == [
+        "broken.png", "img2.jpg", "img4.jpg", "sub/img1.jpg", "sub/img3.jpg"]
+    assert model.batches == [4]
@@ -0,0 +1,64 @@
+"""PredictionCache: LRU eviction, TTL expiry, versioned get/put."""
+import numpy as np
+
+from vaidya.cache import PredictionCache, content_key, perceptual_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(max_entries=2)
+    assert cache.get("a", "v1") is None
+    cache.put("a", 1, "v1")
+    cache.put("b", 2, "v1")
+    assert cache.get("a", "v1") == 1        # "b" is now the least recently used
+    cache.put("c", 3, "v1")
+    assert cache.get("b", "v1") is None
+    assert cache.get("a", "v1") == 1 and cache.get("c", "v1") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl():
+    clock = Clock()
+    cache = PredictionCache(ttl_s=10, clock=clock)
+    cache.get("a", "v1")
+    cache.put("a", 1, "v1")
+    clock.now = 9.9
+    assert cache.get("a", "v1") == 1
+    clock.now = 10.0
+    assert cache.get("a", "v1") is None
+    assert len(cache) == 0
+    assert cache.stats() == {"entries": 0, "hits": 1, "misses": 2, "evictions": 1}
+
+
+def test_new_version_empties_the_cache():
+    cache = PredictionCache()
+    cache.get("a", "v1")
+    cache.put("a", 1, "v1")
+    cache.put("b", 2, "v1")
+    assert cache.get("a", "v2") is None
+    assert len(cache) == 0
+    assert cache.stats()["evictions"] == 2
+
+
+def test_result_computed_under_an_old_version_is_dropped():
+    cache = PredictionCache()
+    cache.get("a", "v1")          # request 1 starts on the old model
+    cache.get("b", "v2")          # request 2 sees the new one
+    cache.put("a", "stale", "v1")
+    cache.put("b", "fresh", "v2")
+    assert cache.get("a", "v2") is None
+    assert cache.get("b", "v2") == "fresh"
+
+
+def test_perceptual_key_survives_small_changes():
+    assert content_key(b"x") == content_key(b"x") != content_key(b"y")
+    tensor = np.random.default_rng(0).random((224, 224, 3), dtype=np.float32)
+    assert perceptual_key(tensor) == perceptual_key(np.clip(tensor + 0.001, 0, 1))
+    assert perceptual_key(tensor) != perceptual_key(tensor[::-1])
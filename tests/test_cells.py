@@ -0,0 +1,76 @@
+"""The cell table's pruning must never drop a true k-nearest hospital."""
+import numpy as np
+import pytest
+
+from vaidya.cells import CellTable, CellTableLoader, load_or_build
+from vaidya.geo import GeoTable, haversine
+
+
+def points_in(table, n, seed):
+    rng = np.random.default_rng(seed)
+    return (table.lat0 + rng.random(n) * table.rows * table.cell_deg,
+            table.lng0 + rng.random(n) * table.cols * table.cell_deg)
+
+
+@pytest.mark.parametrize("n, k, cell_deg", [(40, 1, 0.05), (300, 5, 0.1), (3, 5, 0.2)])
+def test_query_matches_brute_force(n, k, cell_deg):
+    rng = np.random.default_rng(n)
+    lats, lngs = rng.uniform(12, 14, n), rng.uniform(76, 79, n)
+    table = CellTable.build(lats, lngs, k=k, cell_deg=cell_deg, margin_deg=0.3)
+    want_idx, want_km = GeoTable(lats, lngs).top_k(*points_in(table, 2000, n + 1), table.k)
+    for i, (lat, lng) in enumerate(zip(*points_in(table, 2000, n + 1))):
+        idx, km = table.query(lat, lng, table.k)
+        np.testing.assert_allclose(km, want_km[i], rtol=1e-9, atol=1e-9)
+        np.testing.assert_allclose(km, [haversine(lat, lng, lats[j], lngs[j]) for j in idx], rtol=1e-9)
+
+
+def test_corners_and_edges_of_cells():
+    rng = np.random.default_rng(7)
+    lats, lngs = rng.uniform(20, 21, 60), rng.uniform(80, 81, 60)
+    table = CellTable.build(lats, lngs, k=3, cell_deg=0.1, margin_deg=0.2)
+    grid_lat = table.lat0 + np.arange(table.rows) * table.cell_deg
+    grid_lng = table.lng0 + np.arange(table.cols) * table.cell_deg
+    q_lat, q_lng = (a.ravel() for a in np.meshgrid(grid_lat + 1e-9, grid_lng + 1e-9))
+    _, want_km = GeoTable(lats, lngs).top_k(q_lat, q_lng, 3)
+    for i, (lat, lng) in enumerate(zip(q_lat, q_lng)):
+        np.testing.assert_allclose(table.query(lat, lng, 3)[1], want_km[i], rtol=1e-9, atol=1e-9)
+
+
+def test_outside_grid_or_k_too_large_is_declined():
+    table = CellTable.build([20.0, 20.5], [80.0, 80.5], k=1, cell_deg=0.1, margin_deg=0.1)
+    assert table.query(0.0, 0.0) is None
+    assert table.query(20.2, 80.2, k=2) is None
+
+
+def test_save_open_round_trip_and_rebuild_on_change(tmp_path):
+    rng = np.random.default_rng(3)
+    records = [{"lat": a, "lng": b} for a, b in zip(rng.uniform(10, 11, 50), rng.uniform(75, 76, 50))]
+    path = str(tmp_path / "cells.bin")
+    built = load_or_build(records, path, k=2, cell_deg=0.05)
+    opened = load_or_build(records, path, k=2, cell_deg=0.05)
+    assert opened.header["fingerprint"] == built.header["fingerprint"]
+    assert isinstance(opened.candidates, np.memmap)
+    for lat, lng in zip(*points_in(opened, 200, 4)):
+        np.testing.assert_array_equal(opened.query(lat, lng, 2)[0], built.query(lat, lng, 2)[0])
+
+    records[0] = {"lat": 10.5, "lng": 75.5}
+    rebuilt = load_or_build(records, path, k=2, cell_deg=0.05)
+    assert rebuilt.header["fingerprint"] != built.header["fingerprint"]
+
+
+def test_loader_builds_in_background_then_opens_current_file(tmp_path):
+    rng = np.random.default_rng(5)
+    records = [{"lat": a, "lng": b} for a, b in zip(rng.uniform(10, 11, 30), rng.uniform(75, 76, 30))]
+    path = str(tmp_path / "cells.bin")
+    loader = CellTableLoader(records, path, k=2, cell_deg=0.05).start()
+    assert loader._thread is not None            # missing file: built off the caller's thread
+    assert loader.join(30) is not None and loader.error is None
+    again = CellTableLoader(records, path, k=2, cell_deg=0.05).start()
+    assert again._thread is None and again.table is not None
+
+
+def test_loader_failure_leaves_table_unset(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    loader = CellTableLoader([{"lat": 1.0, "lng": 2.0}], str(blocker / "cells.bin")).start()
+    assert loader.join(30) is None and loader.error is not None
@@ -0,0 +1,63 @@
+"""HospitalIndex must agree with the scalar `haversine` reference."""
+import numpy as np
+import pytest
+
+from vaidya.geo import HospitalIndex, haversine
+
+
+def brute_top_k(lats, lngs, lat, lng, k):
+    km = np.array([haversine(lat, lng, a, b) for a, b in zip(lats, lngs)])
+    order = np.argsort(km, kind="stable")[:k]
+    return order, km[order], km
+
+
+def random_points(n, seed):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(8, 35, n), rng.uniform(68, 97, n)
+
+
+def assert_matches_brute(idx, km, lats, lngs, lat, lng, k):
+    _, want_km, all_km = brute_top_k(lats, lngs, lat, lng, k)
+    assert len(idx) == len(km) == min(k, len(lats))
+    np.testing.assert_allclose(km, want_km, rtol=1e-9, atol=1e-9)
+    # Ties may come back in any order, but every index must really be at its distance.
+    np.testing.assert_allclose(all_km[idx], km, rtol=1e-9, atol=1e-9)
+    assert len(set(idx.tolist())) == len(idx)
+
+
+@pytest.mark.parametrize("n, k", [(1, 1), (7, 3), (200, 1), (200, 5), (2000, 10)])
+def test_index_random_points(n, k):
+    lats, lngs = random_points(n, n)
+    index = HospitalIndex(lats, lngs, leaf_size=8)
+    for lat, lng in zip(*random_points(50, n + 1)):
+        idx, km = index.query(lat, lng, k)
+        assert_matches_brute(idx, km, lats, lngs, lat, lng, k)
+
+
+def test_index_duplicate_coordinates():
+    lats, lngs = random_points(30, 3)
+    lats, lngs = np.repeat(lats, 4), np.repeat(lngs, 4)   # every hospital four times
+    index = HospitalIndex(lats, lngs, leaf_size=4)
+    for lat, lng in zip(*random_points(30, 4)):
+        idx, km = index.query(lat, lng, 6)
+        assert_matches_brute(idx, km, lats, lngs, lat, lng, 6)
+    idx, km = index.query(lats[0], lngs[0], 4)   # query on top of a duplicated point
+    assert sorted(idx.tolist()) == [0, 1, 2, 3] and np.allclose(km, 0.0)
+
+
+def test_index_k_larger_than_n():
+    lats, lngs = random_points(5, 5)
+    idx, km = HospitalIndex(lats, lngs).query(20.0, 80.0, k=50)
+    assert_matches_brute(idx, km, lats, lngs, 20.0, 80.0, 50)
+    assert sorted(idx.tolist()) == list(range(5))
+
+
+def test_index_empty():
+    idx, km = HospitalIndex([], []).query(20.0, 80.0, k=3)
+    assert idx.shape == (0,) and km.shape == (0,)
+
+
+def test_index_far_side_of_the_globe():
+    lats, lngs = np.array([0.0, 10.0, -45.0]), np.array([179.9, -179.9, 90.0])
+    idx, km = HospitalIndex(lats, lngs).query(5.0, -179.95, k=3)
+    assert_matches_brute(idx, km, lats, lngs, 5.0, -179.95, 3)
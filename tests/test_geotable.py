@@ -0,0 +1,43 @@
+"""GeoTable's vectorized distances and top-k must agree with the scalar `haversine` reference."""
+import numpy as np
+import pytest
+
+from vaidya.geo import GeoTable, haversine
+
+
+def random_points(n, seed):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(8, 35, n), rng.uniform(68, 97, n)
+
+
+def assert_matches_brute(idx, km, lats, lngs, lat, lng, k):
+    all_km = np.array([haversine(lat, lng, a, b) for a, b in zip(lats, lngs)])
+    np.testing.assert_allclose(km, np.sort(all_km)[:k], rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(all_km[idx], km, rtol=1e-9, atol=1e-9)   # ties may come back in any order
+    assert len(set(idx.tolist())) == len(idx)
+
+
+@pytest.mark.parametrize("k, chunk_size", [(1, 8192), (5, 7), (40, 3)])
+def test_table_top_k(k, chunk_size):
+    lats, lngs = random_points(40, 9)
+    q_lat, q_lng = random_points(25, 10)
+    idx, km = GeoTable(lats, lngs).top_k(q_lat, q_lng, k, chunk_size=chunk_size)
+    assert idx.shape == km.shape == (25, min(k, 40))
+    for i, (lat, lng) in enumerate(zip(q_lat, q_lng)):
+        assert_matches_brute(idx[i], km[i], lats, lngs, lat, lng, k)
+
+
+def test_table_distances_match_haversine():
+    lats, lngs = random_points(100, 11)
+    table = GeoTable(lats, lngs)
+    want = [haversine(12.9, 77.6, a, b) for a, b in zip(lats, lngs)]
+    np.testing.assert_allclose(table.distances(12.9, 77.6), want, rtol=1e-9)
+    np.testing.assert_allclose(table.matrix([12.9], [77.6])[0], want, rtol=1e-9)
+
+
+def test_table_duplicates_and_empty():
+    lats, lngs = np.repeat([20.0, 21.0], 3), np.repeat([80.0, 81.0], 3)
+    idx, km = GeoTable(lats, lngs).top_k([20.1], [80.1], 4)
+    assert sorted(idx[0, :3].tolist()) == [0, 1, 2] and idx[0, 3] in (3, 4, 5)
+    idx, km = GeoTable([], []).top_k([20.0], [80.0], 3)
+    assert idx.shape == (1, 0) and km.shape == (1, 0)
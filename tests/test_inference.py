@@ -0,0 +1,123 @@
+"""BatchingPredictor: coalescing, per-caller routing, errors, cancellation, shutdown."""
+import threading
+
+import numpy as np
+import pytest
+
+from vaidya.inference import BatchingPredictor
+
+
+class Recorder:
+    """predict_fn that returns each row's first value, echoed into 2 columns."""
+
+    def __init__(self, gate=None):
+        self.batches = []
+        self.gate    = gate
+
+    def __call__(self, batch):
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.batches.append(batch[:, 0].copy())
+        return np.stack([batch[:, 0], -batch[:, 0]], axis=1)
+
+
+def rows(n):
+    return [np.full(3, i, dtype=np.float32) for i in range(n)]
+
+
+def test_coalesces_concurrent_requests_into_one_batch():
+    fn = Recorder()
+    p  = BatchingPredictor(fn, max_batch_size=16, max_wait_ms=200)
+    futures = [p.submit(x) for x in rows(5)]
+    assert [f.result(5)[0] for f in futures] == [0, 1, 2, 3, 4]
+    assert [len(b) for b in fn.batches] == [5]
+    p.close()
+
+
+def test_batches_never_exceed_max_batch_size():
+    gate = threading.Event()
+    fn = Recorder(gate)
+    p  = BatchingPredictor(fn, max_batch_size=3, max_wait_ms=50)
+    futures = [p.submit(x) for x in rows(8)]
+    gate.set()
+    for f in futures:
+        f.result(5)
+    assert max(len(b) for b in fn.batches) <= 3
+    assert sorted(np.concatenate(fn.batches).tolist()) == list(range(8))
+    p.close()
+
+
+def test_max_wait_zero_does_not_hold_a_lone_request():
+    fn = Recorder()
+    p  = BatchingPredictor(fn, max_batch_size=16, max_wait_ms=0)
+    assert p.predict(rows(1)[0], timeout=5).tolist() == [0, 0]
+    p.close()
+
+
+def test_each_caller_gets_its_own_row_from_many_threads():
+    p = BatchingPredictor(Recorder(), max_batch_size=4, max_wait_ms=5)
+    out = {}
+
+    def call(i):
+        out[i] = p.predict(np.full(3, i, dtype=np.float32), timeout=5)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(40)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert all(out[i].tolist() == [i, -i] for i in range(40))
+    p.close()
+
+
+def test_predict_fn_error_reaches_every_waiting_future():
+    calls = []
+
+    def boom_once(batch):
+        calls.append(len(batch))
+        if len(calls) == 1:
+            raise ValueError("model exploded")
+        return np.zeros((len(batch), 2))
+
+    p = BatchingPredictor(boom_once, max_batch_size=8, max_wait_ms=100)
+    futures = [p.submit(x) for x in rows(3)]
+    for f in futures:
+        with pytest.raises(ValueError, match="model exploded"):
+            f.result(5)
+    assert p.predict(rows(1)[0], timeout=5).tolist() == [0, 0]   # the worker survived
+    p.close()
+
+
+def test_cancelled_requests_are_not_run():
+    gate = threading.Event()
+    fn = Recorder(gate)
+    p  = BatchingPredictor(fn, max_batch_size=1, max_wait_ms=0)
+    first = p.submit(rows(1)[0])          # occupies the worker until the gate opens
+    while not first.running():
+        pass
+    second, third = p.submit(np.full(3, 7, np.float32)), p.submit(np.full(3, 8, np.float32))
+    assert second.cancel()
+    gate.set()
+    assert third.result(5).tolist() == [8, -8]
+    assert 7 not in np.concatenate(fn.batches).tolist()
+    p.close()
+
+
+def test_close_stops_the_worker_and_rejects_new_requests():
+    p = BatchingPredictor(Recorder(), max_batch_size=4, max_wait_ms=1)
+    p.predict(rows(1)[0], timeout=5)
+    p.close()
+    assert not p._worker.is_alive()
+    with pytest.raises(RuntimeError):
+        p.submit(rows(1)[0])
+
+
+def test_swap_moves_the_same_worker_to_a_new_model():
+    p = BatchingPredictor(Recorder(), max_batch_size=4, max_wait_ms=1, version="v1")
+    worker = p._worker
+    assert p.predict(rows(2)[1], timeout=5).tolist() == [1, -1]
+    p.swap(lambda batch: np.zeros((len(batch), 2), np.float32), "v2")
+    assert p.version == "v2"
+    assert p.predict(rows(2)[1], timeout=5).tolist() == [0, 0]
+    assert p._worker is worker and worker.is_alive()
+    p.close()
@@ -0,0 +1,111 @@
+"""Prometheus text output, HTTP/file exposition and the active-session tracker."""
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from vaidya.metrics import (Counter, Gauge, Histogram, Registry, SessionTracker, start_file_dump,
+                            start_http_server)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def registry():
+    reg = Registry()
+    errors = reg.register(Counter("t_errors_total", "Errors by kind.", ["kind"]))
+    gauge  = reg.register(Gauge("t_entries", "Entries."))
+    hist   = reg.register(Histogram("t_seconds", "Latency.", ["stage"], buckets=(0.1, 1.0)))
+    return reg, errors, gauge, hist
+
+
+def test_text_exposition_format():
+    reg, errors, gauge, hist = registry()
+    errors.inc(kind="decode")
+    errors.inc(2, kind='say "hi"\n')
+    gauge.set(3)
+    for v in (0.05, 0.5, 5.0):
+        hist.observe(v, stage="predict")
+    assert reg.render().splitlines() == [
+        "# HELP t_errors_total Errors by kind.",
+        "# TYPE t_errors_total counter",
+        't_errors_total{kind="decode"} 1',
+        't_errors_total{kind="say \\"hi\\"\\n"} 2',
+        "# HELP t_entries Entries.",
+        "# TYPE t_entries gauge",
+        "t_entries 3",
+        "# HELP t_seconds Latency.",
+        "# TYPE t_seconds histogram",
+        't_seconds_bucket{stage="predict",le="0.1"} 1',
+        't_seconds_bucket{stage="predict",le="1"} 2',
+        't_seconds_bucket{stage="predict",le="+Inf"} 3',
+        't_seconds_sum{stage="predict"} 5.55',
+        't_seconds_count{stage="predict"} 3',
+    ]
+
+
+def test_wrong_labels_are_rejected():
+    _, errors, _, hist = registry()
+    with pytest.raises(ValueError):
+        errors.inc(stage="x")
+    with pytest.raises(ValueError):
+        hist.observe(1.0)
+
+
+def test_values_computed_at_scrape_time():
+    reg, errors, gauge, _ = registry()
+    errors.set_function(lambda: {("hit",): 4, ("miss",): 1})
+    gauge.set_function(lambda: 1 / 0)          # a failing callback drops the series, not the scrape
+    text = reg.render()
+    assert 't_errors_total{kind="hit"} 4' in text and 't_errors_total{kind="miss"} 1' in text
+    assert "# TYPE t_entries gauge\n#" in text
+
+
+def test_http_endpoint_and_taken_port():
+    reg, errors, _, _ = registry()
+    errors.inc(kind="decode")
+    server = start_http_server(0, registry=reg)
+    port = server.server_address[1]
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as r:
+            assert r.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert r.read().decode() == reg.render()
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/other", timeout=5)
+        assert start_http_server(port, registry=reg) is None
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_file_dump(tmp_path):
+    reg, errors, _, _ = registry()
+    errors.inc(kind="decode")
+    path = tmp_path / "metrics.prom"
+    stop = start_file_dump(str(path), interval_s=0.01, registry=reg)
+    deadline = time.monotonic() + 5
+    while not path.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    stop.set()
+    assert path.read_text() == reg.render()
+
+
+def test_session_tracker_forgets_idle_sessions_on_touch():
+    clock = Clock()
+    tracker = SessionTracker(window_s=10, clock=clock)
+    for i in range(100):
+        tracker.touch(f"s{i}")
+    clock.now = 5
+    tracker.touch("s0")                        # still active: moves to the back
+    clock.now = 12
+    tracker.touch("new")
+    assert len(tracker._seen) == 2             # pruned without anyone calling active()
+    assert tracker.active() == 2
+    clock.now = 16
+    assert tracker.active() == 1
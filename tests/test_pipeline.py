@@ -0,0 +1,58 @@
+"""PrefetchPipeline: batching, per-item errors, source failures, early stop."""
+import itertools
+import threading
+
+import pytest
+
+from vaidya.pipeline import PrefetchPipeline, decode_many
+
+
+def square(x):
+    if x < 0:
+        raise ValueError(f"bad {x}")
+    return x * x
+
+
+def source(values):
+    return ((f"f{v}", v) for v in values)
+
+
+def test_batches_keep_input_order():
+    batches = list(PrefetchPipeline(square, batch_size=3, workers=2).batches(source(range(7))))
+    assert [len(b) for b in batches] == [3, 3, 1]
+    assert [item for b in batches for item in b] == [(f"f{i}", i * i) for i in range(7)]
+
+
+def test_decode_errors_are_returned_per_item():
+    (batch,) = PrefetchPipeline(square, batch_size=4, workers=2).batches(source([1, -2, 3]))
+    assert batch[0] == ("f1", 1) and batch[2] == ("f3", 9)
+    assert isinstance(batch[1][1], ValueError)
+
+
+def test_source_failure_yields_the_partial_chunk_first():
+    def failing():
+        yield from source(range(5))
+        raise OSError("truncated archive")
+
+    got = []
+    with pytest.raises(OSError, match="truncated archive"):
+        for batch in PrefetchPipeline(square, batch_size=3, workers=2).batches(failing()):
+            got.append([name for name, _ in batch])
+    assert got == [["f0", "f1", "f2"], ["f3", "f4"]]
+
+
+def test_consumer_break_stops_the_producer():
+    pulled = itertools.count()
+    endless = ((f"f{i}", i) for i in pulled)
+    before = threading.active_count()
+    for batch in PrefetchPipeline(square, batch_size=4, workers=2, prefetch=2).batches(endless):
+        break
+    assert [name for name, _ in batch] == ["f0", "f1", "f2", "f3"]
+    assert next(pulled) <= 4 * (1 + 2 + 1) + 1     # yielded + queued + one being built, not the whole source
+    assert threading.active_count() <= before
+
+
+def test_decode_many_keeps_order_and_errors():
+    out = decode_many(square, [3, -1, 2])
+    assert out[0] == 9 and out[2] == 4 and isinstance(out[1], ValueError)
+    assert decode_many(square, []) == []
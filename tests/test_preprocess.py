@@ -0,0 +1,55 @@
+"""Batched decoding matches the single-image path; BufferPool reuse across threads."""
+import io
+import threading
+
+import numpy as np
+from PIL import Image
+
+from vaidya.pipeline import decode_many
+from vaidya.preprocess import BatchBuffer, BufferPool, decode_pixels, load_image, preprocess_image
+
+
+def jpeg(color, size=(640, 480)):
+    buf = io.BytesIO()
+    Image.new("RGB", size, color).save(buf, "JPEG")
+    return buf.getvalue()
+
+
+def test_multi_upload_batch_matches_single_image_path():
+    uploads = [jpeg((200, 30, 30)), jpeg((10, 120, 240), (300, 900)), b"not an image"]
+    decoded = decode_many(decode_pixels, uploads)
+    assert isinstance(decoded[2], Exception)
+    batch = BatchBuffer(2).fill_pixels(decoded[:2])
+    assert batch.shape == (2, 224, 224, 3) and batch.dtype == np.float32
+    for row, data in zip(batch, uploads):
+        np.testing.assert_array_equal(row, preprocess_image(load_image(io.BytesIO(data)))[0])
+
+
+def test_batch_buffer_grows_and_returns_a_view():
+    buffer = BatchBuffer(1)
+    px = np.full((224, 224, 3), 255, np.uint8)
+    batch = buffer.fill_pixels([px] * 3)
+    assert buffer.capacity == 3 and batch.base is buffer.array
+    assert batch.max() == batch.min() == 1.0
+
+
+def test_buffers_are_reused_across_threads():
+    pool, seen = BufferPool(capacity=4), []
+
+    def use():
+        with pool.checkout(3) as buf:
+            seen.append(id(buf))
+
+    for _ in range(5):
+        t = threading.Thread(target=use)
+        t.start()
+        t.join()
+    assert pool.allocated == 1 and len(set(seen)) == 1
+
+
+def test_concurrent_checkouts_get_distinct_buffers_and_grow():
+    pool = BufferPool(capacity=2)
+    with pool.checkout(2) as a, pool.checkout(8) as b:
+        assert a is not b
+        assert b.capacity >= 8
+    assert pool.allocated == 2
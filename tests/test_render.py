@@ -0,0 +1,86 @@
+"""HTML fragments: pagination bounds, escaped card grids, results table and panel,
+static fragments built once."""
+import builtins
+
+from vaidya.labels import CLASS_NAMES, class_info
+from vaidya.render import (badge, card_grid, class_legend, error_row, hospital_card, minify_css, page_bounds,
+                           page_head, result_panel, result_row, results_table, wound_card)
+
+
+def test_page_bounds_slices_the_last_page_short():
+    assert page_bounds(50, 1, 12) == (1, 5, 0, 12)
+    assert page_bounds(50, 5, 12) == (5, 5, 48, 50)
+
+
+def test_page_bounds_clamps_the_page():
+    assert page_bounds(50, 9, 12) == (5, 5, 48, 50)
+    assert page_bounds(50, 0, 12) == (1, 5, 0, 12)
+    assert page_bounds(0, 3, 12) == (1, 1, 0, 0)
+
+
+def test_one_grid_per_page():
+    hospitals = [{"name": f"H{i}", "location": "L", "phone": "040"} for i in range(30)]
+    _, _, start, end = page_bounds(len(hospitals), 3, 12)
+    html = card_grid(hospital_card(h) for h in hospitals[start:end])
+    assert html.startswith("<div class='card-grid'>")
+    assert html.count("class='hospital-card'") == 6
+    assert "H24" in html and "H23" not in html
+
+
+def test_card_fields_are_escaped():
+    w = {"name": "<b>Ravi</b>", "condition": "Cut & graze", "recovery": "7–14 days",
+         "date": "2026-01-02", "notes": "<script>alert(1)</script>"}
+    html = wound_card(w)
+    assert "<script>" not in html and "&lt;script&gt;" in html
+    assert "&lt;b&gt;Ravi&lt;/b&gt;" in html and "Cut &amp; graze" in html
+    assert "📝" not in wound_card({**w, "notes": ""})
+    h = hospital_card({"name": "A'B", "location": "X", "phone": "1' onclick='x"})
+    assert "href='tel:1&#x27; onclick=&#x27;x'" in h
+
+
+def test_results_table_has_one_row_per_upload():
+    rows = [result_row(1, "<a>.jpg", "Stab_wound", badge(class_info("Stab_wound")["severity"]), 91.26),
+            error_row(2, "b.png", "Could not read image <corrupt>")]
+    html = results_table(rows)
+    assert html.count("<tr>") == 3                       # header + 2 uploads
+    assert "&lt;a&gt;.jpg" in html and "&lt;corrupt&gt;" in html
+    assert "badge-critical" in html and "91.3%" in html
+    assert badge("<x>") == "&lt;x&gt;"
+
+
+def test_minify_css():
+    css = "/* header */\n.a  >  .b {\n  color : red;\n  margin: 0 ;\n}\n"
+    assert minify_css(css) == ".a>.b{color:red;margin:0}"
+
+
+def test_static_fragments_are_built_once(monkeypatch):
+    page_head.cache_clear()
+    opened = []
+    real_open = builtins.open
+
+    def spy(path, *args, **kwargs):
+        opened.append(path)
+        return real_open(path, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "open", spy)
+    first = page_head()
+    assert page_head() is first and len(opened) == 1
+    assert first.startswith("<style>") and "/*" not in first and "\n" not in first.split("</style>")[0]
+    assert class_legend() is class_legend()
+
+
+def test_class_legend_shows_every_class_with_its_severity():
+    legend = class_legend()
+    for name in CLASS_NAMES.values():
+        assert f"<b>{name}</b>{badge(class_info(name)['severity'])}" in legend
+    assert legend.count("badge-critical") == 1
+
+
+def test_result_panel_is_one_fragment_sorted_by_score():
+    scores = {"Cut": 20.0, "Stab_wound": 70.0, "Burns": 10.0}
+    html = result_panel("Stab_wound", 70.0, scores)
+    assert "badge-critical" in html and "CALL AMBULANCE" in html
+    assert html.index("Stab_wound</b>") < html.index("Cut</b>") < html.index("Burns</b>")
+    assert html.count("score-top") == 1 and "width:70%" in html
+    assert "See a doctor" in result_panel("<unknown>", 50.0, {"<unknown>": 50.0})
+    assert "&lt;unknown&gt;" in result_panel("<unknown>", 50.0, {})
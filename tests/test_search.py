@@ -0,0 +1,67 @@
+"""HospitalSearchIndex: ranking, prefix, substring and fuzzy matching."""
+from vaidya.hospitals import HOSPITALS
+from vaidya.search import HospitalSearchIndex, edit_distance
+
+RECORDS = [
+    {"name": "Apollo Hospitals",      "location": "Jubilee Hills"},
+    {"name": "Care Hospitals",        "location": "Banjara Hills"},
+    {"name": "Banjara Clinic",        "location": "Ameerpet"},
+    {"name": "Sunshine Hospital",     "location": "Secunderabad"},
+    {"name": "Yashoda Hospitals",     "location": "Apollo Road"},
+]
+
+
+def names(index, query):
+    return [RECORDS[i]["name"] for i in index.search(query)]
+
+
+def test_empty_query_returns_everything_in_order():
+    assert HospitalSearchIndex(RECORDS).search("  ") == list(range(len(RECORDS)))
+
+
+def test_name_hits_rank_above_location_hits():
+    assert names(HospitalSearchIndex(RECORDS), "apollo") == ["Apollo Hospitals", "Yashoda Hospitals"]
+    assert names(HospitalSearchIndex(RECORDS), "banjara") == ["Banjara Clinic", "Care Hospitals"]
+
+
+def test_exact_ranks_above_prefix():
+    index = HospitalSearchIndex(RECORDS)
+    assert names(index, "hospital")[0] == "Sunshine Hospital"
+    assert set(names(index, "hosp")) == {"Apollo Hospitals", "Care Hospitals",
+                                         "Sunshine Hospital", "Yashoda Hospitals"}
+
+
+def test_every_query_word_must_match():
+    index = HospitalSearchIndex(RECORDS)
+    assert names(index, "care banj") == ["Care Hospitals"]
+    assert names(index, "care ameerpet") == []
+
+
+def test_substring_matching():
+    index = HospitalSearchIndex(RECORDS)
+    assert names(index, "shine") == ["Sunshine Hospital"]
+    assert names(index, "derab") == ["Sunshine Hospital"]
+
+
+def test_one_and_two_letter_queries_match_substrings():
+    index = HospitalSearchIndex(HOSPITALS)
+    assert len(index.search("a")) == sum("a" in f"{h['name']} {h['location']}".lower() for h in HOSPITALS)
+    assert names(HospitalSearchIndex(RECORDS), "nj") == ["Banjara Clinic", "Care Hospitals"]
+
+
+def test_typos_are_matched_below_exact_hits():
+    index = HospitalSearchIndex(RECORDS)
+    assert names(index, "apolo") == ["Apollo Hospitals", "Yashoda Hospitals"]
+    assert names(index, "secunderbad") == ["Sunshine Hospital"]
+    assert names(index, "jubile hils") == ["Apollo Hospitals"]
+    assert names(index, "xyzzy") == []
+
+
+def test_limit():
+    assert len(HospitalSearchIndex(RECORDS).search("hosp", limit=2)) == 2
+
+
+def test_edit_distance_stops_at_the_limit():
+    assert edit_distance("kitten", "sitting", 3) == 3
+    assert edit_distance("kitten", "sitting", 1) == 2
+    assert edit_distance("a", "abcd", 2) == 3
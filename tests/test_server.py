@@ -0,0 +1,169 @@
+"""Model server protocol over a Unix socket and shared memory, with a NumPy model."""
+import multiprocessing
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from vaidya import server as S
+from vaidya.preprocess import INPUT_SHAPE
+from vaidya.server import ModelServer, RemoteModel, _listening
+
+CLASSES = 7
+
+
+class MeanModel:
+    """Scores each image by its mean value, so every row is checkable."""
+
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, batch):
+        self.batches.append(len(batch))
+        means = batch.mean(axis=(1, 2, 3))
+        return np.stack([means * (c + 1) for c in range(CLASSES)], axis=1).astype(np.float32)
+
+
+def images(n, start=0):
+    return (np.arange(start, start + n, dtype=np.float32) / 100).reshape(-1, 1, 1, 1) * np.ones(INPUT_SHAPE, np.float32)
+
+
+def expected(batch):
+    return MeanModel().predict(batch)
+
+
+def serve(path, max_wait_ms=0.0, info=None):
+    server = ModelServer(path, MeanModel(), CLASSES, max_batch_size=16, max_wait_ms=max_wait_ms,
+                         info=info or {"backend": "numpy"})
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def stop(server):
+    server.shutdown()
+    server.server_close()
+
+
+def serve_process(path):
+    """A server in its own process, like `python -m vaidya.server`; ready once it listens."""
+    proc = multiprocessing.get_context("fork").Process(target=lambda: serve(path).serve_forever(), daemon=True)
+    proc.start()
+    deadline = time.monotonic() + 10
+    while not _listening(path):
+        assert time.monotonic() < deadline, "model server did not start"
+        time.sleep(0.01)
+    return proc
+
+
+@pytest.fixture
+def sock(tmp_path, monkeypatch):
+    # Server and clients share one resource tracker here; the client alone owns (and unlinks) each segment.
+    monkeypatch.setattr(S.resource_tracker, "unregister", lambda name, rtype: None)
+    return str(tmp_path / "m.sock")
+
+
+def test_round_trip_in_chunks_of_capacity(sock):
+    server = serve(sock)
+    client = RemoteModel(sock, capacity=4)
+    try:
+        x = images(10)
+        np.testing.assert_allclose(client.predict(x), expected(x), rtol=1e-6)
+        assert server.model.batches == [4, 4, 2]
+        assert client.predict(images(0)).shape == (0, CLASSES)
+    finally:
+        client.close()
+        stop(server)
+
+
+def test_empty_request_returns_server_info(sock):
+    server = serve(sock, info={"backend": "numpy", "model": [1, 2]})
+    client = RemoteModel(sock, capacity=2)
+    try:
+        info = client.ping()
+        assert info["classes"] == CLASSES and info["model"] == [1, 2]
+        assert info["input_shape"] == list(INPUT_SHAPE)
+        assert server.model.batches == []            # n = 0 never reaches the model
+        server.info["model"] = [3, 4]                 # e.g. the server reloaded another file
+        assert client.ping()["model"] == [3, 4] and client.info["model"] == [3, 4]
+    finally:
+        client.close()
+        stop(server)
+
+
+@pytest.mark.parametrize("max_wait_ms", [0.0, 5.0])
+def test_concurrent_clients_get_their_own_rows(sock, max_wait_ms):
+    server = serve(sock, max_wait_ms)
+    clients = [RemoteModel(sock, capacity=8) for _ in range(3)]
+    errors, barrier = [], threading.Barrier(6)
+
+    def work(client, start):
+        barrier.wait(5)
+        try:
+            for i in range(10):
+                x = images(3, start + i)
+                np.testing.assert_allclose(client.predict(x), expected(x), rtol=1e-6)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(clients[i % 3], i * 10)) for i in range(6)]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(30)
+        assert errors == []
+        assert sum(server.model.batches) == 6 * 10 * 3
+        assert sum(len(c._idle) for c in clients) <= 6     # at most one connection per thread in flight
+    finally:
+        for c in clients:
+            c.close()
+        stop(server)
+
+
+def test_reconnects_after_restart_and_errors_while_down(sock):
+    client = RemoteModel(sock, capacity=2)
+    with pytest.raises(OSError):                      # created before the server is up
+        client.ping()
+
+    x = images(2)
+    proc = serve_process(sock)
+    np.testing.assert_allclose(client.predict(x), expected(x), rtol=1e-6)
+    proc.kill()
+    proc.join()
+    proc = serve_process(sock)                        # replaces the stale socket file
+    try:
+        # The pooled connection died with the old server; a fresh one is used transparently.
+        np.testing.assert_allclose(client.predict(x), expected(x), rtol=1e-6)
+    finally:
+        proc.kill()
+        proc.join()
+    with pytest.raises(OSError):                      # nothing listens any more
+        client.predict(x)
+    client.close()
+
+
+def test_model_errors_are_reported_and_the_connection_survives(sock):
+    server = serve(sock)
+    client = RemoteModel(sock, capacity=2)
+    try:
+        server.model.predict = lambda batch: 1 / 0
+        with pytest.raises(RuntimeError, match="ZeroDivisionError"):
+            client.predict(images(1))
+        server.model.predict = MeanModel().predict
+        np.testing.assert_allclose(client.predict(images(1)), expected(images(1)), rtol=1e-6)
+        assert len(client._idle) == 1                 # same connection reused
+    finally:
+        client.close()
+        stop(server)
+
+
+def test_second_server_on_a_live_socket_is_refused(sock):
+    server = serve(sock)
+    try:
+        assert _listening(sock)
+        with pytest.raises(OSError, match="another model server"):
+            ModelServer(sock, MeanModel(), CLASSES)
+        assert _listening(sock)                       # the first server kept its socket
+    finally:
+        stop(server)
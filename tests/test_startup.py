@@ -0,0 +1,70 @@
+"""ModelLoader: one load per process, per-phase timings, background start, errors."""
+import json
+import threading
+import time
+
+import pytest
+
+from vaidya import startup
+
+
+class SlowModel:
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, batch):
+        self.calls += 1
+        time.sleep(0.02)
+        return batch[:, 0, 0, :1]
+
+
+@pytest.fixture
+def fake_runtime(monkeypatch):
+    loads = []
+
+    def load_backend(backend, model_path, **kwargs):
+        time.sleep(0.03)
+        loads.append(kwargs)
+        return SlowModel()
+
+    monkeypatch.setattr(startup, "import_runtime", lambda backend: time.sleep(0.01))
+    monkeypatch.setattr(startup, "load_backend", load_backend)
+    return loads
+
+
+def test_timings_cover_each_phase_and_are_logged(fake_runtime, tmp_path):
+    log = tmp_path / "startup.jsonl"
+    loader = startup.ModelLoader("tflite", "m.h5", num_threads=2, inter_threads=1, timings_log=str(log))
+    model = loader.result(timeout=5)
+    assert list(loader.timings) == ["import", "load", "warmup"]
+    assert loader.timings["load"] >= 0.03 and loader.timings["warmup"] >= 0.02
+    assert model.calls == 1                                  # the warm-up pass
+    assert fake_runtime[0]["num_threads"] == 2 and fake_runtime[0]["inter_threads"] == 1
+    entry = json.loads(log.read_text())
+    assert entry["backend"] == "tflite" and {"import_s", "load_s", "warmup_s"} <= set(entry)
+    assert "load" in loader.summary()
+
+
+def test_loads_once_across_threads_and_starts_in_background(fake_runtime):
+    loader = startup.ModelLoader("keras", "m.h5", warmup=False)
+    loader.start()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(loader.result(5))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(fake_runtime) == 1 and len({id(m) for m in results}) == 1
+    assert loader.ready and "warmup" not in loader.timings
+
+
+def test_load_errors_reach_every_caller(monkeypatch):
+    def broken(*args, **kwargs):
+        raise FileNotFoundError("m.h5")
+
+    monkeypatch.setattr(startup, "import_runtime", lambda backend: None)
+    monkeypatch.setattr(startup, "load_backend", broken)
+    loader = startup.ModelLoader("keras", "m.h5")
+    for _ in range(2):
+        with pytest.raises(FileNotFoundError):
+            loader.result(timeout=5)
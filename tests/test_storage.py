@@ -0,0 +1,84 @@
+"""Storage: shared writer and pooled readers, accounts, anonymous-record expiry."""
+import threading
+from datetime import date, timedelta
+
+from vaidya.storage import Storage, hash_password, verify_password
+
+
+def record(name, condition="burn", day=None):
+    return {"name": name, "condition": condition, "notes": "", "recovery": "7–14 days",
+            "date": str(day or date.today())}
+
+
+def test_writer_is_shared_and_readers_are_pooled(tmp_path):
+    storage = Storage(str(tmp_path / "v.db"))
+    conn = storage._connection
+    barrier = threading.Barrier(8)
+
+    def work(i):
+        storage.add_wound_record("a@x", record(f"p{i}"))
+        assert storage._connection is conn
+        barrier.wait(5)
+        storage.count_wound_records("a@x")
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert storage.count_wound_records("a@x") == 8
+    assert storage.wound_totals("a@x") == {"burn": 8}
+    assert 1 <= len(storage._readers) <= 8 and conn not in storage._readers
+    storage.close()
+
+
+def test_reads_do_not_wait_for_the_writer(tmp_path):
+    storage = Storage(str(tmp_path / "v.db"))
+    storage.add_wound_record("a@x", record("p"))
+    out = []
+    with storage._conn() as conn:          # a write in progress on this thread
+        conn.execute("INSERT INTO wound_records (owner, name, condition, recovery, date) "
+                     "VALUES ('a@x', 'q', 'cut', '', '2026-01-01')")
+        reader = threading.Thread(target=lambda: out.append(storage.count_wound_records("a@x")))
+        reader.start()
+        reader.join(5)
+        assert out == [1]                  # answered from the last commit
+    assert storage.count_wound_records("a@x") == 2
+
+
+def test_users(tmp_path):
+    storage = Storage(str(tmp_path / "v.db"))
+    assert storage.create_user("Asha", "asha@x", "s3cret")
+    assert not storage.create_user("Other", "asha@x", "pw")     # email taken
+    assert storage.authenticate("asha@x", "s3cret") == {"name": "Asha", "email": "asha@x"}
+    assert storage.authenticate("asha@x", "wrong") is None
+    assert storage.authenticate("nobody@x", "s3cret") is None
+    with storage._read() as conn:
+        stored = conn.execute("SELECT password_hash FROM users").fetchone()[0]
+    assert "s3cret" not in stored
+
+
+def test_password_hashing():
+    encoded = hash_password("pw", iterations=1000)
+    algo, iterations, salt, digest = encoded.split("$")
+    assert (algo, iterations, len(salt), len(digest)) == ("pbkdf2_sha256", "1000", 32, 64)
+    assert verify_password("pw", encoded)
+    assert not verify_password("pw ", encoded)
+    assert hash_password("pw", iterations=1000) != encoded      # fresh salt every time
+    assert hash_password("pw", bytes.fromhex(salt), 1000) == encoded
+    assert not verify_password("pw", "not-a-hash")
+    assert not verify_password("pw", "a$b$c$d")
+
+
+def test_expire_anonymous_keeps_accounts_and_recent_sessions(tmp_path):
+    storage = Storage(str(tmp_path / "v.db"))
+    old = date.today() - timedelta(days=5)
+    storage.add_wound_record("session:old", record("a", day=old))
+    storage.add_wound_record("session:new", record("b"))
+    storage.add_wound_record("a@x", record("c", day=old))
+
+    assert storage.expire_anonymous(max_age_days=1) == 1
+    assert storage.count_wound_records("session:old") == 0
+    assert storage.wound_totals("session:old") == {}
+    assert storage.count_wound_records("session:new") == 1
+    assert storage.count_wound_records("a@x") == 1 and storage.wound_totals("a@x") == {"burn": 1}
@@ -0,0 +1,83 @@
+"""TTA views and averaging, temperature scaling and fitting, calibration files."""
+import numpy as np
+import pytest
+from PIL import Image
+
+from vaidya.tta import (DEFAULT_VIEWS, apply_temperature, average_views, ece, fit_temperature, load_calibration,
+                        nll, parse_views, predict_tta, tta_pixels)
+
+
+def softmax(z):
+    e = np.exp(z - z.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+def test_apply_temperature_matches_scaling_the_logits():
+    logits = np.random.default_rng(0).standard_normal((4, 7))
+    probs  = softmax(logits)
+    for t in (0.5, 2.0, 7.0):
+        np.testing.assert_allclose(apply_temperature(probs, t), softmax(logits / t), rtol=1e-9)
+    np.testing.assert_array_equal(apply_temperature(probs, 1.0), probs)
+    soft = apply_temperature(probs, 3.0)
+    assert (soft.argmax(axis=1) == probs.argmax(axis=1)).all()          # ranking never changes
+    assert (soft.max(axis=1) < probs.max(axis=1)).all()                 # T > 1 softens
+
+
+def test_apply_temperature_survives_zero_probabilities():
+    out = apply_temperature(np.array([1.0, 0.0, 0.0]), 2.0)
+    assert np.isfinite(out).all() and out.sum() == pytest.approx(1.0)
+
+
+def test_average_views_groups_consecutive_rows_per_image():
+    probs = np.array([[1.0, 0.0], [0.0, 1.0], [0.5, 0.5],
+                      [0.2, 0.8], [0.4, 0.6], [0.0, 1.0]])
+    np.testing.assert_allclose(average_views(probs, 3), [[0.5, 0.5], [0.2, 0.8]])
+    np.testing.assert_allclose(average_views(probs, 1), probs)
+
+
+def test_fit_temperature_recovers_the_true_temperature():
+    rng    = np.random.default_rng(0)
+    logits = rng.standard_normal((4000, 7)) * 3
+    labels = np.array([rng.choice(7, p=p) for p in softmax(logits)])
+    overconfident = softmax(logits * 2.5)                       # as if the model's T were 1 / 2.5
+    t = fit_temperature(overconfident, labels)
+    assert t == pytest.approx(2.5, rel=0.1)
+    calibrated = apply_temperature(overconfident, t)
+    assert nll(calibrated, labels) < nll(overconfident, labels)
+    assert ece(calibrated, labels) < ece(overconfident, labels)
+
+
+def test_predict_tta_runs_every_view_in_one_batch():
+    calls = []
+
+    def predict(batch):
+        calls.append(batch.shape)
+        return np.tile([0.7, 0.2, 0.1], (len(batch), 1))
+
+    image = Image.new("RGB", (400, 300), (120, 30, 60))
+    probs, timings = predict_tta(predict, image, DEFAULT_VIEWS, temperature=2.0)
+    assert calls == [(len(DEFAULT_VIEWS), 224, 224, 3)]
+    np.testing.assert_allclose(probs, apply_temperature(np.array([0.7, 0.2, 0.1]), 2.0))
+    assert set(timings) == {"views", "predict"}
+
+
+def test_views_are_distinct_crops_and_flips():
+    pixels = np.zeros((300, 400, 3), np.uint8)
+    pixels[:, :200] = 255                                        # left half white
+    views = tta_pixels(Image.fromarray(pixels), ("orig", "flip", "crop75"))
+    assert views.shape == (3, 224, 224, 3)
+    assert views[0, :, 0].min() == 255 and views[1, :, 0].max() == 0
+    assert parse_views("orig, flip") == ("orig", "flip") and parse_views("") == DEFAULT_VIEWS
+    with pytest.raises(ValueError):
+        parse_views("rotate")
+
+
+def test_load_calibration(tmp_path):
+    assert load_calibration(None) == {"temperature": 1.0}
+    good = tmp_path / "cal.json"
+    good.write_text('{"temperature": "1.7", "views": ["orig"]}')
+    assert load_calibration(str(good)) == {"temperature": 1.7, "views": ["orig"]}
+    bad = tmp_path / "bad.json"
+    bad.write_text("{not json")
+    assert load_calibration(str(bad)) == {"temperature": 1.0}
+    assert load_calibration(str(tmp_path / "missing.json")) == {"temperature": 1.0}
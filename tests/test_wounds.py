@@ -0,0 +1,64 @@
+"""Wound-record export/import round trips in every format, and the daily aggregates."""
+import pytest
+
+from vaidya.storage import Storage
+from vaidya.wounds import FORMATS, clean_record, detect_format, export_records, import_records, read_records
+
+
+def seeded(path, n=25):
+    storage = Storage(str(path))
+    storage.add_wound_records(
+        (f"u{i % 2}@x", {"name": f"Patient {i}", "condition": ["Burn", "deep cut", "Sprain, left ankle"][i % 3],
+                         "notes": 'said "ouch"\nthen left' if i == 3 else "", "recovery": "7–14 days",
+                         "date": f"2026-01-{i % 28 + 1:02d}"})
+        for i in range(n))
+    return storage
+
+
+def records(storage, owner=None):
+    return [{k: v for k, v in r.items() if k != "id"} for r in storage.iter_wound_records(owner)]
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_export_import_round_trip(tmp_path, fmt):
+    if fmt in ("parquet", "arrow"):
+        pytest.importorskip("pyarrow")
+    source = seeded(tmp_path / "a.db")
+    path = str(tmp_path / f"records.{fmt}")
+    assert export_records(source, path, batch_size=4) == 25
+    assert len(list(read_records(path, batch_size=4))) == 25
+
+    target = Storage(str(tmp_path / "b.db"))
+    assert import_records(target, path, batch_size=4) == (25, 0)
+    assert records(target) == records(source)
+    assert target.wound_totals("u0@x") == source.wound_totals("u0@x")
+    assert target.wound_daily_stats("u1@x") == source.wound_daily_stats("u1@x")
+
+
+def test_export_one_owner_and_import_under_another(tmp_path):
+    source = seeded(tmp_path / "a.db")
+    path = str(tmp_path / "u1.jsonl")
+    assert export_records(source, path, owner="u1@x") == 12
+    target = Storage(str(tmp_path / "b.db"))
+    assert import_records(target, path, owner="me@x") == (12, 0)
+    assert target.count_wound_records("me@x") == 12 and target.count_wound_records("u1@x") == 0
+
+
+def test_import_skips_rows_without_name_condition_or_owner(tmp_path):
+    path = tmp_path / "in.csv"
+    path.write_text("owner,name,condition,notes,recovery,date\n"
+                    "a@x,Ravi,Burn,,,\n"
+                    "a@x,,Cut,,,\n"
+                    ",Asha,Cut,,,\n", encoding="utf-8")
+    storage = Storage(str(tmp_path / "v.db"))
+    assert import_records(storage, str(path)) == (1, 2)
+    (rec,) = storage.list_wound_records("a@x")
+    assert rec["recovery"] == "7–14 days" and rec["date"]
+
+
+def test_clean_record_and_detect_format():
+    assert clean_record({"name": " A ", "condition": "deep cut"})["recovery"] == "10–20 days"
+    assert clean_record({"name": "A"}) is None
+    assert detect_format("x.ndjson") == "jsonl" and detect_format("x.feather") == "arrow"
+    with pytest.raises(ValueError):
+        detect_format("x.xlsx")
@@ -0,0 +1 @@
+"""Vaidya – shared, Streamlit-free building blocks used by app.py."""
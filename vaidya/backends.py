@@ -0,0 +1,381 @@
+"""Pluggable inference backends for the 7-class wound classifier.
+
+* ``keras``  – reference backend, loads the .h5 through tf.keras (heavy).
+* ``tflite`` – TFLite interpreter (XNNPACK on CPU); needs only a TFLite runtime.
+* ``onnx``   – ONNX Runtime CPU session.
+
+The lightweight artifacts are built once from the .h5 file and cached on disk
+next to it, keyed by the .h5 size/mtime (and the int8 calibration set) so a
+new model triggers a rebuild.
+TensorFlow is only imported when that conversion actually has to run.
+
+Both can also be quantized at export time (`quantize`):
+
+* ``dynamic`` – int8 weights, float activations; no calibration data needed.
+* ``float16`` – float16 weights (TFLite only).
+* ``int8``    – full-integer weights and activations, calibrated on a folder
+  of representative photos. Input/output stay float32, so preprocessing is
+  unchanged.
+
+A quantized artifact must pass an accuracy gate against the Keras model
+(top-1 agreement and per-class confidence drift, ideally on a held-out photo
+folder) before it is cached; the gate report is saved next to it as JSON.
+
+    python -m vaidya.backends --backend tflite      # build + parity check
+    python -m vaidya.backends --backend tflite --quantize int8 \
+        --calibration-dir calib/ --eval-dir holdout/
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+
+from vaidya.labels import CLASS_NAMES
+from vaidya.preprocess import INPUT_SHAPE, image_paths, iter_folder, load_folder
+
+log = logging.getLogger(__name__)
+
+BACKENDS    = ("keras", "tflite", "onnx")
+QUANT_MODES = ("none", "dynamic", "float16", "int8")
+
+# Accuracy gate for quantized artifacts (float exports use the strict parity check).
+QUANT_MIN_TOP1    = 0.98
+QUANT_ATOL        = 0.10
+CALIBRATION_LIMIT = 200
+
+
+class ParityError(RuntimeError):
+    """A converted model disagrees with the Keras reference."""
+
+
+# ─────────────────────────────────────────────
+#  BACKENDS
+# ─────────────────────────────────────────────
+class KerasBackend:
+    name = "keras"
+
+    def __init__(self, model_path, num_threads=None, inter_threads=None):
+        import tensorflow as tf
+        try:   # only possible before TensorFlow has created its thread pools
+            if num_threads:
+                tf.config.threading.set_intra_op_parallelism_threads(num_threads)
+            if inter_threads:
+                tf.config.threading.set_inter_op_parallelism_threads(inter_threads)
+        except RuntimeError as e:
+            log.warning("TensorFlow thread counts not applied: %s", e)
+        self.model = tf.keras.models.load_model(model_path)
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        return np.asarray(self.model.predict_on_batch(batch))
+
+
+class TFLiteBackend:
+    """TFLite interpreter per power-of-two batch bucket.
+
+    Resizing an interpreter means reallocating all its tensors, and the
+    micro-batcher produces a different batch size on almost every call. So
+    each bucket (1, 2, 4, ...) gets its own interpreter, allocated once on
+    first use, and a batch is zero-padded up to its bucket (at most 2x the
+    rows). Interpreters map the same model file, so weights are shared.
+    """
+    name = "tflite"
+
+    def __init__(self, artifact_path, num_threads=None):
+        self._Interpreter = _tflite_interpreter_class()
+        self.artifact_path = artifact_path
+        self.num_threads   = num_threads
+        self._buckets = {}
+        self._lock    = threading.Lock()
+        self._slot(1)   # load now, so a broken artifact fails here rather than on a request
+
+    @staticmethod
+    def bucket(n):
+        return 1 << max(0, n - 1).bit_length()
+
+    def _slot(self, bucket):
+        with self._lock:
+            slot = self._buckets.get(bucket)
+            if slot is None:
+                interpreter = self._Interpreter(model_path=self.artifact_path, num_threads=self.num_threads)
+                inp = interpreter.get_input_details()[0]["index"]
+                out = interpreter.get_output_details()[0]["index"]
+                interpreter.resize_tensor_input(inp, (bucket, *INPUT_SHAPE))
+                interpreter.allocate_tensors()
+                # an Interpreter is not thread-safe: one lock and one padded input per bucket
+                slot = self._buckets[bucket] = (interpreter, inp, out, threading.Lock(),
+                                                np.zeros((bucket, *INPUT_SHAPE), dtype=np.float32))
+            return slot
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        n = len(batch)
+        interpreter, inp, out, lock, padded = self._slot(self.bucket(n))
+        with lock:
+            if n == len(padded):
+                interpreter.set_tensor(inp, np.ascontiguousarray(batch, dtype=np.float32))
+            else:
+                padded[:n] = batch   # rows past n keep old data; their outputs are dropped
+                interpreter.set_tensor(inp, padded)
+            interpreter.invoke()
+            return interpreter.get_tensor(out)[:n].copy()
+
+
+class OnnxBackend:
+    name = "onnx"
+
+    def __init__(self, artifact_path, num_threads=None, inter_threads=None):
+        import onnxruntime as ort
+        opts = ort.SessionOptions()
+        if num_threads:
+            opts.intra_op_num_threads = num_threads
+        if inter_threads:
+            opts.inter_op_num_threads = inter_threads
+        self.session = ort.InferenceSession(artifact_path, opts, providers=["CPUExecutionProvider"])
+        self._input  = self.session.get_inputs()[0].name
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        return self.session.run(None, {self._input: batch})[0]
+
+
+def import_runtime(backend):
+    """Import (and return) the runtime module a backend needs, without loading a model."""
+    if backend == "keras":
+        import tensorflow
+        return tensorflow
+    if backend == "tflite":
+        return _tflite_interpreter_class()
+    if backend == "onnx":
+        import onnxruntime
+        return onnxruntime
+    raise ValueError(f"Unknown backend {backend!r}; choose from {BACKENDS}")
+
+
+def _tflite_interpreter_class():
+    """Prefer the standalone runtimes so TensorFlow itself is never imported."""
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    try:
+        from tflite_runtime.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    import tensorflow as tf
+    return tf.lite.Interpreter
+
+
+# ─────────────────────────────────────────────
+#  EXPORT (one-time, cached on disk)
+# ─────────────────────────────────────────────
+def folder_fingerprint(folder):
+    """Short hash of the image files (names, sizes, mtimes) under `folder`."""
+    h = hashlib.sha256()
+    for path in image_paths(folder):
+        st_ = os.stat(path)
+        h.update(f"{os.path.relpath(path, folder)}\0{st_.st_size}\0{st_.st_mtime_ns}\n".encode())
+    return h.hexdigest()[:10]
+
+
+def artifact_path(model_path, backend, cache_dir=None, quantize="none", calibration_dir=None):
+    """Cache location of the converted model, unique per .h5 version and
+    quantization (and, for int8, per calibration set)."""
+    st_ = os.stat(model_path)
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    ext  = {"tflite": "tflite", "onnx": "onnx"}[backend]
+    quant = "" if quantize == "none" else f".{quantize}"
+    if quantize == "int8" and calibration_dir:
+        quant += f"-{folder_fingerprint(calibration_dir)}"
+    cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(model_path)), ".vaidya_cache")
+    return os.path.join(cache_dir, f"{stem}.{st_.st_size:x}-{st_.st_mtime_ns:x}{quant}.{ext}")
+
+
+def export_tflite(keras_model, out_path, quantize="none", calibration=None):
+    import tensorflow as tf
+    converter = tf.lite.TFLiteConverter.from_keras_model(keras_model)
+    if quantize != "none":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantize == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantize == "int8":
+        converter.representative_dataset = lambda: ([x[None]] for x in calibration)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    _atomic_write(out_path, converter.convert())
+
+
+def export_onnx(keras_model, out_path, quantize="none", calibration=None):
+    import tensorflow as tf
+    import tf2onnx
+    if quantize == "float16":
+        raise ValueError("float16 quantization is only supported by the tflite backend")
+    spec = (tf.TensorSpec((None, *INPUT_SHAPE), tf.float32, name="input"),)
+    proto, _ = tf2onnx.convert.from_keras(keras_model, input_signature=spec, opset=13)
+    if quantize == "none":
+        _atomic_write(out_path, proto.SerializeToString())
+        return
+    float_path = f"{out_path}.float{os.getpid()}"
+    _atomic_write(float_path, proto.SerializeToString())
+    try:
+        _quantize_onnx(float_path, out_path, quantize, calibration)
+    finally:
+        os.remove(float_path)
+
+
+def _quantize_onnx(float_path, out_path, quantize, calibration):
+    from onnxruntime.quantization import (CalibrationDataReader, QuantFormat, QuantType,
+                                          quantize_dynamic, quantize_static)
+    tmp = f"{out_path}.tmp{os.getpid()}"
+    if quantize == "dynamic":
+        quantize_dynamic(float_path, tmp, weight_type=QuantType.QInt8)
+    else:
+        class Reader(CalibrationDataReader):
+            def __init__(self):
+                self._it = ({"input": x[None]} for x in calibration)
+
+            def get_next(self):
+                return next(self._it, None)
+
+        quantize_static(float_path, tmp, Reader(), quant_format=QuantFormat.QDQ, per_channel=True,
+                        activation_type=QuantType.QInt8, weight_type=QuantType.QInt8)
+    os.replace(tmp, out_path)
+
+
+EXPORTERS = {"tflite": export_tflite, "onnx": export_onnx}
+
+
+def _atomic_write(path, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def build_artifact(model_path, backend, cache_dir=None, check=True, atol=None,
+                   quantize="none", calibration_dir=None, eval_dir=None, min_top1=None):
+    """Convert the .h5 for `backend` unless a cached artifact already exists.
+
+    A fresh conversion is written to a staging file and verified against
+    Keras with `parity_check` (streaming the photos in `eval_dir` if given);
+    it only becomes the cached artifact once it passes, so a failed or
+    interrupted check never leaves an unverified file behind. A failing
+    export raises ParityError. Quantized exports are held to the looser
+    QUANT_ATOL / QUANT_MIN_TOP1 gate unless `atol` / `min_top1` are set.
+    """
+    if quantize not in QUANT_MODES:
+        raise ValueError(f"Unknown quantization {quantize!r}; choose from {QUANT_MODES}")
+    if quantize == "int8" and not calibration_dir:
+        raise ValueError("int8 quantization needs a calibration folder (VAIDYA_CALIBRATION_DIR)")
+    quantized = quantize != "none"
+    atol      = atol if atol is not None else QUANT_ATOL if quantized else 1e-3
+    min_top1  = min_top1 if min_top1 is not None else QUANT_MIN_TOP1 if quantized else 1.0
+
+    path = artifact_path(model_path, backend, cache_dir, quantize, calibration_dir)
+    if os.path.exists(path):
+        return path
+    log.info("Exporting %s -> %s", model_path, path)
+    root, ext = os.path.splitext(path)
+    staging   = f"{root}.staging{os.getpid()}{ext}"
+    try:
+        reference   = KerasBackend(model_path)
+        calibration = load_folder(calibration_dir, CALIBRATION_LIMIT) if quantize == "int8" else None
+        EXPORTERS[backend](reference.model, staging, quantize, calibration)
+        if check:
+            if quantized and not eval_dir:
+                log.warning("No held-out folder for the %s accuracy gate; checking on random inputs only", quantize)
+            report = parity_check(reference, make_backend(backend, staging), atol=atol, min_top1=min_top1,
+                                  batches=iter_folder(eval_dir) if eval_dir else None)
+            log.info("Parity %s/%s vs keras: top-1 %.3f, max diff %.4f", backend, quantize,
+                     report["top1_agreement"], report["max_abs_diff"])
+            if not report["ok"]:
+                raise ParityError(f"{backend}/{quantize} export differs from keras: {report}")
+            if quantized:
+                _atomic_write(f"{path}.gate.json", json.dumps(report, indent=2).encode())
+        os.replace(staging, path)
+    finally:
+        if os.path.exists(staging):
+            os.remove(staging)
+    return path
+
+
+def make_backend(backend, path, num_threads=None, inter_threads=None):
+    """`num_threads` = intra-op threads; `inter_threads` applies to keras and onnx."""
+    if backend == "keras":
+        return KerasBackend(path, num_threads, inter_threads)
+    if backend == "tflite":
+        return TFLiteBackend(path, num_threads)
+    if backend == "onnx":
+        return OnnxBackend(path, num_threads, inter_threads)
+    raise ValueError(f"Unknown backend {backend!r}; choose from {BACKENDS}")
+
+
+def load_backend(backend, model_path, cache_dir=None, num_threads=None, quantize="none",
+                 inter_threads=None, **gate):
+    """Return a ready backend, exporting the lightweight artifact on first use.
+
+    `gate` (calibration_dir, eval_dir, ...) is passed on to `build_artifact`.
+    """
+    if backend == "keras":
+        if quantize != "none":
+            raise ValueError("Quantized inference needs the tflite or onnx backend")
+        return KerasBackend(model_path, num_threads, inter_threads)
+    path = build_artifact(model_path, backend, cache_dir, quantize=quantize, **gate)
+    return make_backend(backend, path, num_threads, inter_threads)
+
+
+# ─────────────────────────────────────────────
+#  PARITY CHECK
+# ─────────────────────────────────────────────
+def parity_check(reference, candidate, batch=None, n=8, atol=1e-3, min_top1=1.0, seed=0, chunk=32,
+                 batches=None):
+    """Compare output probabilities of two backends on the same inputs.
+
+    Uses `batches` (an iterable of arrays, e.g. `iter_folder` over real
+    photos) or `batch` if given, otherwise `n` random images in [0, 1]. Only
+    the (n, classes) outputs are kept. `ok` requires a top-1 agreement of at
+    least `min_top1` and a max absolute probability difference within
+    `atol`; per-class drift is reported alongside.
+    """
+    if batches is None:
+        if batch is None:
+            batch = np.random.default_rng(seed).random((n, *INPUT_SHAPE), dtype=np.float32)
+        batches = (batch[i:i + chunk] for i in range(0, len(batch), chunk))
+    ref, cand = [], []
+    for b in batches:
+        ref.append(reference.predict(b))
+        cand.append(candidate.predict(b))
+    ref, cand = np.concatenate(ref), np.concatenate(cand)
+    err  = np.abs(ref - cand)
+    diff = float(err.max())
+    top1 = float(np.mean(np.argmax(ref, axis=1) == np.argmax(cand, axis=1)))
+    per_class = {CLASS_NAMES[i]: {"mean_abs_diff": round(float(err[:, i].mean()), 5),
+                                  "max_abs_diff": round(float(err[:, i].max()), 5)}
+                 for i in range(err.shape[1]) if i in CLASS_NAMES}
+    return {"images": len(ref), "max_abs_diff": diff, "top1_agreement": top1,
+            "per_class": per_class, "ok": diff <= atol and top1 >= min_top1}
+
+
+def main(argv=None):
+    from vaidya import config
+    ap = argparse.ArgumentParser(description="Export and verify lightweight inference artifacts.")
+    ap.add_argument("--model", default=config.MODEL_PATH)
+    ap.add_argument("--backend", choices=[b for b in BACKENDS if b != "keras"], default="tflite")
+    ap.add_argument("--cache-dir", default=config.ARTIFACT_DIR)
+    ap.add_argument("--quantize", choices=QUANT_MODES, default=config.QUANTIZE)
+    ap.add_argument("--calibration-dir", default=config.CALIBRATION_DIR, help="representative photos (int8)")
+    ap.add_argument("--eval-dir", default=config.QUANT_EVAL_DIR, help="held-out photos for the accuracy gate")
+    ap.add_argument("--atol", type=float, default=None, help="max probability difference vs keras")
+    ap.add_argument("--min-top1", type=float, default=None, help="min top-1 agreement vs keras")
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    print(build_artifact(args.model, args.backend, args.cache_dir, atol=args.atol, quantize=args.quantize,
+                         calibration_dir=args.calibration_dir, eval_dir=args.eval_dir, min_top1=args.min_top1))
+
+
+if __name__ == "__main__":
+    main()
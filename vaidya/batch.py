@@ -0,0 +1,197 @@
+"""Headless batch classification of wound photos.
+
+Streams images from a directory (recursively) or a tar archive, decodes and
+resizes them in a thread or process pool (vaidya.pipeline) while the model
+runs the previous batch, and appends one result per image to a JSONL or CSV
+file as it goes. The output file doubles as the checkpoint: with --resume,
+files already in it are skipped and new results are appended.
+
+    python -m vaidya.batch photos/ -o results.jsonl
+    python -m vaidya.batch photos.tar.gz -o results.csv --resume --workers 8
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import tarfile
+import time
+
+from vaidya import config
+from vaidya.backends import QUANT_MODES
+from vaidya.labels import CLASS_NAMES, class_info, scores_to_result
+from vaidya.pipeline import PrefetchPipeline
+from vaidya.preprocess import IMAGE_EXTS, BatchBuffer, decode_pixels
+from vaidya.startup import ModelLoader
+
+log = logging.getLogger(__name__)
+
+CSV_COLUMNS = ["file", "class", "confidence", "severity", "error", *CLASS_NAMES.values()]
+
+
+# ─────────────────────────────────────────────
+#  INPUT
+# ─────────────────────────────────────────────
+def _is_image(name):
+    return os.path.splitext(name)[1].lower() in IMAGE_EXTS
+
+
+def iter_directory(root):
+    """(relative name, path) for every image under `root`, in sorted order."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for fn in sorted(filenames):
+            if _is_image(fn):
+                path = os.path.join(dirpath, fn)
+                yield os.path.relpath(path, root), path
+
+
+def iter_tar(path):
+    """(member name, bytes) for every image in a (possibly compressed) tar, streamed."""
+    with tarfile.open(path, "r|*") as tar:
+        for member in tar:
+            if member.isfile() and _is_image(member.name):
+                yield member.name, tar.extractfile(member).read()
+
+
+def iter_sources(path):
+    return iter_directory(path) if os.path.isdir(path) else iter_tar(path)
+
+
+# ─────────────────────────────────────────────
+#  OUTPUT
+# ─────────────────────────────────────────────
+def result_row(name, predictions):
+    cls, confidence, scores = scores_to_result(predictions)
+    return {"file": name, "class": cls, "confidence": round(confidence, 3),
+            "severity": class_info(cls).get("severity"),
+            "scores": {k: round(v, 3) for k, v in scores.items()}}
+
+
+class ResultWriter:
+    """Append-only JSONL / CSV writer that knows which files are already done."""
+
+    def __init__(self, path, fmt=None, resume=False):
+        self.path = path
+        self.fmt  = fmt or ("csv" if path.endswith(".csv") else "jsonl")
+        self.done = set()
+        if resume and os.path.exists(path):
+            self._truncate_partial_line()
+            self.done = self._read_done()
+        mode = "a" if resume else "w"
+        self._f = open(path, mode, newline="", encoding="utf-8")
+        if self.fmt == "csv":
+            self._csv = csv.DictWriter(self._f, CSV_COLUMNS, extrasaction="ignore")
+            if self._f.tell() == 0:
+                self._csv.writeheader()
+
+    def _truncate_partial_line(self):
+        """Drop a half-written last line left by an interrupted run."""
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+
+    def _read_done(self):
+        with open(self.path, newline="", encoding="utf-8") as f:
+            if self.fmt == "csv":
+                return {row["file"] for row in csv.DictReader(f)}
+            return {json.loads(line)["file"] for line in f if line.strip()}
+
+    def write(self, rows):
+        for row in rows:
+            if self.fmt == "csv":
+                flat = {k: v for k, v in row.items() if k != "scores"}
+                self._csv.writerow({**flat, **row.get("scores", {})})
+            else:
+                self._f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self._f.flush()
+
+    def close(self):
+        self._f.close()
+
+
+class Progress:
+    """Periodic throughput report on stderr."""
+
+    def __init__(self, every_s=5.0, stream=sys.stderr):
+        self.every_s = every_s
+        self.stream  = stream
+        self.images = self.errors = 0
+        self.start  = self._last = time.perf_counter()
+
+    def update(self, images, errors):
+        self.images += images
+        self.errors += errors
+        now = time.perf_counter()
+        if now - self._last >= self.every_s:
+            self._last = now
+            self.report()
+
+    def rate(self):
+        return self.images / max(time.perf_counter() - self.start, 1e-9)
+
+    def report(self, final=False):
+        print(f"{'done: ' if final else ''}{self.images} images · {self.rate():.1f} img/s · "
+              f"{self.errors} errors", file=self.stream, flush=True)
+
+
+# ─────────────────────────────────────────────
+#  RUN
+# ─────────────────────────────────────────────
+def classify(source, writer, model, batch_size=32, workers=None, processes=False, prefetch=2,
+             progress=None):
+    """Classify every not-yet-done image from `source` and write results."""
+    progress = progress or Progress()
+    items    = ((n, s) for n, s in iter_sources(source) if n not in writer.done)
+    buffer   = BatchBuffer(batch_size)
+    pipeline = PrefetchPipeline(decode_pixels, batch_size, workers, processes, prefetch)
+
+    for batch in pipeline.batches(items):
+        rows = [{"file": name, "error": f"{type(v).__name__}: {v}"}
+                for name, v in batch if isinstance(v, Exception)]
+        ok = [(name, v) for name, v in batch if not isinstance(v, Exception)]
+        if ok:
+            scores = model.predict(buffer.fill_pixels(px for _, px in ok))
+            rows.extend(result_row(name, p) for (name, _), p in zip(ok, scores))
+        writer.write(rows)
+        progress.update(len(ok), len(rows) - len(ok))
+    progress.report(final=True)
+    return progress
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Classify a directory or tar archive of wound photos.")
+    ap.add_argument("source", help="image directory or .tar / .tar.gz archive")
+    ap.add_argument("-o", "--output", required=True, help="results file (.jsonl or .csv)")
+    ap.add_argument("--format", choices=["jsonl", "csv"], help="default: from the output extension")
+    ap.add_argument("--resume", action="store_true", help="skip files already in the output")
+    ap.add_argument("--batch-size", type=int, default=32)
+    ap.add_argument("--workers", type=int, default=None, help="decode workers (default: CPU count)")
+    ap.add_argument("--processes", action="store_true", help="decode in processes instead of threads")
+    ap.add_argument("--prefetch", type=int, default=2, help="batches decoded ahead of the model")
+    ap.add_argument("--backend", default=config.BACKEND, choices=["keras", "tflite", "onnx"])
+    ap.add_argument("--model", default=config.MODEL_PATH)
+    ap.add_argument("--quantize", default=config.QUANTIZE, choices=QUANT_MODES)
+    ap.add_argument("--report-every", type=float, default=5.0, help="seconds between progress lines")
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    loader = ModelLoader(args.backend, args.model, cache_dir=config.ARTIFACT_DIR,
+                         num_threads=config.NUM_THREADS,
+                         inter_threads=config.INTER_OP_THREADS, quantize=args.quantize,
+                         calibration_dir=config.CALIBRATION_DIR, eval_dir=config.QUANT_EVAL_DIR)
+    model = loader.result()
+    writer = ResultWriter(args.output, args.format, args.resume)
+    if writer.done:
+        log.info("Resuming: %d files already classified", len(writer.done))
+    try:
+        classify(args.source, writer, model, args.batch_size, args.workers, args.processes,
+                 args.prefetch, Progress(args.report_every))
+    finally:
+        writer.close()
+
+
+if __name__ == "__main__":
+    main()
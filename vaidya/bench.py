@@ -0,0 +1,359 @@
+"""Reproducible benchmarks for inference, the batching predictor, TTA, geo and
+cell-table queries and page reruns.
+
+Runs offline: the model benchmark uses a randomly initialised 7-class
+MobileNetV2 when TensorFlow is installed, else a NumPy stand-in with the same
+input/output shapes (recorded in the output as `meta.model`). All inputs are
+synthetic and seeded.
+
+    python -m vaidya.bench -o bench.json                       # full run
+    python -m vaidya.bench --quick --baseline bench.json       # compare, exit 1 on regression
+
+Results are a flat {"suite/case/metric": value} map. Metrics ending in
+`_ms` / `_s` are lower-is-better, `_per_s` higher-is-better. Model metrics
+are only compared against a baseline measured on the same `meta.model`.
+Page reruns use a fresh database and cell table in a temp directory, so
+they do not depend on what earlier runs left in the working directory.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+import numpy as np
+from PIL import Image
+
+from vaidya.cells import CellTable
+from vaidya.geo import GeoTable, HospitalIndex, haversine
+from vaidya.preprocess import INPUT_SHAPE, load_image, preprocess_image
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RESOLUTIONS = [(640, 480), (1920, 1080), (4000, 3000)]
+BATCH_SIZES = [1, 2, 4, 8, 16, 32, 64]
+DIRECTORY_SIZES = [10**2, 10**3, 10**4, 10**5, 10**6]
+MODEL_SUITES = ("predict/", "predictor/", "tta/")   # results that depend on meta.model
+SESSIONS = [1, 4, 16]
+PAGES = ["🏠 Home", "🔐 Login / Sign Up", "🏥 Hospital Database",
+         "🩹 Wound Tracking", "🚨 Emergency System", "🤖 AI Injury Detection"]
+
+
+def _timeit(fn, repeat, warmup=1):
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def _p(times, q):
+    return float(np.percentile(times, q)) * 1000
+
+
+# ─────────────────────────────────────────────
+#  SUITES
+# ─────────────────────────────────────────────
+def bench_preprocess(repeat):
+    out = {}
+    rng = np.random.default_rng(0)
+    for w, h in RESOLUTIONS:
+        base = Image.fromarray(rng.integers(0, 255, (h // 8, w // 8, 3), dtype=np.uint8)).resize((w, h))
+        buf = io.BytesIO()
+        base.save(buf, "JPEG", quality=90)
+        data = buf.getvalue()
+        times = _timeit(lambda: preprocess_image(load_image(io.BytesIO(data))), repeat)
+        out[f"preprocess/{w}x{h}/p50_ms"] = _p(times, 50)
+        out[f"preprocess/{w}x{h}/images_per_s"] = 1 / statistics.median(times)
+    return out
+
+
+class NumpyModel:
+    """Stand-in with MobileNet's I/O shapes: 7x7 pool -> dense(1280) -> dense(7) -> softmax."""
+
+    def __init__(self, seed=0):
+        rng = np.random.default_rng(seed)
+        self.w1 = rng.standard_normal((147, 1280)).astype(np.float32) / 12
+        self.w2 = rng.standard_normal((1280, 7)).astype(np.float32) / 36
+
+    def predict(self, batch):
+        n, h, w, c = batch.shape
+        pooled = batch.reshape(n, 7, h // 7, 7, w // 7, c).mean(axis=(2, 4)).reshape(n, -1)
+        logits = np.maximum(pooled @ self.w1, 0) @ self.w2
+        e = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return e / e.sum(axis=1, keepdims=True)
+
+
+def synthetic_model():
+    try:
+        import tensorflow as tf
+    except ImportError:
+        return NumpyModel(), "numpy-standin"
+    tf.keras.utils.set_random_seed(0)
+    keras_model = tf.keras.applications.MobileNetV2(input_shape=INPUT_SHAPE, weights=None, classes=7)
+
+    class Model:
+        def predict(self, batch):
+            return np.asarray(keras_model.predict_on_batch(batch))
+    return Model(), "mobilenetv2-random-init"
+
+
+def bench_predict(model, repeat, batch_sizes):
+    out = {}
+    rng = np.random.default_rng(0)
+    for n in batch_sizes:
+        batch = rng.random((n, *INPUT_SHAPE), dtype=np.float32)
+        times = _timeit(lambda: model.predict(batch), repeat, warmup=2)
+        out[f"predict/batch{n}/p50_ms"] = _p(times, 50)
+        out[f"predict/batch{n}/p95_ms"] = _p(times, 95)
+        out[f"predict/batch{n}/images_per_s"] = n / statistics.median(times)
+    return out
+
+
+def bench_predictor(model, repeat, sessions=SESSIONS):
+    """The app's request path: `sessions` concurrent single-image requests through
+    the shared BatchingPredictor, with the app's batch size and wait settings."""
+    from concurrent.futures import ThreadPoolExecutor
+    from vaidya import config
+    from vaidya.inference import BatchingPredictor
+    rng   = np.random.default_rng(0)
+    calls = []   # rows per forward pass
+
+    def predict(batch):
+        calls.append(len(batch))
+        return model.predict(batch)
+
+    predictor = BatchingPredictor(predict, config.MAX_BATCH_SIZE, config.MAX_WAIT_MS)
+    out = {}
+    try:
+        for n in sessions:
+            images = rng.random((n, *INPUT_SHAPE), dtype=np.float32)
+            with ThreadPoolExecutor(max_workers=n) as pool:
+                calls.clear()
+                times = _timeit(lambda: list(pool.map(predictor.predict, images)), repeat, warmup=2)
+            out[f"predictor/sessions{n}/p50_ms"] = _p(times, 50)
+            out[f"predictor/sessions{n}/p95_ms"] = _p(times, 95)
+            out[f"predictor/sessions{n}/images_per_s"] = n / statistics.median(times)
+            out[f"predictor/sessions{n}/mean_batch"] = len(images) * (repeat + 2) / len(calls)
+    finally:
+        predictor.close()
+    return out
+
+
+def bench_tta(model, repeat):
+    """Latency TTA adds per request: all views vs a single view, through `predict_tta`."""
+    from vaidya.tta import DEFAULT_VIEWS, predict_tta
+    image = Image.fromarray(np.random.default_rng(0).integers(0, 255, (1080, 1440, 3), dtype=np.uint8))
+    out = {}
+    for views in (("orig",), DEFAULT_VIEWS):
+        times = _timeit(lambda: predict_tta(model.predict, image, views), repeat, warmup=2)
+        out[f"tta/views{len(views)}/p50_ms"] = _p(times, 50)
+    out[f"tta/views{len(DEFAULT_VIEWS)}/added_ms"] = (out[f"tta/views{len(DEFAULT_VIEWS)}/p50_ms"]
+                                                      - out["tta/views1/p50_ms"])
+    return out
+
+
+def bench_geo(sizes, queries):
+    out = {}
+    rng = np.random.default_rng(0)
+    q_lat, q_lng = rng.uniform(8, 35, queries), rng.uniform(68, 97, queries)
+    for n in sizes:
+        lats, lngs = rng.uniform(8, 35, n), rng.uniform(68, 97, n)
+        t0 = time.perf_counter()
+        index = HospitalIndex(lats, lngs)
+        out[f"geo/n{n}/index_build_s"] = time.perf_counter() - t0
+        for k in (1, 5):
+            times = []
+            for a, b in zip(q_lat, q_lng):
+                t0 = time.perf_counter()
+                index.query(a, b, k)
+                times.append(time.perf_counter() - t0)
+            out[f"geo/n{n}/top{k}_p50_ms"] = _p(times, 50)
+            out[f"geo/n{n}/top{k}_p95_ms"] = _p(times, 95)
+        table = GeoTable(lats, lngs)
+        times = _timeit(lambda: table.top_k(q_lat[:10], q_lng[:10], 5, chunk_size=1), 10)
+        out[f"geo/n{n}/vectorized_top5_ms"] = _p(times, 50) / 10
+        if n <= 10**4:   # the original linear scan, as a reference point
+            times = _timeit(lambda: min(range(n), key=lambda i: haversine(q_lat[0], q_lng[0], lats[i], lngs[i])), 10)
+            out[f"geo/n{n}/linear_nearest_ms"] = _p(times, 50)
+    return out
+
+
+def bench_cells(queries, cell_deg=0.01):
+    """The Emergency page's production path (the cell table) next to the KD-tree.
+
+    Uses the bundled directory and a denser synthetic city (1000 hospitals
+    in one square degree); query points are drawn inside each table's grid.
+    """
+    from vaidya.hospitals import HOSPITALS
+    rng = np.random.default_rng(0)
+    cases = {"directory": ([h["lat"] for h in HOSPITALS], [h["lng"] for h in HOSPITALS]),
+             "city1000":  (rng.uniform(17, 18, 1000), rng.uniform(78, 79, 1000))}
+    out = {}
+    for name, (lats, lngs) in cases.items():
+        t0 = time.perf_counter()
+        table = CellTable.build(lats, lngs, k=5, cell_deg=cell_deg)
+        out[f"cells/{name}/build_s"] = time.perf_counter() - t0
+        index = HospitalIndex(lats, lngs)
+        q_lat = table.lat0 + rng.random(queries) * table.rows * table.cell_deg
+        q_lng = table.lng0 + rng.random(queries) * table.cols * table.cell_deg
+        for label, fn in (("table", table.query), ("kdtree", index.query)):
+            for k in (1, 5):
+                times = []
+                for a, b in zip(q_lat, q_lng):
+                    t0 = time.perf_counter()
+                    fn(a, b, k)
+                    times.append(time.perf_counter() - t0)
+                out[f"cells/{name}/{label}_top{k}_p50_ms"] = _p(times, 50)
+                out[f"cells/{name}/{label}_top{k}_p95_ms"] = _p(times, 95)
+    return out
+
+
+@contextmanager
+def _isolated_app_data(tmp):
+    """Point the app's database and cell table into `tmp` (env and, if already
+    imported, vaidya.config), restoring both afterwards."""
+    paths = {"VAIDYA_DB": ("DB_PATH", os.path.join(tmp, "bench.db")),
+             "VAIDYA_CELL_TABLE": ("CELL_TABLE", os.path.join(tmp, "emergency_cells.bin"))}
+    config = sys.modules.get("vaidya.config")
+    saved_env = {var: os.environ.get(var) for var in paths}
+    saved_cfg = {attr: getattr(config, attr) for attr, _ in paths.values()} if config else {}
+    for var, (attr, path) in paths.items():
+        os.environ[var] = path
+        if config:
+            setattr(config, attr, path)
+    try:
+        yield {attr: path for attr, path in paths.values()}
+    finally:
+        for var, old in saved_env.items():
+            if old is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = old
+        for attr, old in saved_cfg.items():
+            setattr(config, attr, old)
+
+
+def bench_pages(reruns):
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        return {}
+    from vaidya import config
+    from vaidya.cells import load_or_build
+    from vaidya.hospitals import HOSPITALS
+    out = {}
+    with tempfile.TemporaryDirectory(prefix="vaidya-bench-") as tmp, _isolated_app_data(tmp) as paths:
+        # Built up front so no rerun is timed while the app builds it in the background.
+        load_or_build(HOSPITALS, paths["CELL_TABLE"], k=5, cell_deg=config.CELL_DEG)
+        for page in PAGES:
+            at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=120).run()
+            at.sidebar.radio[0].set_value(page).run()
+            times = _timeit(at.run, reruns)
+            out[f"pages/{page.split(' ', 1)[1]}/rerun_p50_ms"] = _p(times, 50)
+    return out
+
+
+# ─────────────────────────────────────────────
+#  BASELINE
+# ─────────────────────────────────────────────
+def compare(results, baseline, threshold, min_delta_ms=0.1):
+    """[(key, old, new, ratio)] for metrics that got worse by more than `threshold`.
+
+    Latencies that moved by less than `min_delta_ms` are ignored: sub-millisecond
+    timings jitter by more than any sensible ratio.
+    """
+    worse = []
+    for key, new in results.items():
+        old = baseline.get(key)
+        if not old or not new:
+            continue
+        if key.endswith("_per_s"):
+            ratio = old / new
+        elif key.endswith(("_ms", "_s")):
+            ratio = new / old
+            if (new - old) * (1 if key.endswith("_ms") else 1000) < min_delta_ms:
+                continue
+        else:
+            continue
+        if ratio > threshold:
+            worse.append((key, old, new, ratio))
+    return worse
+
+
+def _meta(model_kind):
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True).stdout.strip()
+    except OSError:
+        rev = None
+    return {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "git": rev, "python": platform.python_version(),
+            "numpy": np.__version__, "machine": platform.machine(), "cpus": os.cpu_count(), "model": model_kind}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Run the Vaidya benchmark suite.")
+    ap.add_argument("-o", "--output", help="write results JSON here")
+    ap.add_argument("--baseline", help="compare against a previous results JSON")
+    ap.add_argument("--threshold", type=float, default=1.25, help="allowed slowdown ratio (default 1.25)")
+    ap.add_argument("--min-delta-ms", type=float, default=0.1, help="ignore latency changes smaller than this")
+    ap.add_argument("--quick", action="store_true", help="smaller sizes and fewer repeats")
+    ap.add_argument("--suites", default="preprocess,predict,predictor,tta,geo,cells,pages")
+    args = ap.parse_args(argv)
+
+    suites  = set(args.suites.split(","))
+    repeat  = 5 if args.quick else 20
+    results, model_kind = {}, None
+    if "preprocess" in suites:
+        results.update(bench_preprocess(repeat))
+    if suites & {"predict", "predictor", "tta"}:
+        model, model_kind = synthetic_model()
+    if "predict" in suites:
+        results.update(bench_predict(model, repeat, BATCH_SIZES[:5] if args.quick else BATCH_SIZES))
+    if "predictor" in suites:
+        results.update(bench_predictor(model, repeat))
+    if "tta" in suites:
+        results.update(bench_tta(model, repeat))
+    if "geo" in suites:
+        results.update(bench_geo(DIRECTORY_SIZES[:3] if args.quick else DIRECTORY_SIZES, 50 if args.quick else 200))
+    if "cells" in suites:
+        results.update(bench_cells(50 if args.quick else 200))
+    if "pages" in suites:
+        results.update(bench_pages(3 if args.quick else 10))
+
+    report = {"meta": _meta(model_kind), "results": results}
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            base = json.load(f)
+        baseline = base["results"]
+        base_model = base.get("meta", {}).get("model")
+        if model_kind and base_model != model_kind:
+            print(f"WARNING: baseline model is {base_model!r}, this run used {model_kind!r}; "
+                  f"not comparing {', '.join(MODEL_SUITES)} metrics", file=sys.stderr)
+            baseline = {k: v for k, v in baseline.items() if not k.startswith(MODEL_SUITES)}
+        worse = compare(results, baseline, args.threshold, args.min_delta_ms)
+        for key, old, new, ratio in worse:
+            print(f"REGRESSION {key}: {old:.4g} -> {new:.4g} ({ratio:.2f}x worse)", file=sys.stderr)
+        print(f"{len(worse)} regression(s) vs {args.baseline} at threshold {args.threshold}x", file=sys.stderr)
+        return 1 if worse else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""Process-wide LRU/TTL cache of prediction results.
+
+Keys are a SHA-256 of the uploaded bytes and, optionally, a 64-bit average
+hash of the preprocessed 224x224 tensor (so a re-encoded copy of the same
+photo also hits). Every lookup and store carries the model version it was
+computed with: a lookup under a new version empties the cache, and a store
+under any other version than the current one is dropped, so a request that
+started before a model swap cannot put a stale result back.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def content_key(data: bytes) -> str:
+    return "sha256:" + hashlib.sha256(data).hexdigest()
+
+
+def perceptual_key(tensor: np.ndarray, size=8) -> str:
+    """Average hash of a (224, 224, 3) tensor on a `size` x `size` grid."""
+    gray  = tensor.mean(axis=-1)
+    h, w  = gray.shape
+    cells = gray[:h - h % size, :w - w % size].reshape(size, h // size, size, w // size).mean(axis=(1, 3))
+    bits  = np.packbits((cells > cells.mean()).ravel())
+    return "ahash:" + bits.tobytes().hex()
+
+
+def model_fingerprint(path):
+    """(size, mtime_ns) of the model file, or None if it is missing."""
+    try:
+        st_ = os.stat(path)
+    except OSError:
+        return None
+    return st_.st_size, st_.st_mtime_ns
+
+
+class PredictionCache:
+    """Thread-safe bounded LRU with per-entry TTL and hit/miss/eviction counters."""
+
+    def __init__(self, max_entries=256, ttl_s=3600.0, clock=time.monotonic):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_s       = ttl_s
+        self._clock   = clock
+        self._data    = OrderedDict()   # key -> (expires_at, value)
+        self._lock    = threading.Lock()
+        self._version = None
+        self.hits = self.misses = self.evictions = 0
+
+    def _bind(self, version):
+        """Drop everything if the model changed since the last lookup (caller holds the lock)."""
+        if version != self._version:
+            self._version = version
+            self.evictions += len(self._data)
+            self._data.clear()
+
+    def get(self, key, version=None):
+        with self._lock:
+            self._bind(version)
+            entry = self._data.get(key)
+            if entry is not None:
+                if self._clock() < entry[0]:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._data[key]
+                self.evictions += 1
+            self.misses += 1
+            return None
+
+    def put(self, key, value, version=None):
+        """Store `value` unless the cache has moved on to another version meanwhile."""
+        with self._lock:
+            if version != self._version:
+                return
+            self._data[key] = (self._clock() + self.ttl_s, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._data), "hits": self.hits,
+                    "misses": self.misses, "evictions": self.evictions}
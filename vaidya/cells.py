@@ -0,0 +1,260 @@
+"""Precomputed per-cell candidate lists for instant nearest-hospital answers.
+
+The service area (the hospitals' bounding box plus a margin) is tiled into a
+lat/lng grid. For every cell we store the hospitals that can possibly be among
+the k nearest for SOME point in the cell: with c the cell centre and r the
+largest distance from c to any point of the cell, the triangle inequality
+bounds every hospital h by d(c,h) - r <= d(p,h) <= d(c,h) + r. If T is the
+k-th smallest upper bound, a hospital whose lower bound exceeds T is beaten by
+k others everywhere in the cell and can be dropped. At request time only the
+cell's few candidates are ranked exactly.
+
+The table is a single file (JSON header + CSR offsets + candidate ids) read
+with np.memmap. The header carries a fingerprint of the hospital coordinates,
+and `load_or_build` rebuilds the file whenever the data or grid changes.
+Building a fine grid over a large directory takes minutes, so do it offline
+after a data change; the app only opens a current file and otherwise builds
+it on a background thread (`CellTableLoader`) while the KD-tree answers.
+
+    python -m vaidya.cells --verify 10000       # build (if stale) and check vs brute force
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import struct
+import threading
+
+import numpy as np
+
+from vaidya.geo import GeoTable, haversine_np
+
+log = logging.getLogger(__name__)
+
+MAGIC   = b"VCELLS1\0"
+_HEADER = struct.Struct("<8sI")   # magic, JSON header length
+_ALIGN  = 64
+
+
+def fingerprint(lats, lngs):
+    """Stable hash of the hospital coordinates (order matters: ids are positions)."""
+    coords = np.stack([np.asarray(lats, dtype="<f8"), np.asarray(lngs, dtype="<f8")], axis=1)
+    return hashlib.sha256(coords.tobytes()).hexdigest()[:16]
+
+
+def _cell_radius_km(lat0, lat1, cell_deg, samples=9):
+    """Largest distance from a cell's centre to its boundary (cells of one grid row)."""
+    t = np.linspace(0.0, 1.0, samples)
+    edge_lat = np.concatenate([lat0 + t * (lat1 - lat0), lat0 + t * (lat1 - lat0), np.full(samples, lat0),
+                               np.full(samples, lat1)])
+    edge_lng = np.concatenate([np.zeros(samples), np.full(samples, cell_deg), t * cell_deg, t * cell_deg])
+    d = haversine_np((lat0 + lat1) / 2, cell_deg / 2, edge_lat, edge_lng)
+    return float(d.max()) * (1 + 1e-9)
+
+
+class CellTable:
+    """Grid of candidate hospital ids; `query` matches HospitalIndex.query."""
+
+    def __init__(self, header, offsets, candidates, lats, lngs):
+        self.header     = header
+        self.offsets    = offsets
+        self.candidates = candidates
+        self.lat0, self.lng0 = header["lat0"], header["lng0"]
+        self.cell_deg   = header["cell_deg"]
+        self.rows, self.cols = header["rows"], header["cols"]
+        self.k          = header["k"]
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lngs = np.asarray(lngs, dtype=np.float64)
+
+    # ── build ──
+    @classmethod
+    def build(cls, lats, lngs, k=5, cell_deg=0.01, margin_deg=0.25):
+        lats, lngs = np.asarray(lats, dtype=np.float64), np.asarray(lngs, dtype=np.float64)
+        k    = min(int(k), len(lats))
+        lat0 = float(np.floor((lats.min() - margin_deg) / cell_deg) * cell_deg)
+        lng0 = float(np.floor((lngs.min() - margin_deg) / cell_deg) * cell_deg)
+        rows = int(np.ceil((lats.max() + margin_deg - lat0) / cell_deg))
+        cols = int(np.ceil((lngs.max() + margin_deg - lng0) / cell_deg))
+        table = GeoTable(lats, lngs)
+        centre_lng = lng0 + (np.arange(cols) + 0.5) * cell_deg
+
+        counts, chunks = np.zeros(rows * cols, dtype=np.int64), []
+        for row in range(rows):
+            la0 = lat0 + row * cell_deg
+            r   = _cell_radius_km(la0, la0 + cell_deg, cell_deg)
+            d   = table.matrix(np.full(cols, la0 + cell_deg / 2), centre_lng)   # (cols, n)
+            bound = np.partition(d, k - 1, axis=1)[:, k - 1:k] + r
+            cell, hosp = np.nonzero(d - r <= bound)
+            counts[row * cols:(row + 1) * cols] = np.bincount(cell, minlength=cols)
+            chunks.append(hosp)
+
+        offsets = np.zeros(rows * cols + 1, dtype=np.uint32)
+        np.cumsum(counts, out=offsets[1:])
+        id_dtype = np.uint16 if len(lats) < 2**16 else np.uint32
+        candidates = np.concatenate(chunks).astype(id_dtype) if chunks else np.empty(0, id_dtype)
+        header = {"lat0": lat0, "lng0": lng0, "cell_deg": cell_deg, "margin_deg": margin_deg,
+                  "rows": rows, "cols": cols, "k": k, "hospitals": len(lats),
+                  "fingerprint": fingerprint(lats, lngs), "id_dtype": np.dtype(id_dtype).str}
+        return cls(header, offsets, candidates, lats, lngs)
+
+    # ── file format ──
+    def save(self, path):
+        """Write atomically: header, then offsets and candidates at 64-byte aligned positions."""
+        header = dict(self.header)
+        meta   = json.dumps(header).encode()
+        pos = -(-(_HEADER.size + len(meta) + 64) // _ALIGN) * _ALIGN   # room for the two positions
+        header["offsets_at"]    = pos
+        header["candidates_at"] = -(-(pos + self.offsets.nbytes) // _ALIGN) * _ALIGN
+        meta = json.dumps(header).encode()
+        assert _HEADER.size + len(meta) <= pos
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.tmp{os.getpid()}"
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, len(meta)) + meta)
+            f.seek(header["offsets_at"]);    f.write(self.offsets.astype("<u4").tobytes())
+            f.seek(header["candidates_at"]); f.write(self.candidates.astype(header["id_dtype"]).tobytes())
+        os.replace(tmp, path)
+        self.header = header
+
+    @staticmethod
+    def read_header(path):
+        with open(path, "rb") as f:
+            magic, size = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a cell table")
+            return json.loads(f.read(size))
+
+    @classmethod
+    def open(cls, path, lats, lngs):
+        """Memory-map a saved table (pages are shared between processes)."""
+        h = cls.read_header(path)
+        offsets    = np.memmap(path, "<u4", "r", offset=h["offsets_at"], shape=(h["rows"] * h["cols"] + 1,))
+        n_cands    = int(offsets[-1])
+        candidates = (np.memmap(path, h["id_dtype"], "r", offset=h["candidates_at"], shape=(n_cands,))
+                      if n_cands else np.empty(0, h["id_dtype"]))
+        return cls(h, offsets, candidates, lats, lngs)
+
+    # ── query ──
+    def cell(self, lat, lng):
+        """Flat cell id, or None outside the covered area."""
+        row = int(np.floor((lat - self.lat0) / self.cell_deg))
+        col = int(np.floor((lng - self.lng0) / self.cell_deg))
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return row * self.cols + col
+        return None
+
+    def query(self, lat, lng, k=1):
+        """(indices, distances_km) of the k nearest hospitals, or None if this
+        table cannot answer (outside the grid, or k above the precomputed k)."""
+        c = self.cell(lat, lng)
+        if c is None or k > self.k:
+            return None
+        ids = np.asarray(self.candidates[self.offsets[c]:self.offsets[c + 1]], dtype=np.intp)
+        km  = haversine_np(lat, lng, self.lats[ids], self.lngs[ids])
+        order = np.argsort(km, kind="stable")[:k]
+        return ids[order], km[order]
+
+    def stats(self):
+        sizes = np.diff(np.asarray(self.offsets, dtype=np.int64))
+        return {"cells": int(sizes.size), "k": self.k, "mean_candidates": float(sizes.mean()),
+                "max_candidates": int(sizes.max()), "fingerprint": self.header["fingerprint"]}
+
+
+def open_current(records, path, k=5, cell_deg=0.01, margin_deg=0.25):
+    """The table at `path` if it matches these records and grid, else None (never builds)."""
+    lats = [r["lat"] for r in records]
+    lngs = [r["lng"] for r in records]
+    want = {"fingerprint": fingerprint(lats, lngs), "k": min(k, len(lats)), "cell_deg": cell_deg,
+            "margin_deg": margin_deg}
+    try:
+        header = CellTable.read_header(path)
+        if all(header.get(key) == val for key, val in want.items()):
+            return CellTable.open(path, lats, lngs)
+        log.info("Cell table %s is stale", path)
+    except (OSError, ValueError, KeyError, struct.error):
+        log.info("No usable cell table at %s", path)
+    return None
+
+
+def load_or_build(records, path, k=5, cell_deg=0.01, margin_deg=0.25):
+    """Open the table at `path`, rebuilding it first if missing or stale."""
+    table = open_current(records, path, k, cell_deg, margin_deg)
+    if table is not None:
+        return table
+    log.info("Building cell table %s", path)
+    lats = [r["lat"] for r in records]
+    lngs = [r["lng"] for r in records]
+    CellTable.build(lats, lngs, k, cell_deg, margin_deg).save(path)
+    return CellTable.open(path, lats, lngs)
+
+
+class CellTableLoader:
+    """Non-blocking access to the table for request handlers.
+
+    `start()` opens the file if it is current; otherwise it builds it on a
+    daemon thread. `table` is None until a current table is available (and
+    stays None if the build fails, e.g. on a read-only disk), so callers fall
+    back to another index meanwhile.
+    """
+
+    def __init__(self, records, path, k=5, cell_deg=0.01, margin_deg=0.25):
+        self.records = records
+        self.path    = path
+        self.args    = (k, cell_deg, margin_deg)
+        self.table   = None
+        self.error   = None
+        self._thread = None
+
+    @property
+    def building(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self.table = open_current(self.records, self.path, *self.args)
+        if self.table is None:
+            self._thread = threading.Thread(target=self._build, name="vaidya-cells", daemon=True)
+            self._thread.start()
+        return self
+
+    def _build(self):
+        try:
+            self.table = load_or_build(self.records, self.path, *self.args)
+        except Exception as e:
+            self.error = e
+            log.warning("Cell table %s not built: %s", self.path, e)
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.table
+
+
+def main(argv=None):
+    from vaidya import config
+    from vaidya.hospitals import HOSPITALS
+    ap = argparse.ArgumentParser(description="Build the emergency nearest-hospital cell table.")
+    ap.add_argument("-o", "--output", default=config.CELL_TABLE)
+    ap.add_argument("-k", type=int, default=5, help="nearest hospitals the table must answer")
+    ap.add_argument("--cell-deg", type=float, default=config.CELL_DEG, help="cell size in degrees")
+    ap.add_argument("--verify", type=int, default=0, metavar="N", help="check N random points vs brute force")
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    table = load_or_build(HOSPITALS, args.output, args.k, args.cell_deg)
+    print(f"{args.output}: {os.path.getsize(args.output)} bytes, {table.stats()}")
+    if args.verify:
+        rng = np.random.default_rng(0)
+        lats = table.lat0 + rng.random(args.verify) * table.rows * table.cell_deg
+        lngs = table.lng0 + rng.random(args.verify) * table.cols * table.cell_deg
+        brute_idx, brute_km = GeoTable(table.lats, table.lngs).top_k(lats, lngs, table.k)
+        bad = sum(not np.allclose(table.query(a, b, table.k)[1], brute_km[i])
+                  for i, (a, b) in enumerate(zip(lats, lngs)))
+        print(f"verify: {args.verify - bad}/{args.verify} points match brute-force top-{table.k}")
+        return 1 if bad else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
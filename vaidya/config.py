@@ -0,0 +1,77 @@
+"""Runtime settings, read once from environment variables.
+
+Every knob has a sensible default so `streamlit run app.py` works unchanged.
+"""
+import os
+
+
+def env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def env_float(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def env_str(name, default):
+    return os.environ.get(name, default).strip() or default
+
+
+MODEL_PATH = env_str("VAIDYA_MODEL_PATH", "first_aid_wound_classifier_7class.h5")
+
+# Micro-batching of inference requests coming from all Streamlit sessions.
+MAX_BATCH_SIZE = max(1, env_int("VAIDYA_MAX_BATCH", 16))
+MAX_WAIT_MS    = max(0.0, env_float("VAIDYA_MAX_WAIT_MS", 10.0))
+
+# Inference backend: "keras" (reference), "tflite" or "onnx".
+BACKEND          = env_str("VAIDYA_BACKEND", "keras").lower()
+ARTIFACT_DIR     = os.environ.get("VAIDYA_ARTIFACT_DIR") or None
+NUM_THREADS      = env_int("VAIDYA_NUM_THREADS", 0) or None   # intra-op
+INTER_OP_THREADS = env_int("VAIDYA_INTER_OP_THREADS", 0) or None
+
+# Quantized tflite/onnx export: "none", "dynamic", "float16" or "int8".
+# int8 calibrates on CALIBRATION_DIR; the accuracy gate uses QUANT_EVAL_DIR.
+QUANTIZE        = env_str("VAIDYA_QUANTIZE", "none").lower()
+CALIBRATION_DIR = os.environ.get("VAIDYA_CALIBRATION_DIR") or None
+QUANT_EVAL_DIR  = os.environ.get("VAIDYA_QUANT_EVAL_DIR") or None
+
+# Load + warm up the model on a background thread as soon as the app starts.
+PRELOAD     = env_str("VAIDYA_PRELOAD", "0").lower() in ("1", "true", "yes")
+STARTUP_LOG = os.environ.get("VAIDYA_STARTUP_LOG") or None
+
+# Shared prediction cache keyed by upload hash (+ optional perceptual hash).
+CACHE_SIZE  = max(1, env_int("VAIDYA_CACHE_SIZE", 256))
+CACHE_TTL_S = env_float("VAIDYA_CACHE_TTL_S", 3600.0)
+CACHE_PHASH = env_str("VAIDYA_CACHE_PHASH", "0").lower() in ("1", "true", "yes")
+
+# Test-time augmentation (several views in one batch, averaged) and a
+# temperature fitted with `python -m vaidya.tta fit` for calibrated confidences.
+TTA                    = env_str("VAIDYA_TTA", "0").lower() in ("1", "true", "yes")
+TTA_VIEWS              = os.environ.get("VAIDYA_TTA_VIEWS", "")
+CONFIDENCE_CALIBRATION = os.environ.get("VAIDYA_CONFIDENCE_CALIBRATION") or None
+
+# SQLite database for accounts and wound records. Records saved without an
+# account belong to one browser session and are deleted after this many days.
+DB_PATH          = env_str("VAIDYA_DB", "vaidya.db")
+ANON_RECORD_DAYS = max(0, env_int("VAIDYA_ANON_RECORD_DAYS", 1))
+
+# Emergency page: precomputed per-cell nearest-hospital candidates. Build with
+# `python -m vaidya.cells` after a data change; a missing or stale file is
+# rebuilt on a background thread while the KD-tree answers.
+CELL_TABLE = env_str("VAIDYA_CELL_TABLE", os.path.join(".vaidya_cache", "emergency_cells.bin"))
+CELL_DEG   = env_float("VAIDYA_CELL_DEG", 0.01)
+
+# Shared model server (python -m vaidya.server): when set, app processes send
+# tensors to it over this Unix socket + shared memory instead of loading the model.
+MODEL_SERVER = os.environ.get("VAIDYA_MODEL_SERVER") or None
+
+# Metrics: scrape endpoint on localhost:<port> and/or periodic text dump.
+METRICS_PORT       = env_int("VAIDYA_METRICS_PORT", 0)
+METRICS_FILE       = os.environ.get("VAIDYA_METRICS_FILE") or None
+METRICS_INTERVAL_S = env_float("VAIDYA_METRICS_INTERVAL_S", 60.0)
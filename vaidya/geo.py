@@ -0,0 +1,218 @@
+"""Distance helpers and a spatial index for nearest-hospital queries.
+
+`haversine` is the scalar reference implementation. `haversine_np` and
+`GeoTable` are its vectorized counterparts for bulk work (distance matrices,
+per-origin top-k over millions of incidents). `HospitalIndex` stores
+facilities as 3-D unit vectors in a KD-tree: straight-line (chord) distance
+on the unit sphere grows monotonically with great-circle distance, so an exact
+Euclidean nearest-neighbour search returns the exact nearest hospitals.
+"""
+import argparse
+import csv
+import heapq
+import math
+import sys
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    R = EARTH_RADIUS_KM
+    dlat, dlon = math.radians(lat2-lat1), math.radians(lon2-lon1)
+    a = math.sin(dlat/2)**2 + math.cos(math.radians(lat1))*math.cos(math.radians(lat2))*math.sin(dlon/2)**2
+    return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+
+
+def haversine_np(lat1, lon1, lat2, lon2):
+    """Vectorized haversine in km; arguments broadcast like NumPy arrays."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2)**2
+    return EARTH_RADIUS_KM * 2 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def to_unit_xyz(lat, lng) -> np.ndarray:
+    """Degrees -> (..., 3) unit vectors."""
+    la, lo = np.radians(np.asarray(lat, dtype=np.float64)), np.radians(np.asarray(lng, dtype=np.float64))
+    cos_la = np.cos(la)
+    return np.stack([cos_la * np.cos(lo), cos_la * np.sin(lo), np.sin(la)], axis=-1)
+
+
+def chord_to_km(chord):
+    """Unit-sphere chord length -> great-circle distance in km."""
+    return EARTH_RADIUS_KM * 2 * np.arcsin(np.minimum(np.asarray(chord) / 2, 1.0))
+
+
+class HospitalIndex:
+    """Exact k-nearest-neighbour index over (lat, lng) points.
+
+    A KD-tree on unit-sphere coordinates with per-node bounding boxes; queries
+    visit O(log n) nodes with best-first search and evaluate whole leaves with
+    NumPy. `query` returns indices into the original point order.
+    """
+
+    def __init__(self, lats, lngs, leaf_size=16):
+        self.xyz  = to_unit_xyz(lats, lngs)
+        self.size = len(self.xyz)
+        self.leaf_size = max(1, int(leaf_size))
+        # Node arrays: point range [start, end) into self.order, children, bbox.
+        self._start, self._end, self._left, self._right = [], [], [], []
+        self._lo, self._hi = [], []
+        self.order = np.arange(self.size)
+        if self.size:
+            self._build(0, self.size)
+        self._lo = np.array(self._lo).reshape(-1, 3)
+        self._hi = np.array(self._hi).reshape(-1, 3)
+        self.points = self.xyz[self.order]   # leaf points stored contiguously
+
+    @classmethod
+    def from_records(cls, records, leaf_size=16):
+        return cls([r["lat"] for r in records], [r["lng"] for r in records], leaf_size)
+
+    def _build(self, start, end):
+        node = len(self._start)
+        pts  = self.xyz[self.order[start:end]]
+        self._start.append(start); self._end.append(end)
+        self._left.append(-1);     self._right.append(-1)
+        self._lo.append(pts.min(axis=0)); self._hi.append(pts.max(axis=0))
+        if end - start > self.leaf_size:
+            dim = int(np.argmax(self._hi[node] - self._lo[node]))
+            mid = (end - start) // 2
+            part = np.argpartition(pts[:, dim], mid)
+            self.order[start:end] = self.order[start:end][part]
+            self._left[node]  = self._build(start, start + mid)
+            self._right[node] = self._build(start + mid, end)
+        return node
+
+    def _box_dist2(self, node, q):
+        gap = np.maximum(0.0, np.maximum(self._lo[node] - q, q - self._hi[node]))
+        return float(gap @ gap)
+
+    def query(self, lat, lng, k=1):
+        """Return (indices, distances_km) of the k nearest points, closest first."""
+        k = min(int(k), self.size)
+        if k <= 0:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        q = to_unit_xyz(lat, lng)
+        best = []                      # max-heap of (-dist2, index), size <= k
+        todo = [(0.0, 0)]              # min-heap of (box dist2, node)
+        while todo:
+            bound, node = heapq.heappop(todo)
+            if len(best) == k and bound >= -best[0][0]:
+                break
+            left = self._left[node]
+            if left < 0:
+                s, e = self._start[node], self._end[node]
+                diff = self.points[s:e] - q
+                d2 = np.einsum("ij,ij->i", diff, diff)
+                for j in np.argsort(d2)[:k]:
+                    item = (-float(d2[j]), int(self.order[s + j]))
+                    if len(best) < k:
+                        heapq.heappush(best, item)
+                    elif item[0] > best[0][0]:
+                        heapq.heapreplace(best, item)
+                    else:
+                        break
+                continue
+            for child in (left, self._right[node]):
+                heapq.heappush(todo, (self._box_dist2(child, q), child))
+        best.sort(reverse=True)
+        idx = np.array([i for _, i in best], dtype=np.intp)
+        return idx, chord_to_km(np.sqrt([-d for d, _ in best]))
+
+
+class GeoTable:
+    """Columnar (lat, lng) table of destinations for vectorized distance queries.
+
+    `coords` is a structured array with "lat"/"lng" fields (degrees); radians
+    and cos(lat) are precomputed once. Work is split into chunks of origins so
+    memory stays at about `chunk_size * len(table)` floats for any input size.
+    """
+
+    def __init__(self, lats, lngs):
+        self.coords = np.empty(len(lats), dtype=[("lat", "f8"), ("lng", "f8")])
+        self.coords["lat"], self.coords["lng"] = lats, lngs
+        self._lat = np.radians(self.coords["lat"])
+        self._lng = np.radians(self.coords["lng"])
+        self._cos = np.cos(self._lat)
+
+    @classmethod
+    def from_records(cls, records):
+        return cls([r["lat"] for r in records], [r["lng"] for r in records])
+
+    def __len__(self):
+        return len(self.coords)
+
+    def _hav(self, lats, lngs):
+        """Haversine 'a' term, shape (m, n); monotonic in distance."""
+        la = np.radians(np.asarray(lats, dtype=np.float64))[:, None]
+        lo = np.radians(np.asarray(lngs, dtype=np.float64))[:, None]
+        return np.sin((self._lat - la) / 2)**2 + np.cos(la) * self._cos * np.sin((self._lng - lo) / 2)**2
+
+    @staticmethod
+    def _km(a):
+        return EARTH_RADIUS_KM * 2 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+    def distances(self, lat, lng) -> np.ndarray:
+        """Distances (km) from one origin to every destination, shape (n,)."""
+        return self._km(self._hav([lat], [lng])[0])
+
+    def matrix(self, lats, lngs) -> np.ndarray:
+        """Full (m, n) distance matrix in km."""
+        return self._km(self._hav(np.atleast_1d(lats), np.atleast_1d(lngs)))
+
+    def top_k(self, lats, lngs, k=5, chunk_size=8192):
+        """Per-origin k nearest destinations: (indices (m, k), km (m, k)), closest first."""
+        lats, lngs = np.atleast_1d(lats), np.atleast_1d(lngs)
+        m, k = len(lats), min(int(k), len(self))
+        out_idx = np.empty((m, k), dtype=np.intp)
+        out_km  = np.empty((m, k))
+        for s in range(0, m, chunk_size):
+            a = self._hav(lats[s:s + chunk_size], lngs[s:s + chunk_size])
+            if k < a.shape[1]:
+                part = np.argpartition(a, k - 1, axis=1)[:, :k]
+            else:
+                part = np.broadcast_to(np.arange(a.shape[1]), a.shape)
+            part_a = np.take_along_axis(a, part, axis=1)
+            order  = np.argsort(part_a, axis=1)
+            out_idx[s:s + chunk_size] = np.take_along_axis(part, order, axis=1)
+            out_km[s:s + chunk_size]  = self._km(np.take_along_axis(part_a, order, axis=1))
+        return out_idx, out_km
+
+
+def main(argv=None):
+    """Bulk nearest-hospital lookup: CSV with lat,lng columns in, ranked CSV out."""
+    from vaidya.hospitals import HOSPITALS
+    ap = argparse.ArgumentParser(description="Nearest hospitals for many incident coordinates.")
+    ap.add_argument("incidents", help="CSV file with 'lat' and 'lng' columns")
+    ap.add_argument("-o", "--output", help="output CSV (default: stdout)")
+    ap.add_argument("-k", type=int, default=1, help="hospitals per incident")
+    ap.add_argument("--chunk-size", type=int, default=100_000, help="incidents per batch")
+    args = ap.parse_args(argv)
+
+    table = GeoTable.from_records(HOSPITALS)
+    out = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    try:
+        writer = csv.writer(out)
+        writer.writerow(["row", "lat", "lng", "rank", "hospital", "phone", "distance_km"])
+        with open(args.incidents, newline="", encoding="utf-8") as f:
+            reader, row = csv.DictReader(f), 0
+            while True:
+                chunk = [(float(r["lat"]), float(r["lng"])) for _, r in zip(range(args.chunk_size), reader)]
+                if not chunk:
+                    break
+                lats, lngs = np.array(chunk).T
+                idx, km = table.top_k(lats, lngs, args.k)
+                for i in range(len(chunk)):
+                    for rank in range(idx.shape[1]):
+                        h = HOSPITALS[idx[i, rank]]
+                        writer.writerow([row + i, lats[i], lngs[i], rank + 1, h["name"], h["phone"], f"{km[i, rank]:.3f}"])
+                row += len(chunk)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""Hyderabad hospital directory used by the Hospital Database and Emergency pages."""
+
+HOSPITALS = [
+    {"name":"Apollo Hospitals",           "location":"Jubilee Hills",  "phone":"04023607777","lat":17.4239,"lng":78.4738},
+    {"name":"Yashoda Hospitals",          "location":"Somajiguda",     "phone":"04045674567","lat":17.4273,"lng":78.4601},
+    {"name":"Care Hospitals",             "location":"Banjara Hills",  "phone":"04030418888","lat":17.4156,"lng":78.4480},
+    {"name":"KIMS Hospitals",             "location":"Secunderabad",   "phone":"04044885000","lat":17.4399,"lng":78.4983},
+    {"name":"AIG Hospitals",              "location":"Gachibowli",     "phone":"04042444222","lat":17.4418,"lng":78.3636},
+    {"name":"Sunshine Hospitals",         "location":"Paradise",       "phone":"04044554455","lat":17.4450,"lng":78.5010},
+    {"name":"Continental Hospitals",      "location":"Gachibowli",     "phone":"04067000000","lat":17.4375,"lng":78.3620},
+    {"name":"Omega Hospitals",            "location":"Banjara Hills",  "phone":"04023551000","lat":17.4130,"lng":78.4470},
+    {"name":"Medicover Hospitals",        "location":"Hitech City",    "phone":"04068334455","lat":17.4489,"lng":78.3714},
+    {"name":"Gleneagles Global Hospital", "location":"Lakdi-ka-pul",   "phone":"04030608080","lat":17.3964,"lng":78.4730},
+    {"name":"Star Hospitals",             "location":"Banjara Hills",  "phone":"04044777777","lat":17.4140,"lng":78.4475},
+    {"name":"Rainbow Children's Hospital","location":"Banjara Hills",  "phone":"04045678900","lat":17.4150,"lng":78.4490},
+    {"name":"Osmania General Hospital",   "location":"Afzalgunj",      "phone":"04024600100","lat":17.3810,"lng":78.4720},
+    {"name":"Gandhi Hospital",            "location":"Secunderabad",   "phone":"04027505566","lat":17.4420,"lng":78.5000},
+    {"name":"NIMS Hospital",              "location":"Punjagutta",     "phone":"04023489000","lat":17.4280,"lng":78.4610},
+    {"name":"Basavatarakam Cancer Hosp.", "location":"Banjara Hills",  "phone":"04023551235","lat":17.4200,"lng":78.4500},
+    {"name":"Niloufer Hospital",          "location":"Lakdi-ka-pul",   "phone":"04023221234","lat":17.3970,"lng":78.4735},
+    {"name":"Virinchi Hospital",          "location":"Banjara Hills",  "phone":"04046999999","lat":17.4160,"lng":78.4485},
+    {"name":"MaxCure Hospital",           "location":"Madhapur",       "phone":"04044666666","lat":17.4502,"lng":78.3800},
+    {"name":"LV Prasad Eye Institute",    "location":"Banjara Hills",  "phone":"04030612626","lat":17.4180,"lng":78.4458},
+    {"name":"Ankura Hospital",            "location":"Madhapur",       "phone":"04044006600","lat":17.4510,"lng":78.3820},
+    {"name":"Motherhood Hospital",        "location":"Kondapur",       "phone":"04067229999","lat":17.4600,"lng":78.3720},
+    {"name":"Pace Hospitals",             "location":"Hitech City",    "phone":"04048484848","lat":17.4495,"lng":78.3720},
+    {"name":"Janani Hospital",            "location":"Kukatpally",     "phone":"04050505050","lat":17.4940,"lng":78.3960},
+    {"name":"Life Care Hospital",         "location":"Chandanagar",    "phone":"04055555555","lat":17.4880,"lng":78.3250},
+]
@@ -0,0 +1,105 @@
+"""Shared inference worker that micro-batches requests from all sessions.
+
+Streamlit runs every browser session on its own script thread. Instead of each
+thread calling the model with a batch of one, sessions hand their preprocessed
+image to a single worker thread which gathers whatever arrived within
+`max_wait_ms` (up to `max_batch_size` images) and runs one forward pass.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class BatchingPredictor:
+    """Collects single-image requests into micro-batches for `predict_fn`.
+
+    `predict_fn` receives an array of shape (n, *input_shape) and must return
+    an array of shape (n, num_classes). Each caller gets back its own row.
+    `swap` points a running worker at another model.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=16, max_wait_ms=10.0, version=None):
+        self.predict_fn     = predict_fn
+        self.version        = version
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait       = max(0.0, float(max_wait_ms)) / 1000.0
+        self._buffer = None   # reused (max_batch_size, H, W, C) input array
+        self._queue  = queue.Queue()
+        self._closed = threading.Event()
+        self._worker = threading.Thread(target=self._run, name="vaidya-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, x: np.ndarray) -> Future:
+        """Queue one image of shape (H, W, C) and return a Future of its scores."""
+        if self._closed.is_set():
+            raise RuntimeError("BatchingPredictor is closed")
+        fut = Future()
+        self._queue.put((x, fut))
+        return fut
+
+    def predict(self, x: np.ndarray, timeout=None) -> np.ndarray:
+        """Blocking helper: submit one image and wait for its score vector."""
+        return self.submit(x).result(timeout=timeout)
+
+    def swap(self, predict_fn, version=None):
+        """Run later batches with `predict_fn`; a batch already running finishes on the old one."""
+        self.predict_fn, self.version = predict_fn, version
+
+    def close(self):
+        self._closed.set()
+        self._queue.put(None)
+        self._worker.join(timeout=5)
+
+    # ── worker ──────────────────────────────────
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch    = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._closed.set()
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            # Drop requests whose caller already gave up.
+            batch = [(x, fut) for x, fut in batch if fut.set_running_or_notify_cancel()]
+            if batch:
+                self._run_batch(batch)
+            if self._closed.is_set() and self._queue.empty():
+                return
+
+    def _stage(self, xs):
+        """Copy request tensors into the preallocated batch buffer (no np.stack)."""
+        first = xs[0]
+        if self._buffer is None or self._buffer.shape[1:] != first.shape or self._buffer.dtype != first.dtype:
+            self._buffer = np.empty((self.max_batch_size, *first.shape), dtype=first.dtype)
+        for slot, x in zip(self._buffer, xs):
+            np.copyto(slot, x)
+        return self._buffer[:len(xs)]
+
+    def _run_batch(self, batch):
+        try:
+            inputs = self._stage([x for x, _ in batch])
+            scores = np.asarray(self.predict_fn(inputs))
+        except Exception as e:
+            for _, fut in batch:
+                fut.set_exception(e)
+            return
+        for row, (_, fut) in zip(scores, batch):
+            fut.set_result(row)
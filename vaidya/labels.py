@@ -0,0 +1,91 @@
+"""Class labels and first-aid info for the 7-class wound classifier.
+
+Shared by the Streamlit app and the headless tools, so it must not import
+streamlit.
+"""
+import numpy as np
+
+# ─────────────────────────────────────────────
+#  ML MODEL — CLASS LABELS
+#
+#  ⚠️  YOUR MODEL HAS 7 OUTPUT CLASSES (units=7 in final Dense layer).
+#  These class names below must match the folder names you used
+#  when training. Edit them if your folder names are different!
+# ─────────────────────────────────────────────
+CLASS_NAMES = {
+    0: "Abrasions",
+    1: "Bruises",
+    2: "Burns",
+    3: "Cut",
+    4: "Ingrown_nails",
+    5: "Laceration",
+    6: "Stab_wound"
+}
+
+CLASS_INFO = {
+    "Abrasion": {
+        "severity": "Low",
+        "medication": "Clean with antiseptic, apply antibiotic ointment, cover with bandage",
+        "healing": "3–7 days",
+        "advice": "Keep the wound clean and dry. Change dressing daily."
+    },
+    "Bruises": {
+        "severity": "Low",
+        "medication": "Apply ice pack for 20 minutes, rest the affected area",
+        "healing": "1–2 weeks",
+        "advice": "Elevate the affected limb if possible to reduce swelling."
+    },
+    "Burn": {
+        "severity": "Medium",
+        "medication": "Cool under running water for 10 mins, apply Silver Sulfadiazine Cream, cover loosely",
+        "healing": "7–14 days",
+        "advice": "Do NOT apply ice, butter or toothpaste. Seek doctor for burns larger than a palm."
+    },
+    "Cut": {
+        "severity": "Medium",
+        "medication": "Apply pressure to stop bleeding, clean wound, use butterfly strips or stitches if deep",
+        "healing": "5–10 days",
+        "advice": "Watch for signs of infection: redness, swelling, or pus."
+    },
+    "Ingrown_Nail": {
+        "severity": "Low",
+        "medication": "Soak in warm water, apply antibiotic ointment, wear comfortable footwear",
+        "healing": "1–2 weeks",
+        "advice": "If severely infected or painful, consult a doctor for minor surgery."
+    },
+    "Laceration": {
+        "severity": "High",
+        "medication": "Control bleeding with pressure, clean with saline, requires stitches — go to doctor",
+        "healing": "10–20 days",
+        "advice": "Lacerations usually require professional medical care. Do not delay."
+    },
+    "Stab_Wound": {
+        "severity": "Critical",
+        "medication": "Do NOT remove the object if embedded, apply pressure around wound, call emergency services",
+        "healing": "Weeks to months",
+        "advice": "CALL AMBULANCE IMMEDIATELY. This is a medical emergency."
+    },
+}
+
+
+def scores_to_result(predictions):
+    """(class_name, confidence_%, all_scores_dict) for one softmax row."""
+    top_idx = int(np.argmax(predictions))
+    all_scores = {CLASS_NAMES[i]: float(predictions[i]) * 100 for i in range(len(predictions))}
+    return CLASS_NAMES[top_idx], all_scores[CLASS_NAMES[top_idx]], all_scores
+
+
+def _info_key(name):
+    return name.lower().rstrip("s")
+
+_INFO_BY_KEY = {_info_key(k): v for k, v in CLASS_INFO.items()}
+
+
+def class_info(class_name):
+    """CLASS_INFO entry for a model class name.
+
+    The model's folder names ("Abrasions", "Stab_wound") and the CLASS_INFO
+    keys ("Abrasion", "Stab_Wound") differ in plural and case, so match on a
+    normalized key instead of the exact string.
+    """
+    return CLASS_INFO.get(class_name) or _INFO_BY_KEY.get(_info_key(class_name), {})
@@ -0,0 +1,278 @@
+"""Dependency-free metrics in the Prometheus text exposition format.
+
+Module-level metrics live in one process-wide REGISTRY. Expose them with
+`start_http_server(port)` (scrape http://localhost:<port>/metrics) and/or
+`start_file_dump(path, interval_s)`, which rewrites a text file periodically.
+
+    with STAGE_SECONDS.time(stage="preprocess"):
+        ...
+"""
+import bisect
+import http.server
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    esc = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    pairs = ",".join(f'{n}="{esc(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name, doc, labelnames=()):
+        self.name       = name
+        self.doc        = doc
+        self.labelnames = tuple(labelnames)
+        self._lock      = threading.Lock()
+        self._fn        = None
+
+    def set_function(self, fn):
+        """Compute the value at scrape time instead: `fn()` returns a number,
+        or a {label-values tuple: number} dict."""
+        self._fn = fn
+
+    def _collect_values(self, values):
+        if self._fn is not None:
+            try:
+                got = self._fn()
+            except Exception as e:
+                log.debug("%s %s callback failed: %s", self.type, self.name, e)
+                return []
+            values = got if isinstance(got, dict) else {(): got}
+        return [f"{self.name}{_labels(self.labelnames, k)} {float(v):g}" for k, v in list(values.items())]
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(labels[n] for n in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.type}"]
+
+
+class Counter(_Metric):
+    """Incremented with `inc`, or read from a running total kept elsewhere with `set_function`."""
+    type = "counter"
+
+    def __init__(self, name, doc, labelnames=()):
+        super().__init__(name, doc, labelnames)
+        self._values = {}
+
+    def inc(self, amount=1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0.0)
+
+    def collect(self):
+        with self._lock:
+            values = dict(self._values)
+        return self._collect_values(values)
+
+
+class Gauge(_Metric):
+    """Set directly, or computed at scrape time with `set_function`."""
+    type = "gauge"
+
+    def __init__(self, name, doc, labelnames=()):
+        super().__init__(name, doc, labelnames)
+        self._values = {}
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def collect(self):
+        with self._lock:
+            values = dict(self._values)
+        return self._collect_values(values)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, doc, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, doc, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}   # key -> [bucket counts..., sum, count]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        i   = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            if i < len(self.buckets):
+                s[i] += 1
+            s[-2] += value
+            s[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def collect(self):
+        with self._lock:
+            items = [(k, list(s)) for k, s in self._series.items()]
+        lines = []
+        for key, s in items:
+            cum = 0
+            for le, n in zip(self.buckets, s):
+                cum += n
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames + ('le',), key + (f'{le:g}',))} {cum}")
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames + ('le',), key + ('+Inf',))} {s[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {s[-2]:g}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {s[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for m in self._metrics:
+            lines += m.header() + m.collect()
+        return "\n".join(lines) + "\n"
+
+
+class SessionTracker:
+    """Counts sessions seen within the last `window_s` seconds."""
+
+    def __init__(self, window_s=300.0, clock=time.monotonic):
+        self.window_s = window_s
+        self._clock   = clock
+        self._seen    = OrderedDict()   # session id -> last seen, oldest first
+        self._lock    = threading.Lock()
+
+    def _prune(self, now):
+        """Forget sessions idle for longer than the window (caller holds the lock)."""
+        cutoff = now - self.window_s
+        while self._seen and next(iter(self._seen.values())) < cutoff:
+            self._seen.popitem(last=False)
+
+    def touch(self, session_id):
+        with self._lock:
+            now = self._clock()
+            self._seen[session_id] = now
+            self._seen.move_to_end(session_id)
+            self._prune(now)
+
+    def active(self):
+        with self._lock:
+            self._prune(self._clock())
+            return len(self._seen)
+
+
+# ─────────────────────────────────────────────
+#  APP METRICS
+# ─────────────────────────────────────────────
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "vaidya_stage_seconds", "Latency of pipeline stages (load_model, preprocess, predict, nearest_hospital, ...).",
+    ["stage"]))
+PAGE_SECONDS = REGISTRY.register(Histogram(
+    "vaidya_page_render_seconds", "Server-side time to run one page of the Streamlit script.", ["page"]))
+BATCH_SIZE = REGISTRY.register(Histogram(
+    "vaidya_inference_batch_size", "Images per model forward pass.", buckets=(1, 2, 4, 8, 16, 32, 64, 128)))
+PREDICTIONS = REGISTRY.register(Counter(
+    "vaidya_predictions_total", "Predictions served, by injury class and severity.", ["injury", "severity"]))
+ERRORS = REGISTRY.register(Counter(
+    "vaidya_errors_total", "Errors by kind (model_load, decode, predict).", ["kind"]))
+CACHE_EVENTS = REGISTRY.register(Counter(
+    "vaidya_prediction_cache_events_total", "Prediction cache hits, misses and evictions.", ["event"]))
+CACHE_ENTRIES = REGISTRY.register(Gauge(
+    "vaidya_prediction_cache_entries", "Predictions currently stored in the cache."))
+ACTIVE_SESSIONS = REGISTRY.register(Gauge(
+    "vaidya_active_sessions", "Browser sessions active in the last 5 minutes."))
+
+SESSIONS = SessionTracker()
+ACTIVE_SESSIONS.set_function(SESSIONS.active)
+
+
+def timed(fn, stage, batch_size=False):
+    """Wrap `fn(batch)` so each call is observed under `stage` (and its batch size)."""
+    def wrapper(x, *args, **kwargs):
+        if batch_size:
+            BATCH_SIZE.observe(len(x))
+        with STAGE_SECONDS.time(stage=stage):
+            return fn(x, *args, **kwargs)
+    return wrapper
+
+
+# ─────────────────────────────────────────────
+#  EXPOSITION
+# ─────────────────────────────────────────────
+def start_http_server(port, host="127.0.0.1", registry=REGISTRY):
+    """Serve GET /metrics on a daemon thread; returns the server.
+
+    If the port is taken (e.g. several app processes sharing one config) this
+    logs a warning and returns None: metrics must never take the app down.
+    """
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    try:
+        server = http.server.ThreadingHTTPServer((host, port), Handler)
+    except OSError as e:
+        log.warning("Metrics endpoint not started on %s:%d: %s", host, port, e)
+        return None
+    threading.Thread(target=server.serve_forever, name="vaidya-metrics", daemon=True).start()
+    log.info("Metrics on http://%s:%d/metrics", host, server.server_address[1])
+    return server
+
+
+def start_file_dump(path, interval_s=60.0, registry=REGISTRY):
+    """Atomically rewrite `path` with the current metrics every `interval_s` seconds."""
+    stop = threading.Event()
+
+    def loop():
+        while not stop.wait(interval_s):
+            tmp = f"{path}.tmp{os.getpid()}"   # processes sharing `path` must not share the temp file
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.write(registry.render())
+                os.replace(tmp, path)
+            except OSError as e:
+                log.warning("Could not write metrics to %s: %s", path, e)
+
+    threading.Thread(target=loop, name="vaidya-metrics-dump", daemon=True).start()
+    return stop
@@ -0,0 +1,103 @@
+"""Producer/consumer prefetch pipeline for image decoding.
+
+A producer thread pulls items from the (possibly slow, streaming) source and
+submits them in batch-sized chunks to a thread or process pool. Chunks wait in
+a bounded queue, so decoding runs at most `prefetch` batches ahead of the
+consumer (the model).
+
+PIL releases the GIL while decoding and resizing, so the default thread pool
+scales across cores. Use processes for formats or hosts where it doesn't.
+"""
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+
+_DONE = object()
+
+
+class PrefetchPipeline:
+    """Yields batches of (name, value-or-exception) decoded ahead of the caller.
+
+    `decode_fn(source)` runs in the pool; `items` yields (name, source) pairs.
+    """
+
+    def __init__(self, decode_fn, batch_size=32, workers=None, processes=False, prefetch=2):
+        self.decode_fn  = decode_fn
+        self.batch_size = max(1, int(batch_size))
+        self.workers    = workers or os.cpu_count() or 1
+        self.processes  = processes
+        self.prefetch   = max(1, int(prefetch))
+
+    def batches(self, items):
+        Pool = ProcessPoolExecutor if self.processes else ThreadPoolExecutor
+        with Pool(max_workers=self.workers) as pool:
+            chunks = queue.Queue(maxsize=self.prefetch)
+            stop   = threading.Event()
+            producer = threading.Thread(target=self._produce, args=(pool, iter(items), chunks, stop),
+                                        name="vaidya-prefetch", daemon=True)
+            producer.start()
+            try:
+                while True:
+                    chunk = chunks.get()
+                    if chunk is _DONE:
+                        break
+                    if isinstance(chunk, BaseException):
+                        raise chunk
+                    yield [(name, _outcome(fut)) for name, fut in chunk]
+            finally:
+                stop.set()
+                producer.join()
+                while not chunks.empty():               # cancel batches nobody will read
+                    leftover = chunks.get_nowait()
+                    if isinstance(leftover, list):
+                        for _, fut in leftover:
+                            fut.cancel()
+
+    def _produce(self, pool, items, chunks, stop):
+        while not stop.is_set():
+            futures, error = [], None
+            try:
+                for name, src in islice(items, self.batch_size):
+                    futures.append((name, pool.submit(self.decode_fn, src)))
+            except BaseException as e:
+                error = e            # hand over what the source gave before failing, then the error
+            if futures and not _put(chunks, futures, stop):
+                return
+            if error is not None:
+                _put(chunks, error, stop)
+                return
+            if not futures:
+                break
+        _put(chunks, _DONE, stop)
+
+
+def _put(chunks, item, stop):
+    """Blocking put (= backpressure) that gives up once the consumer has stopped."""
+    while not stop.is_set():
+        try:
+            chunks.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _outcome(fut):
+    try:
+        return fut.result()
+    except Exception as e:
+        return e
+
+
+def decode_many(decode_fn, sources, pool=None):
+    """Decode a handful of sources in parallel (e.g. one multi-file upload).
+
+    Returns values or exceptions in input order. Pass a long-lived `pool` to
+    avoid spinning threads up on every call.
+    """
+    if pool is None:
+        with ThreadPoolExecutor(max_workers=min(len(sources), os.cpu_count() or 1) or 1) as own:
+            return decode_many(decode_fn, sources, own)
+    return [_outcome(f) for f in [pool.submit(decode_fn, s) for s in sources]]
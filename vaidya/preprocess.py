@@ -0,0 +1,175 @@
+"""Image preprocessing for the 224x224 MobileNet input.
+
+Phone photos are 12MP+, so the expensive part is decoding and resizing, not
+the model input itself. `load_image` asks PIL to decode JPEGs at a reduced
+DCT scale (`Image.draft`) that is still >= 224 px, and `preprocess_into`
+normalizes the 224x224 uint8 pixels straight into a caller-provided float32
+slot, so the only full-size array that ever exists is the model input.
+"""
+import io
+import os
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+from PIL import Image
+
+TARGET_SIZE = (224, 224)
+INPUT_SHAPE = (*TARGET_SIZE[::-1], 3)
+IMAGE_EXTS  = {".jpg", ".jpeg", ".png", ".webp"}
+_SCALE = np.float32(255.0)
+
+
+def load_image(fp) -> Image.Image:
+    """Open a path / file-like, decoding JPEGs at the smallest scale >= 224 px."""
+    image = Image.open(fp)
+    image.draft("RGB", TARGET_SIZE)   # no-op for non-JPEG formats
+    return image
+
+
+def resize_rgb(image: Image.Image) -> Image.Image:
+    img = image if image.mode == "RGB" else image.convert("RGB")
+    return img if img.size == TARGET_SIZE else img.resize(TARGET_SIZE)
+
+
+def to_uint8(image: Image.Image) -> np.ndarray:
+    """224x224x3 uint8 pixels; 4x smaller than the float input, cheap to pass around."""
+    return np.asarray(resize_rgb(image))
+
+
+def decode_pixels(source) -> np.ndarray:
+    """Path, file-like or raw bytes -> 224x224x3 uint8. Safe to run in a worker pool."""
+    fp = io.BytesIO(source) if isinstance(source, bytes) else source
+    return to_uint8(load_image(fp))
+
+
+def normalize_into(pixels: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """Scale uint8 pixels to [0,1] float32 directly into `out`."""
+    np.divide(pixels, _SCALE, out=out)
+    return out
+
+
+def preprocess_into(image: Image.Image, out: np.ndarray) -> np.ndarray:
+    """Resize and write [0,1] float32 pixels into `out` (shape 224x224x3)."""
+    return normalize_into(to_uint8(image), out)
+
+
+def preprocess_image(image: Image.Image, out=None) -> np.ndarray:
+    """Resize to 224x224, normalize to [0,1], add batch dimension."""
+    if out is None:
+        out = np.empty((1, *INPUT_SHAPE), dtype=np.float32)
+    preprocess_into(image, out[0])
+    return out   # shape: (1, 224, 224, 3)
+
+
+class BatchBuffer:
+    """Reusable (capacity, 224, 224, 3) float32 buffer for batched preprocessing.
+
+    `fill` returns a view of the first n slots; it stays valid until the next
+    `fill` call, so never share one between threads (see `BufferPool`).
+    """
+
+    def __init__(self, capacity, shape=INPUT_SHAPE):
+        self.array = np.empty((capacity, *shape), dtype=np.float32)
+
+    @property
+    def capacity(self):
+        return self.array.shape[0]
+
+    def ensure(self, n):
+        if n > self.capacity:
+            self.array = np.empty((n, *self.array.shape[1:]), dtype=np.float32)
+
+    def fill(self, images) -> np.ndarray:
+        images = list(images)
+        self.ensure(len(images))
+        for slot, image in zip(self.array, images):
+            preprocess_into(image, slot)
+        return self.array[:len(images)]
+
+    def fill_pixels(self, pixels) -> np.ndarray:
+        """Like `fill`, for already decoded 224x224x3 uint8 arrays."""
+        pixels = list(pixels)
+        self.ensure(len(pixels))
+        for slot, px in zip(self.array, pixels):
+            normalize_into(px, slot)
+        return self.array[:len(pixels)]
+
+
+class BufferPool:
+    """Process-wide free list of BatchBuffers.
+
+    `checkout(n)` lends a buffer with room for n images, held exclusively until
+    the block exits, then returned for reuse. Buffers outlive the thread that
+    used them (Streamlit runs each rerun on a new thread), so steady-state
+    requests allocate nothing; the pool only grows to the peak concurrency.
+    """
+
+    def __init__(self, capacity=16):
+        self.capacity  = capacity
+        self.allocated = 0
+        self._idle     = []
+        self._lock     = threading.Lock()
+
+    @contextmanager
+    def checkout(self, n):
+        with self._lock:
+            buf = self._idle.pop() if self._idle else None
+            if buf is None:
+                self.allocated += 1
+        buf = buf or BatchBuffer(max(n, self.capacity))
+        buf.ensure(n)
+        try:
+            yield buf
+        finally:
+            with self._lock:
+                self._idle.append(buf)
+
+
+def image_paths(folder):
+    """Image files under `folder`, sorted, recursive."""
+    return sorted(os.path.join(d, f) for d, _, files in os.walk(folder)
+                  for f in files if os.path.splitext(f)[1].lower() in IMAGE_EXTS)
+
+
+def iter_pixels(folder, limit=None):
+    """uint8 pixels of the readable images under `folder` (unreadable files are skipped)."""
+    n = 0
+    for path in image_paths(folder):
+        if limit is not None and n >= limit:
+            return
+        try:
+            px = decode_pixels(path)
+        except OSError:
+            continue
+        n += 1
+        yield px
+
+
+def iter_folder(folder, batch_size=32, limit=None):
+    """Images under `folder` as (<= batch_size, 224, 224, 3) batches, all views
+    of one reused buffer: each batch is valid until the next one is produced."""
+    buffer, pending, n = BatchBuffer(batch_size), [], 0
+    for px in iter_pixels(folder, limit):
+        pending.append(px)
+        if len(pending) == batch_size:
+            n += len(pending)
+            yield buffer.fill_pixels(pending)
+            pending.clear()
+    if pending:
+        n += len(pending)
+        yield buffer.fill_pixels(pending)
+    if not n:
+        raise ValueError(f"No readable images found in {folder}")
+
+
+def load_folder(folder, limit=None) -> np.ndarray:
+    """Every image under `folder` (sorted, recursive) as one (n, 224, 224, 3) batch.
+
+    Meant for small sets such as quantization calibration images; use
+    `iter_folder` for anything that may be large.
+    """
+    pixels = list(iter_pixels(folder, limit))
+    if not pixels:
+        raise ValueError(f"No readable images found in {folder}")
+    return BatchBuffer(len(pixels)).fill_pixels(pixels)
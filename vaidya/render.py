@@ -0,0 +1,119 @@
+"""HTML fragments for card lists, result tables and the results panel.
+
+A page of cards is rendered as ONE html string inside a CSS grid, so Streamlit
+sends a single markdown element per page instead of a `st.columns(3)` block
+plus one element per card. Fragments that never change (stylesheet + header,
+class legend, badges) are built once per process.
+"""
+import os
+import re
+from functools import lru_cache
+from html import escape
+
+from vaidya.labels import CLASS_NAMES, class_info
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
+BADGE = {
+    "Low":      "<span class='badge-low'>🟢 Low</span>",
+    "Medium":   "<span class='badge-medium'>🟠 Medium</span>",
+    "High":     "<span class='badge-high'>🔴 High</span>",
+    "Critical": "<span class='badge-critical'>🟣 Critical</span>",
+}
+
+UPLOAD_PLACEHOLDER = ("<div class='upload-placeholder'><h3>📷 Upload an injury image to begin</h3>"
+                      "<p>Detects: Abrasion · Bruises · Burn · Cut · Ingrown Nail · Laceration · Stab Wound</p></div>")
+
+
+def badge(severity):
+    return BADGE.get(severity, escape(str(severity)))
+
+
+# ─────────────────────────────────────────────
+#  STATIC (built once per process)
+# ─────────────────────────────────────────────
+def minify_css(css):
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{}:;,>])\s*", r"\1", css).replace(";}", "}").strip()
+
+
+@lru_cache(maxsize=None)
+def page_head(title="🩺 Vaidya – AI First Aid & Emergency System"):
+    """Minified global stylesheet and the page header, as one markdown element."""
+    with open(os.path.join(STATIC_DIR, "app.css"), encoding="utf-8") as f:
+        css = minify_css(f.read())
+    return f"<style>{css}</style><div class='vaidya-header'><h1>{escape(title)}</h1></div>"
+
+
+@lru_cache(maxsize=None)
+def class_legend():
+    """The "What can the AI detect?" grid: every class with its severity badge."""
+    items = "".join(f"<div><b>{escape(name)}</b>{badge(class_info(name).get('severity', 'Low'))}</div>"
+                    for name in CLASS_NAMES.values())
+    return f"<div class='class-legend'>{items}</div>"
+
+
+def page_bounds(total, page, page_size):
+    """Clamp `page` (1-based) and return (page, pages, start, end)."""
+    pages = max(1, -(-total // page_size))
+    page  = min(max(1, int(page)), pages)
+    start = (page - 1) * page_size
+    return page, pages, start, min(start + page_size, total)
+
+
+def hospital_card(h):
+    phone = escape(h["phone"])
+    return (f"<div class='hospital-card'><h4>🏥 {escape(h['name'])}</h4>"
+            f"<p>📍 {escape(h['location'])}</p>"
+            f"<p>📞 <a href='tel:{phone}'>{phone}</a></p></div>")
+
+
+def wound_card(w):
+    notes = f"<p>📝 {escape(w['notes'])}</p>" if w.get("notes") else ""
+    return (f"<div class='wound-card'><h4>👤 {escape(w['name'])}</h4><p>🩺 {escape(w['condition'])}</p>"
+            f"<p>⏱ <b>{escape(w['recovery'])}</b></p><p>📅 {escape(str(w['date']))}</p>{notes}</div>")
+
+
+def card_grid(cards):
+    return f"<div class='card-grid'>{''.join(cards)}</div>"
+
+
+def result_row(n, file_name, injury, badge, confidence):
+    return (f"<tr><td>{n}</td><td>{escape(file_name)}</td><td><b>{escape(injury)}</b></td>"
+            f"<td>{badge}</td><td>{confidence:.1f}%</td></tr>")
+
+
+def error_row(n, file_name, message):
+    return f"<tr><td>{n}</td><td>{escape(file_name)}</td><td colspan='3'>❌ {escape(message)}</td></tr>"
+
+
+def results_table(rows):
+    return ("<table class='results-table'><thead><tr><th>#</th><th>Image</th><th>Injury</th>"
+            f"<th>Severity</th><th>Confidence</th></tr></thead><tbody>{''.join(rows)}</tbody></table>")
+
+
+# ─────────────────────────────────────────────
+#  RESULTS PANEL
+# ─────────────────────────────────────────────
+def score_bar(name, score, top):
+    mark = "✅ " if top else ""
+    return (f"<div class='score-row {'score-top' if top else 'score-rest'}'>"
+            f"<div class='score-head'><span>{mark}<b>{escape(name)}</b></span><span>{score:.1f}%</span></div>"
+            f"<div class='confidence-bar'><div class='confidence-fill' style='width:{int(score)}%'></div></div></div>")
+
+
+def result_panel(predicted_class, confidence, scores):
+    """Result card plus confidence bars for every class, as one HTML string."""
+    info     = class_info(predicted_class)
+    severity = info.get("severity", "Low")
+    bars = "".join(score_bar(name, score, name == predicted_class)
+                   for name, score in sorted(scores.items(), key=lambda x: x[1], reverse=True))
+    return (f"<div class='result-card'><h3>🩹 Detection Result</h3>"
+            f"<p><b>Injury Type:</b> {escape(predicted_class)}</p>"
+            f"<p><b>Severity:</b> {badge(severity)}</p>"
+            f"<p><b>Confidence:</b> {confidence:.1f}%</p>"
+            f"<p><b>💊 Treatment:</b> {escape(info.get('medication', 'See a doctor'))}</p>"
+            f"<p><b>⏱ Healing Time:</b> {escape(info.get('healing', 'Varies'))}</p>"
+            f"<p><b>💡 Advice:</b> {escape(info.get('advice', 'Consult a medical professional.'))}</p></div>"
+            f"<h3>📊 All Class Confidence Scores</h3>{bars}")
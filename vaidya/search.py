@@ -0,0 +1,120 @@
+"""In-memory ranked search over the hospital directory.
+
+Built once per process. Every name/location word goes into a token ->
+postings map; a sorted vocabulary answers prefix queries with bisect and a
+trigram -> tokens map finds substring and typo-tolerant (edit distance 1-2)
+candidates without scanning the vocabulary. Words of one or two letters have
+no inner trigram, so their substring matches come from a scan of the
+vocabulary instead. A query matches a record when
+every query word matches one of its words; records are ranked by match
+quality (exact > prefix > substring > fuzzy), with name hits weighted above
+location hits.
+"""
+import bisect
+import re
+from collections import defaultdict
+
+import numpy as np
+
+_WORD = re.compile(r"[0-9a-z]+")
+
+FIELD_WEIGHTS = {"name": 1.2, "location": 1.0}
+EXACT, PREFIX, SUBSTRING, FUZZY = 1.0, 0.8, 0.6, 0.5
+
+
+def tokenize(text):
+    return _WORD.findall(text.lower())
+
+
+def trigrams(token, pad=True):
+    t = f"^{token}$" if pad else token
+    return {t[i:i + 3] for i in range(len(t) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance, or limit + 1 as soon as it must exceed `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        if min(cur) > limit:
+            return limit + 1
+        prev = cur
+    return prev[-1]
+
+
+def max_edits(token):
+    return 0 if len(token) < 4 else 1 if len(token) < 7 else 2
+
+
+class HospitalSearchIndex:
+    """Token / trigram inverted index over the name and location of records."""
+
+    def __init__(self, records, fields=FIELD_WEIGHTS):
+        self.size = len(records)
+        postings = defaultdict(dict)          # token -> {record: best field weight}
+        for i, rec in enumerate(records):
+            for field, weight in fields.items():
+                for tok in tokenize(rec.get(field, "")):
+                    if weight > postings[tok].get(i, 0.0):
+                        postings[tok][i] = weight
+        # Postings as parallel (record ids, field weights) arrays for vectorized scoring.
+        self.postings = {tok: (np.fromiter(p.keys(), dtype=np.intp, count=len(p)),
+                               np.fromiter(p.values(), dtype=np.float32, count=len(p)))
+                         for tok, p in postings.items()}
+        self.vocab    = sorted(self.postings)
+        grams = defaultdict(set)
+        for tok in self.vocab:
+            for g in trigrams(tok):
+                grams[g].add(tok)
+        self.grams = dict(grams)
+
+    def _expand(self, q):
+        """Vocabulary tokens matching query word `q`, with their match quality."""
+        found = {}
+        if q in self.postings:
+            found[q] = EXACT
+        lo = bisect.bisect_left(self.vocab, q)
+        hi = bisect.bisect_left(self.vocab, q + "\x7f")
+        for tok in self.vocab[lo:hi]:
+            found.setdefault(tok, PREFIX)
+        if len(q) >= 3:
+            inner = [self.grams.get(g, ()) for g in trigrams(q, pad=False)]
+            candidates = set.intersection(*inner) if all(inner) else ()
+        else:
+            candidates = self.vocab      # too short for a trigram: scan
+        for tok in candidates:
+            if q in tok:
+                found.setdefault(tok, SUBSTRING)
+        limit = max_edits(q)
+        if limit:
+            candidates = set()
+            for g in trigrams(q):
+                candidates.update(self.grams.get(g, ()))
+            for tok in candidates:
+                if tok not in found and edit_distance(q, tok, limit) <= limit:
+                    found[tok] = FUZZY
+        return found
+
+    def search(self, query, limit=None):
+        """Indices of matching records, best first."""
+        words = tokenize(query)
+        if not words:
+            return list(range(self.size))
+        total = np.zeros(self.size, dtype=np.float32)
+        alive = np.ones(self.size, dtype=bool)
+        for q in words:
+            word = np.zeros(self.size, dtype=np.float32)
+            for tok, quality in self._expand(q).items():
+                ids, weights = self.postings[tok]
+                word[ids] = np.maximum(word[ids], quality * weights)   # ids are unique per token
+            alive &= word > 0
+            if not alive.any():
+                return []
+            total += word
+        hits = np.flatnonzero(alive)
+        ranked = hits[np.lexsort((hits, -total[hits]))]
+        return (ranked[:limit] if limit else ranked).tolist()
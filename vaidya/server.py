@@ -0,0 +1,326 @@
+"""Local model server shared by several app processes on one host.
+
+One server process owns the model (and its thread pools, optionally pinned to
+a set of CPUs); app processes connect over a Unix socket. Tensors never go
+through the socket: each client connection owns a shared-memory segment
+holding an input region (capacity, 224, 224, 3) float32 and an output region
+(capacity, classes) float32. A request is just "n rows are ready" (4 bytes);
+the server runs the model on a NumPy view of the client's segment, writes
+the scores back into it, and answers with a status byte. n = 0 asks for the
+server info again (model fingerprint, backend), which clients use as a cheap
+liveness check and to key their prediction caches.
+
+With --max-wait-ms > 0 requests from all connected processes are
+micro-batched together (vaidya.inference); with 0 each request runs alone,
+and the server feeds the model straight from the client's segment. The
+client still copies each batch into its segment once.
+
+    python -m vaidya.server --socket /run/vaidya/model.sock --backend tflite \\
+        --intra-op 8 --inter-op 1 --cpus 0-7
+    VAIDYA_MODEL_SERVER=/run/vaidya/model.sock streamlit run app.py
+"""
+import argparse
+import atexit
+import errno
+import json
+import logging
+import os
+import socket
+import socketserver
+import struct
+import threading
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from vaidya.inference import BatchingPredictor
+from vaidya.preprocess import INPUT_SHAPE
+
+log = logging.getLogger(__name__)
+
+_COUNT  = struct.Struct("<I")     # request: rows ready in the input region
+_STATUS = struct.Struct("<BI")    # reply: 0 ok / 1 error, payload length (error message / info)
+
+_IN_ITEM = int(np.prod(INPUT_SHAPE)) * 4
+
+
+def _recv_exact(sock, n):
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("model server connection closed")
+        buf += chunk
+    return bytes(buf)
+
+
+def _send_json(sock, obj):
+    sock.sendall(json.dumps(obj).encode() + b"\n")
+
+
+def _recv_json(sock):
+    buf = bytearray()
+    while not buf.endswith(b"\n"):
+        chunk = sock.recv(1)
+        if not chunk:
+            raise ConnectionError("model server connection closed")
+        buf += chunk
+    return json.loads(buf)
+
+
+def _views(shm, capacity, classes):
+    """(inputs, outputs) arrays backed by the shared segment."""
+    inputs  = np.ndarray((capacity, *INPUT_SHAPE), np.float32, buffer=shm.buf)
+    outputs = np.ndarray((capacity, classes), np.float32, buffer=shm.buf, offset=capacity * _IN_ITEM)
+    return inputs, outputs
+
+
+def _attach(name):
+    """Open a client's segment without letting this process's resource tracker
+    unlink it at exit (the client owns it)."""
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    return shm
+
+
+def _listening(path):
+    """True if a server is accepting connections on the Unix socket `path`."""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+def parse_cpus(spec):
+    """"0-3,8" -> {0, 1, 2, 3, 8}."""
+    cpus = set()
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        lo, _, hi = part.partition("-")
+        cpus.update(range(int(lo), int(hi or lo) + 1))
+    return cpus
+
+
+# ─────────────────────────────────────────────
+#  SERVER
+# ─────────────────────────────────────────────
+class ModelServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, model, classes, max_batch_size=16, max_wait_ms=10.0, info=None):
+        self.model   = model
+        self.classes = classes
+        self.info    = {"classes": classes, "input_shape": list(INPUT_SHAPE), **(info or {})}
+        self.batcher = BatchingPredictor(model.predict, max_batch_size, max_wait_ms) if max_wait_ms > 0 else None
+        if os.path.exists(path):
+            if _listening(path):
+                raise OSError(errno.EADDRINUSE, f"another model server is listening on {path}")
+            os.remove(path)   # stale socket from a previous run
+        super().__init__(path, _Handler)
+        os.chmod(path, 0o660)
+
+    def predict(self, inputs):
+        if self.batcher is None:
+            return self.model.predict(inputs)               # straight from shared memory
+        futures = [self.batcher.submit(x) for x in inputs]  # rows of this and other clients' requests
+        return np.stack([f.result() for f in futures])
+
+    def server_close(self):
+        super().server_close()
+        if self.batcher is not None:
+            self.batcher.close()
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        sock, server = self.request, self.server
+        try:
+            _send_json(sock, server.info)
+            hello = _recv_json(sock)
+        except ConnectionError:
+            return   # e.g. a liveness probe from `_listening`
+        shm = _attach(hello["shm"])
+        try:
+            self.serve(sock, server, *_views(shm, hello["capacity"], server.classes))
+        finally:
+            shm.close()
+
+    @staticmethod
+    def serve(sock, server, inputs, outputs):
+        while True:
+            try:
+                (n,) = _COUNT.unpack(_recv_exact(sock, _COUNT.size))
+            except ConnectionError:
+                return
+            if n == 0:
+                info = json.dumps(server.info).encode()
+                sock.sendall(_STATUS.pack(0, len(info)) + info)
+                continue
+            try:
+                if not 0 < n <= len(inputs):
+                    raise ValueError(f"batch of {n} outside 1..{len(inputs)}")
+                np.copyto(outputs[:n], server.predict(inputs[:n]))
+                sock.sendall(_STATUS.pack(0, 0))
+            except Exception as e:
+                msg = f"{type(e).__name__}: {e}".encode()
+                sock.sendall(_STATUS.pack(1, len(msg)) + msg)
+
+
+# ─────────────────────────────────────────────
+#  CLIENT
+# ─────────────────────────────────────────────
+class _Connection:
+    def __init__(self, path, capacity):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.shm  = None
+        try:
+            self.sock.connect(path)
+            self.info     = _recv_json(self.sock)
+            self.capacity = capacity
+            self.shm = shared_memory.SharedMemory(create=True,
+                                                  size=capacity * (_IN_ITEM + 4 * self.info["classes"]))
+            self.inputs, self.outputs = _views(self.shm, capacity, self.info["classes"])
+            _send_json(self.sock, {"shm": self.shm.name, "capacity": capacity})
+        except BaseException:
+            self.close()
+            raise
+
+    def run(self, n):
+        self.sock.sendall(_COUNT.pack(n))
+        status, size = _STATUS.unpack(_recv_exact(self.sock, _STATUS.size))
+        if status:
+            raise RuntimeError(f"model server: {_recv_exact(self.sock, size).decode()}")
+        return self.outputs[:n].copy()
+
+    def ping(self):
+        self.sock.sendall(_COUNT.pack(0))
+        _, size = _STATUS.unpack(_recv_exact(self.sock, _STATUS.size))
+        self.info = json.loads(_recv_exact(self.sock, size))
+        return self.info
+
+    def close(self):
+        self.sock.close()
+        if self.shm is not None:
+            self.inputs = self.outputs = None
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+
+class RemoteModel:
+    """Backend-compatible client (`predict(batch) -> scores`) for a ModelServer.
+
+    Keeps a small pool of connections, each with its own shared segment, so
+    several threads can have requests in flight. Nothing connects until the
+    first call, and a pooled connection that died (server restarted) is
+    replaced transparently, so the client can be created before the server
+    is up and outlives server restarts. `predict` copies the batch into the
+    segment, in chunks of `capacity` rows.
+    """
+    name = "remote"
+
+    def __init__(self, path, capacity=32):
+        self.path     = path
+        self.capacity = capacity
+        self.info     = None        # set by the first connection / `ping`
+        self._idle    = []
+        self._lock    = threading.Lock()
+        atexit.register(self.close)   # unlink the segments instead of leaving them to the resource tracker
+
+    def _acquire(self):
+        """(connection, pooled) - pooled ones may have gone stale since their last use."""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        conn = _Connection(self.path, self.capacity)
+        self.info = conn.info
+        return conn, False
+
+    def _release(self, conn):
+        with self._lock:
+            self._idle.append(conn)
+
+    def _call(self, fn):
+        """fn(conn) on a pooled connection, retried once on a fresh one if the pooled one is dead."""
+        while True:
+            conn, pooled = self._acquire()
+            try:
+                out = fn(conn)
+            except OSError:           # includes ConnectionError: drop the socket, reconnect next time
+                conn.close()
+                if pooled:
+                    continue
+                raise
+            except BaseException:
+                self._release(conn)
+                raise
+            self._release(conn)
+            return out
+
+    def ping(self) -> dict:
+        """Fresh server info; raises OSError if the server is not reachable."""
+        self.info = self._call(_Connection.ping)
+        return self.info
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        def run(conn):
+            out = []
+            for s in range(0, len(batch), self.capacity):
+                chunk = batch[s:s + self.capacity]
+                np.copyto(conn.inputs[:len(chunk)], chunk)
+                out.append(conn.run(len(chunk)))
+            return np.concatenate(out) if out else np.empty((0, conn.info["classes"]), np.float32)
+        return self._call(run)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+def main(argv=None):
+    from vaidya import config
+    from vaidya.cache import model_fingerprint
+    from vaidya.startup import ModelLoader
+    ap = argparse.ArgumentParser(description="Serve the wound classifier to local app processes.")
+    ap.add_argument("--socket", default=config.MODEL_SERVER or "/tmp/vaidya-model.sock")
+    ap.add_argument("--backend", default=config.BACKEND, choices=["keras", "tflite", "onnx"])
+    ap.add_argument("--model", default=config.MODEL_PATH)
+    ap.add_argument("--intra-op", type=int, default=config.NUM_THREADS, help="threads inside one op")
+    ap.add_argument("--inter-op", type=int, default=config.INTER_OP_THREADS, help="ops run in parallel")
+    ap.add_argument("--cpus", help="pin the server to these CPUs, e.g. 0-7")
+    ap.add_argument("--max-batch", type=int, default=config.MAX_BATCH_SIZE)
+    ap.add_argument("--max-wait-ms", type=float, default=config.MAX_WAIT_MS,
+                    help="micro-batch across clients; 0 = run each request alone, straight from shared memory")
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.cpus:
+        os.sched_setaffinity(0, parse_cpus(args.cpus))   # before the runtime starts its threads
+    loader = ModelLoader(args.backend, args.model, cache_dir=config.ARTIFACT_DIR, num_threads=args.intra_op,
+                         inter_threads=args.inter_op, timings_log=config.STARTUP_LOG, quantize=config.QUANTIZE,
+                         calibration_dir=config.CALIBRATION_DIR, eval_dir=config.QUANT_EVAL_DIR)
+    model   = loader.result()
+    classes = int(np.asarray(model.predict(np.zeros((1, *INPUT_SHAPE), np.float32))).shape[-1])
+    info    = {"backend": args.backend, "quantize": config.QUANTIZE, "model": list(model_fingerprint(args.model) or []),
+               "pid": os.getpid()}
+    with ModelServer(args.socket, model, classes, args.max_batch, args.max_wait_ms, info) as server:
+        log.info("Serving %s (%s) on %s · intra-op %s · inter-op %s · cpus %s", args.model, args.backend,
+                 args.socket, args.intra_op, args.inter_op, args.cpus or "all")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.remove(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Model loading with per-phase timings and optional background preloading.
+
+Cold start is split into three phases, timed separately:
+
+* ``import`` – importing the inference runtime (TensorFlow, TFLite, ORT)
+* ``load``   – reading / converting the model
+* ``warmup`` – one dummy 224x224x3 forward pass (graph tracing, allocations)
+
+With VAIDYA_PRELOAD=1 the app calls `ModelLoader.start()` on its first script
+run, so all of this happens on a background thread while the other pages stay
+responsive. Timings are logged and, if VAIDYA_STARTUP_LOG is set, appended as
+one JSON line per process to that file for comparing deploys.
+"""
+import json
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from vaidya.backends import INPUT_SHAPE, import_runtime, load_backend
+
+log = logging.getLogger(__name__)
+
+
+class ModelLoader:
+    """Loads and warms up one backend exactly once, on demand or in background."""
+
+    def __init__(self, backend, model_path, cache_dir=None, num_threads=None,
+                 warmup=True, timings_log=None, quantize="none", calibration_dir=None, eval_dir=None,
+                 inter_threads=None):
+        self.backend       = backend
+        self.model_path    = model_path
+        self.cache_dir     = cache_dir
+        self.num_threads   = num_threads
+        self.inter_threads = inter_threads
+        self.quantize      = quantize
+        self.gate          = {"calibration_dir": calibration_dir, "eval_dir": eval_dir}
+        self.warmup        = warmup
+        self.timings_log   = timings_log
+        self.timings       = {}
+        self._future       = None
+        self._lock         = threading.Lock()
+
+    def start(self) -> Future:
+        """Begin loading on a daemon thread (idempotent)."""
+        with self._lock:
+            if self._future is None:
+                self._future = Future()
+                threading.Thread(target=self._run, name="vaidya-preload", daemon=True).start()
+            return self._future
+
+    def result(self, timeout=None):
+        """The loaded backend; blocks until ready and re-raises load errors."""
+        return self.start().result(timeout=timeout)
+
+    @property
+    def ready(self):
+        return self._future is not None and self._future.done()
+
+    def _run(self):
+        self._future.set_running_or_notify_cancel()
+        try:
+            model = self._load()
+        except BaseException as e:
+            log.warning("Model load failed: %s", e)
+            self._future.set_exception(e)
+        else:
+            self._future.set_result(model)
+
+    def _load(self):
+        t0 = time.perf_counter()
+        import_runtime(self.backend)
+        t1 = time.perf_counter()
+        self.timings["import"] = t1 - t0
+
+        model = load_backend(self.backend, self.model_path, cache_dir=self.cache_dir,
+                             num_threads=self.num_threads, quantize=self.quantize,
+                             inter_threads=self.inter_threads, **self.gate)
+        t2 = time.perf_counter()
+        self.timings["load"] = t2 - t1
+
+        if self.warmup:
+            model.predict(np.zeros((1, *INPUT_SHAPE), dtype=np.float32))
+            self.timings["warmup"] = time.perf_counter() - t2
+        self._report()
+        return model
+
+    def summary(self):
+        return " · ".join(f"{k} {v:.2f}s" for k, v in self.timings.items())
+
+    def _report(self):
+        log.info("Model startup [%s/%s]: %s", self.backend, self.quantize, self.summary())
+        if not self.timings_log:
+            return
+        entry = {"ts": time.time(), "backend": self.backend, "quantize": self.quantize, "model": self.model_path,
+                 **{f"{k}_s": round(v, 4) for k, v in self.timings.items()}}
+        try:
+            with open(self.timings_log, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+        except OSError as e:
+            log.warning("Could not write startup timings to %s: %s", self.timings_log, e)
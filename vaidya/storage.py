@@ -0,0 +1,235 @@
+"""SQLite-backed storage for user accounts and wound records.
+
+One database file per deployment (VAIDYA_DB), shared by every session and
+server process. WAL mode lets readers proceed while a writer commits. A
+process shares ONE write connection between threads under a lock, and reads
+check a connection out of a small pool, so lookups never wait for each
+other or for a write (Streamlit runs every rerun on a fresh thread, so
+per-thread connections would reconnect on every rerun). Lookups go through
+indexes: users by email (UNIQUE), wound records by owner + id (newest-first
+paging) and by owner + date (expiry of old anonymous records).
+
+Anonymous visitors' records (owner "session:<id>") cannot be reached once
+the browser session ends; `expire_anonymous` deletes them after a few days.
+
+Per-day counts by condition and recovery bucket live in `wound_daily_stats`,
+kept current by an insert trigger, so summaries read a few rows per day
+instead of scanning every record.
+"""
+import hashlib
+import hmac
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, timedelta
+from itertools import islice
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id            INTEGER PRIMARY KEY,
+    name          TEXT NOT NULL,
+    email         TEXT NOT NULL UNIQUE,
+    password_hash TEXT NOT NULL,
+    created_at    TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS wound_records (
+    id        INTEGER PRIMARY KEY,
+    owner     TEXT NOT NULL,
+    name      TEXT NOT NULL,
+    condition TEXT NOT NULL,
+    notes     TEXT NOT NULL DEFAULT '',
+    recovery  TEXT NOT NULL,
+    date      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_wound_owner_id ON wound_records(owner, id);
+CREATE INDEX IF NOT EXISTS idx_wound_owner_date ON wound_records(owner, date);
+"""
+
+STATS_SCHEMA = """
+BEGIN IMMEDIATE;
+CREATE TABLE IF NOT EXISTS wound_daily_stats (
+    owner     TEXT NOT NULL,
+    day       TEXT NOT NULL,
+    condition TEXT NOT NULL,
+    recovery  TEXT NOT NULL,
+    count     INTEGER NOT NULL,
+    PRIMARY KEY (owner, day, condition, recovery)
+) WITHOUT ROWID;
+INSERT OR IGNORE INTO wound_daily_stats (owner, day, condition, recovery, count)
+    SELECT owner, date, lower(trim(condition)), recovery, COUNT(*) FROM wound_records
+    GROUP BY owner, date, lower(trim(condition)), recovery;
+CREATE TRIGGER IF NOT EXISTS trg_wound_stats AFTER INSERT ON wound_records BEGIN
+    INSERT INTO wound_daily_stats (owner, day, condition, recovery, count)
+    VALUES (NEW.owner, NEW.date, lower(trim(NEW.condition)), NEW.recovery, 1)
+    ON CONFLICT (owner, day, condition, recovery) DO UPDATE SET count = count + 1;
+END;
+COMMIT;
+"""
+
+WOUND_FIELDS = ("name", "condition", "notes", "recovery", "date")
+ANONYMOUS_PREFIX = "session:"
+PBKDF2_ITERATIONS = 100_000
+
+
+def hash_password(password, salt=None, iterations=PBKDF2_ITERATIONS):
+    salt = salt or os.urandom(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+    return f"pbkdf2_sha256${iterations}${salt.hex()}${digest.hex()}"
+
+
+def verify_password(password, encoded):
+    try:
+        _, iterations, salt, _ = encoded.split("$")
+        expected = hash_password(password, bytes.fromhex(salt), int(iterations))
+    except ValueError:
+        return False
+    return hmac.compare_digest(expected, encoded)
+
+
+class Storage:
+    """Small repository API over one SQLite file; safe to share across threads."""
+
+    def __init__(self, path="vaidya.db"):
+        self.path  = path
+        self._lock = threading.RLock()
+        self._connection = self._connect()
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._readers    = []           # idle read connections
+        self._pool_lock  = threading.Lock()
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+            if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'wound_daily_stats'").fetchone():
+                conn.executescript(STATS_SCHEMA)   # create + backfill once, then the trigger takes over
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _conn(self):
+        """The write connection, held exclusively; commits on success, rolls back on error.
+        Fetch results inside the block."""
+        with self._lock, self._connection as conn:
+            yield conn
+
+    @contextmanager
+    def _read(self):
+        """A pooled read connection for this block; the pool grows to the peak number of concurrent readers."""
+        with self._pool_lock:
+            conn = self._readers.pop() if self._readers else None
+        if conn is None:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            with self._pool_lock:
+                self._readers.append(conn)
+
+    def close(self):
+        with self._lock, self._pool_lock:
+            self._connection.close()
+            for conn in self._readers:
+                conn.close()
+            self._readers = []
+
+    # ── users ───────────────────────────────────
+    def create_user(self, name, email, password) -> bool:
+        """False if the email is already registered."""
+        try:
+            with self._conn() as conn:
+                conn.execute("INSERT INTO users (name, email, password_hash) VALUES (?, ?, ?)",
+                             (name, email, hash_password(password)))
+            return True
+        except sqlite3.IntegrityError:
+            return False
+
+    def authenticate(self, email, password):
+        """{"name", "email"} for valid credentials, else None."""
+        with self._read() as conn:
+            row = conn.execute("SELECT name, email, password_hash FROM users WHERE email = ?", (email,)).fetchone()
+        if row is None or not verify_password(password, row["password_hash"]):
+            return None
+        return {"name": row["name"], "email": row["email"]}
+
+    # ── wound records ───────────────────────────
+    def add_wound_record(self, owner, record):
+        with self._conn() as conn:
+            cur = conn.execute(
+                f"INSERT INTO wound_records (owner, {', '.join(WOUND_FIELDS)}) VALUES (?, ?, ?, ?, ?, ?)",
+                (owner, *(record.get(f) or "" for f in WOUND_FIELDS)))
+        return cur.lastrowid
+
+    def add_wound_records(self, rows, batch_size=1000) -> int:
+        """Bulk insert from an iterable of (owner, record) pairs, one transaction per batch."""
+        sql = f"INSERT INTO wound_records (owner, {', '.join(WOUND_FIELDS)}) VALUES (?, ?, ?, ?, ?, ?)"
+        rows, total = iter(rows), 0
+        while True:
+            batch = [(owner, *(rec.get(f) or "" for f in WOUND_FIELDS))
+                     for owner, rec in islice(rows, batch_size)]
+            if not batch:
+                return total
+            with self._conn() as conn:
+                conn.executemany(sql, batch)
+            total += len(batch)
+
+    def iter_wound_records(self, owner=None, batch_size=1000):
+        """Every record (all owners if `owner` is None) in id order, fetched
+        `batch_size` rows at a time by keyset paging."""
+        where = "id > ?" + (" AND owner = ?" if owner is not None else "")
+        last  = 0
+        while True:
+            args = (last,) + ((owner,) if owner is not None else ()) + (batch_size,)
+            with self._read() as conn:
+                rows = conn.execute(f"SELECT id, owner, {', '.join(WOUND_FIELDS)} FROM wound_records "
+                                    f"WHERE {where} ORDER BY id LIMIT ?", args).fetchall()
+            if not rows:
+                return
+            yield from (dict(r) for r in rows)
+            last = rows[-1]["id"]
+
+    def count_wound_records(self, owner) -> int:
+        with self._read() as conn:
+            return conn.execute("SELECT COUNT(*) FROM wound_records WHERE owner = ?", (owner,)).fetchone()[0]
+
+    def list_wound_records(self, owner, limit=None, offset=0):
+        """Newest first, as dicts with the same keys the UI used before."""
+        with self._read() as conn:
+            rows = conn.execute(
+                f"SELECT id, {', '.join(WOUND_FIELDS)} FROM wound_records WHERE owner = ? "
+                "ORDER BY id DESC LIMIT ? OFFSET ?",
+                (owner, -1 if limit is None else limit, offset))
+            return [dict(r) for r in rows]
+
+    def wound_daily_stats(self, owner, since=None):
+        """[{day, condition, recovery, count}], newest day first, from the aggregate table."""
+        with self._read() as conn:
+            rows = conn.execute(
+                "SELECT day, condition, recovery, count FROM wound_daily_stats WHERE owner = ? AND day >= ? "
+                "ORDER BY day DESC, count DESC", (owner, since or ""))
+            return [dict(r) for r in rows]
+
+    def wound_totals(self, owner, by="condition"):
+        """{condition or recovery bucket: count} over all days, from the aggregate table."""
+        if by not in ("condition", "recovery"):
+            raise ValueError(f"Cannot group wound totals by {by!r}")
+        with self._read() as conn:
+            rows = conn.execute(
+                f"SELECT {by}, SUM(count) FROM wound_daily_stats WHERE owner = ? GROUP BY {by} "
+                "ORDER BY SUM(count) DESC", (owner,))
+            return {k: n for k, n in rows}
+
+    def expire_anonymous(self, max_age_days=1) -> int:
+        """Delete anonymous sessions' records (and their aggregates) dated more than
+        `max_age_days` ago; returns the number of records removed."""
+        cutoff = str(date.today() - timedelta(days=max_age_days))
+        # Owners starting with the prefix, as a range the (owner, date) index can serve (LIKE cannot).
+        lo, hi = ANONYMOUS_PREFIX, ANONYMOUS_PREFIX[:-1] + chr(ord(ANONYMOUS_PREFIX[-1]) + 1)
+        with self._conn() as conn:
+            n = conn.execute("DELETE FROM wound_records WHERE owner >= ? AND owner < ? AND date < ?",
+                             (lo, hi, cutoff)).rowcount
+            conn.execute("DELETE FROM wound_daily_stats WHERE owner >= ? AND owner < ? AND day < ?",
+                         (lo, hi, cutoff))
+        return n
@@ -0,0 +1,231 @@
+"""Test-time augmentation and temperature-scaled confidences.
+
+TTA turns one upload into a few views (flips, centre crops at two scales),
+stacks them into ONE batch for a single forward pass and averages the softmax
+outputs. Views are cut from the decoded image before it is resized, so crops
+keep their detail.
+
+Calibration divides the log-probabilities by a temperature T fitted offline on
+labelled photos (T > 1 softens over-confident scores, T < 1 sharpens them).
+For a softmax model that is exactly temperature scaling of the logits. Fit it
+with the same TTA setting the app runs with:
+
+    python -m vaidya.tta fit labelled/ -o calibration.json --tta
+    VAIDYA_TTA=1 VAIDYA_CONFIDENCE_CALIBRATION=calibration.json streamlit run app.py
+
+`labelled/` holds one sub-folder per class, named like CLASS_NAMES.
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import time
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from vaidya.labels import CLASS_NAMES
+from vaidya.preprocess import IMAGE_EXTS, BatchBuffer, load_image, to_uint8
+
+log = logging.getLogger(__name__)
+
+VIEWS = {
+    "orig":        (1.0, False),
+    "flip":        (1.0, True),
+    "crop90":      (0.9, False),
+    "crop90_flip": (0.9, True),
+    "crop75":      (0.75, False),
+}
+DEFAULT_VIEWS = tuple(VIEWS)
+
+
+def parse_views(spec):
+    views = tuple(v.strip() for v in spec.split(",") if v.strip()) if spec else DEFAULT_VIEWS
+    unknown = [v for v in views if v not in VIEWS]
+    if unknown:
+        raise ValueError(f"Unknown TTA views {unknown}; choose from {tuple(VIEWS)}")
+    return views
+
+
+def view(image: Image.Image, name) -> np.ndarray:
+    """One 224x224x3 uint8 view: centre crop to `scale` of each side, optional mirror."""
+    scale, flip = VIEWS[name]
+    if scale < 1.0:
+        w, h = image.size
+        cw, ch = round(w * scale), round(h * scale)
+        left, top = (w - cw) // 2, (h - ch) // 2
+        image = image.crop((left, top, left + cw, top + ch))
+    if flip:
+        image = ImageOps.mirror(image)
+    return to_uint8(image)
+
+
+def tta_pixels(image: Image.Image, views=DEFAULT_VIEWS) -> np.ndarray:
+    """(len(views), 224, 224, 3) uint8 stack of augmented views."""
+    image = image if image.mode == "RGB" else image.convert("RGB")
+    return np.stack([view(image, v) for v in views])
+
+
+def decode_views(source, views=DEFAULT_VIEWS) -> np.ndarray:
+    """Path / file-like / bytes -> `tta_pixels`. Safe to run in a worker pool."""
+    fp = io.BytesIO(source) if isinstance(source, bytes) else source
+    return tta_pixels(load_image(fp), views)
+
+
+def average_views(probs, n_views):
+    """(n * n_views, C) per-view softmax rows -> (n, C) mean per image."""
+    probs = np.asarray(probs, dtype=np.float64)
+    return probs.reshape(-1, n_views, probs.shape[-1]).mean(axis=1)
+
+
+def apply_temperature(probs, temperature):
+    """Re-scale softmax rows as if their logits were divided by `temperature`."""
+    probs = np.asarray(probs, dtype=np.float64)
+    if temperature == 1.0:
+        return probs
+    z = np.log(np.clip(probs, 1e-12, 1.0)) / temperature
+    z -= z.max(axis=-1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+def predict_tta(predict_fn, image, views=DEFAULT_VIEWS, temperature=1.0, buffer=None):
+    """Calibrated class probabilities (C,) for one image, from one batched call.
+
+    Returns (probs, timings) with the seconds spent building views and in
+    the forward pass, so callers can report what TTA costs.
+    """
+    t0 = time.perf_counter()
+    batch = (buffer or BatchBuffer(len(views))).fill_pixels(tta_pixels(image, views))
+    t1 = time.perf_counter()
+    probs = predict_fn(batch)
+    t2 = time.perf_counter()
+    out = apply_temperature(average_views(probs, len(views)), temperature)[0]
+    return out, {"views": t1 - t0, "predict": t2 - t1}
+
+
+# ─────────────────────────────────────────────
+#  CALIBRATION
+# ─────────────────────────────────────────────
+def nll(probs, labels):
+    return float(-np.mean(np.log(np.clip(probs[np.arange(len(labels)), labels], 1e-12, 1.0))))
+
+
+def ece(probs, labels, bins=10):
+    """Expected calibration error of the top-1 confidence."""
+    conf, pred = probs.max(axis=1), probs.argmax(axis=1)
+    edges = np.linspace(0, 1, bins + 1)
+    total = 0.0
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        mask = (conf > lo) & (conf <= hi)
+        if mask.any():
+            total += mask.mean() * abs(conf[mask].mean() - (pred[mask] == labels[mask]).mean())
+    return float(total)
+
+
+def fit_temperature(probs, labels, lo=0.05, hi=20.0, iters=60):
+    """Temperature minimizing NLL (golden-section search on log T)."""
+    probs, labels = np.asarray(probs), np.asarray(labels)
+    f = lambda log_t: nll(apply_temperature(probs, float(np.exp(log_t))), labels)
+    a, b = np.log(lo), np.log(hi)
+    g = (np.sqrt(5) - 1) / 2
+    c, d = b - g * (b - a), a + g * (b - a)
+    fc, fd = f(c), f(d)
+    for _ in range(iters):
+        if fc < fd:
+            b, d, fd = d, c, fc
+            c = b - g * (b - a)
+            fc = f(c)
+        else:
+            a, c, fc = c, d, fd
+            d = a + g * (b - a)
+            fd = f(d)
+    return float(np.exp((a + b) / 2))
+
+
+def load_calibration(path):
+    """{"temperature", "views", ...} from a file written by `fit`; T=1 without one."""
+    if not path:
+        return {"temperature": 1.0}
+    try:
+        with open(path, encoding="utf-8") as f:
+            cal = json.load(f)
+        return {**cal, "temperature": float(cal["temperature"])}
+    except (OSError, ValueError, KeyError) as e:
+        log.warning("Ignoring calibration file %s: %s", path, e)
+        return {"temperature": 1.0}
+
+
+def iter_labelled(folder):
+    """(path, class index) for images in per-class sub-folders named like CLASS_NAMES."""
+    index = {name.lower(): i for i, name in CLASS_NAMES.items()}
+    for sub in sorted(os.listdir(folder)):
+        label = index.get(sub.lower())
+        if label is None or not os.path.isdir(os.path.join(folder, sub)):
+            continue
+        for fn in sorted(os.listdir(os.path.join(folder, sub))):
+            if os.path.splitext(fn)[1].lower() in IMAGE_EXTS:
+                yield os.path.join(folder, sub, fn), label
+
+
+def collect_probs(predict_fn, folder, views=None, batch_size=32):
+    """Softmax outputs (TTA-averaged if `views`) and labels for a labelled folder."""
+    views = views or ("orig",)
+    buffer, probs, labels, pending = BatchBuffer(batch_size * len(views)), [], [], []
+
+    def flush():
+        batch = buffer.fill_pixels(px for stack, _ in pending for px in stack)
+        probs.append(average_views(predict_fn(batch), len(views)))
+        labels.extend(lbl for _, lbl in pending)
+        pending.clear()
+
+    for path, label in iter_labelled(folder):
+        try:
+            pending.append((tta_pixels(load_image(path), views), label))
+        except OSError:
+            log.warning("Skipping unreadable %s", path)
+        if len(pending) == batch_size:
+            flush()
+    if pending:
+        flush()
+    if not labels:
+        raise ValueError(f"No labelled images under {folder} (expected sub-folders {list(CLASS_NAMES.values())})")
+    return np.concatenate(probs), np.array(labels)
+
+
+def main(argv=None):
+    from vaidya import config
+    from vaidya.cache import model_fingerprint
+    from vaidya.startup import ModelLoader
+    ap = argparse.ArgumentParser(description="Fit a temperature for calibrated confidences.")
+    ap.add_argument("action", choices=["fit"])
+    ap.add_argument("folder", help="held-out photos in one sub-folder per class")
+    ap.add_argument("-o", "--output", default=config.CONFIDENCE_CALIBRATION or "calibration.json")
+    ap.add_argument("--tta", action="store_true", default=config.TTA, help="fit on TTA-averaged scores")
+    ap.add_argument("--views", default=config.TTA_VIEWS, help=f"comma-separated, from {','.join(VIEWS)}")
+    ap.add_argument("--backend", default=config.BACKEND, choices=["keras", "tflite", "onnx"])
+    ap.add_argument("--model", default=config.MODEL_PATH)
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    model = ModelLoader(args.backend, args.model, cache_dir=config.ARTIFACT_DIR, num_threads=config.NUM_THREADS,
+                        inter_threads=config.INTER_OP_THREADS, quantize=config.QUANTIZE,
+                        calibration_dir=config.CALIBRATION_DIR, eval_dir=config.QUANT_EVAL_DIR).result()
+    views = parse_views(args.views) if args.tta else None
+    probs, labels = collect_probs(model.predict, args.folder, views)
+    t = fit_temperature(probs, labels)
+    cal = apply_temperature(probs, t)
+    report = {"temperature": round(t, 4), "tta": bool(args.tta), "views": list(views or ["orig"]),
+              "images": int(len(labels)), "accuracy": float((probs.argmax(1) == labels).mean()),
+              "nll_before": nll(probs, labels), "nll_after": nll(cal, labels),
+              "ece_before": ece(probs, labels), "ece_after": ece(cal, labels),
+              "model": list(model_fingerprint(args.model) or []), "backend": args.backend}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    log.info("T=%.3f on %d images · NLL %.4f -> %.4f · ECE %.4f -> %.4f · written to %s", t, len(labels),
+             report["nll_before"], report["nll_after"], report["ece_before"], report["ece_after"], args.output)
+
+
+if __name__ == "__main__":
+    main()
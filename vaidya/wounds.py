@@ -0,0 +1,185 @@
+"""Wound-record recovery estimates and streaming bulk export / import.
+
+Records are read from storage and written out in fixed-size batches.
+Formats: JSONL, CSV, and (with pyarrow installed) Parquet and Arrow IPC,
+written one row group / record batch per batch.
+
+    python -m vaidya.wounds export records.parquet --owner alice@example.com
+    python -m vaidya.wounds import records.jsonl --owner alice@example.com
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+from datetime import date
+from itertools import islice
+
+from vaidya.storage import WOUND_FIELDS
+
+log = logging.getLogger(__name__)
+
+FORMATS       = ("jsonl", "csv", "parquet", "arrow")
+EXPORT_FIELDS = ("owner", *WOUND_FIELDS)
+
+
+def wound_recovery(condition):
+    c = condition.lower()
+    if "fracture" in c: return "4–8 weeks"
+    if "deep"     in c: return "10–20 days"
+    if "burn"     in c: return "7–14 days"
+    return "3–5 days"
+
+
+def detect_format(path, fmt=None):
+    fmt = fmt or {".jsonl": "jsonl", ".ndjson": "jsonl", ".csv": "csv", ".parquet": "parquet",
+                  ".arrow": "arrow", ".feather": "arrow"}.get(os.path.splitext(path)[1].lower())
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format for {path}; choose from {FORMATS}")
+    return fmt
+
+
+def _batches(records, batch_size):
+    records = iter(records)
+    while batch := list(islice(records, batch_size)):
+        yield batch
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        return pyarrow
+    except ImportError as e:
+        raise ImportError("Parquet / Arrow export needs pyarrow: pip install pyarrow") from e
+
+
+def _schema(pa):
+    return pa.schema([(f, pa.string()) for f in EXPORT_FIELDS])
+
+
+# ─────────────────────────────────────────────
+#  EXPORT
+# ─────────────────────────────────────────────
+def write_records(records, path, fmt=None, batch_size=1000) -> int:
+    """Stream `records` (dicts) to `path`; returns the number written."""
+    fmt, n = detect_format(path, fmt), 0
+    if fmt in ("jsonl", "csv"):
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, EXPORT_FIELDS, extrasaction="ignore") if fmt == "csv" else None
+            if writer:
+                writer.writeheader()
+            for batch in _batches(records, batch_size):
+                if writer:
+                    writer.writerows(batch)
+                else:
+                    f.writelines(json.dumps({k: r.get(k) for k in EXPORT_FIELDS}, ensure_ascii=False) + "\n"
+                                 for r in batch)
+                n += len(batch)
+        return n
+
+    pa     = _pyarrow()
+    schema = _schema(pa)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(path, schema)
+        write  = writer.write_table
+    else:
+        writer = pa.ipc.new_file(path, schema)
+        write  = writer.write_batch
+    try:
+        for batch in _batches(records, batch_size):
+            cols = {f: [None if r.get(f) is None else str(r[f]) for r in batch] for f in EXPORT_FIELDS}
+            rb = pa.RecordBatch.from_pydict(cols, schema=schema)
+            write(pa.Table.from_batches([rb]) if fmt == "parquet" else rb)
+            n += len(batch)
+    finally:
+        writer.close()
+    return n
+
+
+def export_records(storage, path, owner=None, fmt=None, batch_size=1000) -> int:
+    """Export one owner's records (or everyone's) from `storage`, oldest first."""
+    return write_records(storage.iter_wound_records(owner, batch_size), path, fmt, batch_size)
+
+
+# ─────────────────────────────────────────────
+#  IMPORT
+# ─────────────────────────────────────────────
+def read_records(path, fmt=None, batch_size=1000):
+    """Yield record dicts from a file written by `write_records` (or compatible)."""
+    fmt = detect_format(path, fmt)
+    if fmt in ("jsonl", "csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            if fmt == "csv":
+                yield from csv.DictReader(f)
+            else:
+                yield from (json.loads(line) for line in f if line.strip())
+        return
+
+    pa = _pyarrow()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        for rb in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+            yield from rb.to_pylist()
+    else:
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                yield from reader.get_batch(i).to_pylist()
+
+
+def clean_record(raw):
+    """Validated record dict, or None if it lacks a patient name or condition."""
+    rec = {f: str(raw.get(f) or "").strip() for f in WOUND_FIELDS}
+    if not rec["name"] or not rec["condition"]:
+        return None
+    rec["recovery"] = rec["recovery"] or wound_recovery(rec["condition"])
+    rec["date"]     = rec["date"] or str(date.today())
+    return rec
+
+
+def import_records(storage, path, owner=None, fmt=None, batch_size=1000):
+    """Load records into `storage`; returns (imported, skipped).
+
+    With `owner` every record is assigned to it, otherwise each row's own
+    `owner` column is kept. Aggregates update through the storage trigger.
+    """
+    skipped = 0
+
+    def rows():
+        nonlocal skipped
+        for raw in read_records(path, fmt, batch_size):
+            rec, who = clean_record(raw), owner or raw.get("owner")
+            if rec is None or not who:
+                skipped += 1
+                continue
+            yield who, rec
+
+    imported = storage.add_wound_records(rows(), batch_size)
+    return imported, skipped
+
+
+def main(argv=None):
+    from vaidya import config
+    from vaidya.storage import Storage
+    ap = argparse.ArgumentParser(description="Export or import wound records.")
+    ap.add_argument("action", choices=["export", "import"])
+    ap.add_argument("path", help=".jsonl, .csv, .parquet or .arrow file")
+    ap.add_argument("--owner", help="account email (or session:<id>); default: all owners / per-row owner")
+    ap.add_argument("--format", choices=FORMATS, help="default: from the file extension")
+    ap.add_argument("--db", default=config.DB_PATH)
+    ap.add_argument("--batch-size", type=int, default=1000)
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    storage = Storage(args.db)
+    if args.action == "export":
+        n = export_records(storage, args.path, args.owner, args.format, args.batch_size)
+        log.info("Exported %d records to %s", n, args.path)
+    else:
+        n, skipped = import_records(storage, args.path, args.owner, args.format, args.batch_size)
+        log.info("Imported %d records from %s (%d skipped)", n, args.path, skipped)
+
+
+if __name__ == "__main__":
+    main()